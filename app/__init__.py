@@ -3,37 +3,125 @@ Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
 """
 
 import os
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
+import threading
+from collections.abc import Mapping
+import click
+from flask import Flask, current_app
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from dotenv import load_dotenv
-from .context_processors import inject_notifications
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.local import LocalProxy
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.config import default_config
+from app.database import RoutingSQLAlchemy, engine_options, REPLICA_BIND
+from app.flask_bcrypt import Bcrypt
 
 
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv()
+# Extensões, associadas à aplicação em create_app
+db = RoutingSQLAlchemy()  # Banco de dados SQLAlchemy
+bcrypt = Bcrypt()  # Hashing de senhas (bcrypt, scrypt ou argon2)
+login_manager = LoginManager()  # Gerenciamento de login
+login_manager.login_view = 'main.login'  # Rota para a página de login
 
-# Inicializa a aplicação Flask
-app = Flask(__name__)
 
-#Injetor de notificações
-@app.context_processor
-def notifications():
-    return inject_notifications()
+def create_app(config=None):
+    """
+    Cria e configura a aplicação Flask.
 
-# Configurações da aplicação
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')  # Chave secreta para segurança da aplicação
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site.db'  # URI do banco de dados
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Desabilita rastreamento de modificações do SQLAlchemy
+    As rotas, os comandos e as métricas são importados e registrados aqui (e não ao importar o pacote),
+    e os objetos que dependem da configuração (armazenamento, broker, pools) são criados no primeiro uso,
+    em cada processo (ver app_extension).
 
-# Inicializa as extensões
-db = SQLAlchemy(app)  # Banco de dados SQLAlchemy
-migrate = Migrate(app, db)  # Migrações do banco de dados
-bcrypt = Bcrypt(app)  # Hashing de senhas com Bcrypt
-login_manager = LoginManager(app)  # Gerenciamento de login
-login_manager.login_view = 'login'  # Rota para a página de login
+    Args:
+        config (dict | str): Configurações que substituem as padrão: dicionário ou caminho de importação de um objeto (opcional).
 
-# Importa os módulos de rotas e modelos
-from app import routes, models
+    Returns:
+        Flask: Aplicação configurada.
+    """
+    # Carrega as variáveis de ambiente do arquivo .env
+    load_dotenv()
+
+    app = Flask(__name__)
+    app.config.update(default_config(app.instance_path))
+    if isinstance(config, Mapping):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))  # Pool de conexões
+    if app.config['DATABASE_REPLICA_URL']:
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: app.config['DATABASE_REPLICA_URL']}  # Leituras das views marcadas
+
+    # Atrás de um proxy reverso, request.remote_addr passa a ser o IP do cliente (limites de login por IP)
+    if app.config['PROXY_FIX_X_FOR'] or app.config['PROXY_FIX_X_PROTO']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'], x_proto=app.config['PROXY_FIX_X_PROTO'])
+
+    db.init_app(app)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+    # O Flask-Migrate importa o Alembic (a parte mais lenta da inicialização) e só é usado pelos comandos "flask db"
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+    # Bytecode dos templates em disco: novos processos não recompilam os templates (ver "flask compile-templates")
+    if app.config['JINJA_BYTECODE_CACHE']:
+        os.makedirs(app.config['JINJA_BYTECODE_CACHE'], exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['JINJA_BYTECODE_CACHE'])
+
+    from app import routes, serving, commands, metrics
+    from app.uploads import UploadRequest
+    app.request_class = UploadRequest
+    app.register_blueprint(routes.bp)
+    app.register_blueprint(serving.bp)
+    app.register_blueprint(commands.bp)
+    metrics.init_app(app)
+    return app
+
+
+def preload(app):
+    """
+    Prepara a aplicação no processo mestre, antes do fork dos workers (ver wsgi.py).
+
+    Compila todos os templates: o código compilado fica no cache do ambiente Jinja, cujas páginas
+    de memória são compartilhadas pelos workers, e o bytecode é gravado em JINJA_BYTECODE_CACHE.
+    Nenhuma conexão com o banco é aberta, para que os workers não herdem conexões do mestre.
+
+    Args:
+        app (Flask): Aplicação Flask.
+
+    Returns:
+        list: Nomes dos templates compilados.
+    """
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def app_extension(name, factory):
+    """
+    Cria um proxy para um objeto da aplicação atual que é construído no primeiro uso.
+
+    O objeto fica em app.extensions[name]. Como é criado no processo que o usa, threads, pools e
+    clientes de rede não são herdados do processo mestre quando a aplicação é pré-carregada antes
+    do fork dos workers.
+
+    Args:
+        name (str): Chave em app.extensions.
+        factory (function): Função que recebe a aplicação e cria o objeto.
+
+    Returns:
+        LocalProxy: Proxy para o objeto da aplicação atual.
+    """
+    lock = threading.Lock()
+
+    def get():
+        app = current_app._get_current_object()
+        instance = app.extensions.get(name)
+        if instance is None:
+            with lock:
+                instance = app.extensions.get(name)
+                if instance is None:
+                    instance = app.extensions[name] = factory(app)
+        return instance
+    return LocalProxy(get)
@@ -0,0 +1,89 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Valor sentinela para diferenciar "não está no cache" de um valor None armazenado
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache em memória, seguro entre threads, com tempo de expiração e tamanho máximo.
+
+    Quando o limite de itens é atingido, o item usado há mais tempo é descartado (LRU).
+
+    Métodos:
+        get(key): Retorna o valor armazenado ou MISSING se não existir ou tiver expirado.
+        set(key, value): Armazena um valor.
+        delete(key): Remove um valor.
+        clear(): Remove todos os valores.
+    """
+
+    def __init__(self, ttl, max_size=10000):
+        """
+        Inicializa o cache.
+
+        Args:
+            ttl (float): Tempo de vida dos itens em segundos.
+            max_size (int): Quantidade máxima de itens armazenados.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Busca um valor no cache.
+
+        Args:
+            key: Chave do item.
+
+        Returns:
+            object: Valor armazenado ou MISSING.
+        """
+        with self._lock:
+            item = self._items.get(key, MISSING)
+            if item is MISSING:
+                return MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return MISSING
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Armazena um valor no cache.
+
+        Args:
+            key: Chave do item.
+            value: Valor a ser armazenado.
+        """
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Remove um valor do cache.
+
+        Args:
+            key: Chave do item.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        """
+        Remove todos os valores do cache.
+        """
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,217 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import os
+import subprocess
+from datetime import datetime
+import click
+from flask import Blueprint, current_app
+from sqlalchemy import func
+from app import db, preload
+from app.models import User, Post, Like, Comment
+from app.timeline import rebuild_timeline
+from app.notifications import trim_notifications as trim_old_notifications
+from app.media import process_post_image, variant_filename, purge_unreferenced_media, TRANSCODED_VARIANTS
+from app.transcoding import MEDIA_KINDS, transcode_video, transcode_audio, ffmpeg_binary, transcode_options, set_media_status
+from app.friendships import purge_requests
+from app.search import search_enabled, rebuild_search_index
+from app.uploads import purge_uploads as purge_stale_uploads
+from app.storage import storage, media_key, working_copy, publish
+from app.serving import MEDIA_FOLDERS
+
+# Comandos registrados diretamente no grupo "flask" (sem o prefixo do blueprint)
+bp = Blueprint('commands', __name__, cli_group=None)
+
+
+@bp.cli.command('recount-posts')
+@click.option('--batch-size', default=1000, show_default=True, help='Quantidade de posts atualizados por transação.')
+def recount_posts(batch_size):
+    """
+    Recalcula like_count e comment_count dos posts a partir das tabelas Like e Comment.
+
+    Args:
+        batch_size (int): Quantidade de posts atualizados por transação.
+    """
+    like_total = db.session.query(func.count(Like.id)).filter(Like.post_id == Post.id).correlate(Post).as_scalar()
+    comment_total = db.session.query(func.count(Comment.id)).filter(Comment.post_id == Post.id).correlate(Post).as_scalar()
+
+    # Percorre os posts em faixas de IDs para manter as transações curtas
+    last_id = 0
+    max_id = db.session.query(func.max(Post.id)).scalar() or 0
+    while last_id < max_id:
+        upper = last_id + batch_size
+        Post.query.filter(Post.id > last_id, Post.id <= upper).update(
+            {Post.like_count: like_total, Post.comment_count: comment_total},
+            synchronize_session=False
+        )
+        db.session.commit()
+        last_id = upper
+    # As contagens exibidas podem ter mudado: invalida os ETags das páginas dos autores e dos amigos
+    User.query.filter(User.id.in_(db.session.query(Post.user_id))).update(
+        {User.changed_at: datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Recounted likes and comments for posts up to id {max_id}.')
+
+
+@bp.cli.command('rebuild-timelines')
+@click.option('--limit', default=None, type=int, help='Posts mantidos por timeline (padrão: TIMELINE_BACKFILL_SIZE).')
+def rebuild_timelines(limit):
+    """
+    Reconstrói as timelines pré-calculadas de todos os usuários.
+
+    Args:
+        limit (int): Quantidade máxima de posts por timeline.
+    """
+    limit = limit or current_app.config['TIMELINE_BACKFILL_SIZE']
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+    for user_id in user_ids:
+        # Um commit por usuário para manter as transações curtas
+        rebuild_timeline(user_id, limit)
+        db.session.commit()
+    click.echo(f'Rebuilt {len(user_ids)} timelines.')
+
+
+@bp.cli.command('trim-notifications')
+@click.option('--days', default=None, type=int, help='Idade máxima das notificações (padrão: NOTIFICATION_RETENTION_DAYS).')
+@click.option('--batch-size', default=1000, show_default=True, help='Quantidade de notificações removidas por transação.')
+def trim_notifications(days, batch_size):
+    """
+    Remove as notificações antigas em lotes, ajustando os contadores de não lidas.
+
+    Args:
+        days (int): Idade máxima, em dias, das notificações mantidas.
+        batch_size (int): Quantidade de notificações removidas por transação.
+    """
+    days = days or current_app.config['NOTIFICATION_RETENTION_DAYS']
+    removed = trim_old_notifications(days, batch_size)
+    click.echo(f'Removed {removed} notifications older than {days} days.')
+
+
+@bp.cli.command('purge-friend-requests')
+@click.option('--days', default=None, type=int, help='Idade máxima dos pedidos respondidos (padrão: FRIEND_REQUEST_RETENTION_DAYS).')
+@click.option('--batch-size', default=1000, show_default=True, help='Quantidade de pedidos removidos por transação.')
+def purge_friend_requests(days, batch_size):
+    """
+    Remove em lotes os pedidos de amizade aceitos ou rejeitados há mais de FRIEND_REQUEST_RETENTION_DAYS dias.
+
+    Args:
+        days (int): Idade máxima, em dias, dos pedidos respondidos mantidos.
+        batch_size (int): Quantidade de pedidos removidos por transação.
+    """
+    days = days if days is not None else current_app.config['FRIEND_REQUEST_RETENTION_DAYS']
+    removed = purge_requests(days, batch_size)
+    click.echo(f'Removed {removed} answered friend requests older than {days} days.')
+
+
+@bp.cli.command('purge-uploads')
+@click.option('--hours', default=None, type=float, help='Idade máxima dos uploads em andamento (padrão: UPLOAD_RETENTION_HOURS).')
+def purge_uploads(hours):
+    """
+    Remove os uploads abandonados: envios em partes interrompidos ou nunca usados em um post.
+
+    Args:
+        hours (float): Idade máxima, em horas, dos arquivos mantidos.
+    """
+    hours = hours if hours is not None else current_app.config['UPLOAD_RETENTION_HOURS']
+    removed = purge_stale_uploads(hours)
+    click.echo(f'Removed {removed} upload files older than {hours:g} hours.')
+
+
+@bp.cli.command('purge-media')
+@click.option('--hours', default=None, type=float, help='Idade mínima das mídias removidas (padrão: UPLOAD_RETENTION_HOURS).')
+def purge_media(hours):
+    """
+    Remove do armazenamento as mídias que nenhum post usa (posts removidos e uploads abandonados).
+
+    Args:
+        hours (float): Idade mínima, em horas, dos arquivos removidos.
+    """
+    hours = hours if hours is not None else current_app.config['UPLOAD_RETENTION_HOURS']
+    removed = purge_unreferenced_media(hours)
+    click.echo(f'Removed {removed} unreferenced media files older than {hours:g} hours.')
+
+
+@bp.cli.command('process-images')
+def process_images():
+    """
+    Gera as variantes das imagens de posts que ainda não foram processadas.
+    """
+    pending = db.session.query(Post.id, Post.image_file).filter(
+        Post.image_file.isnot(None),
+        (Post.image_status.is_(None)) | (Post.image_status != 'ready')
+    ).all()
+    for post_id, image_file in pending:
+        process_post_image(current_app._get_current_object(), post_id, image_file)
+    click.echo(f'Processed {len(pending)} images.')
+
+
+@bp.cli.command('transcode-media')
+def transcode_media():
+    """
+    Converte os vídeos e áudios de posts cuja conversão não terminou (ex.: processo reiniciado durante a fila).
+    """
+    binary, options = ffmpeg_binary(), transcode_options()
+    jobs = {'video': transcode_video, 'audio': transcode_audio}
+    for kind, (folder, file_column, status_column) in MEDIA_KINDS.items():
+        pending = db.session.query(Post.id, file_column).filter(
+            file_column.isnot(None),
+            (status_column.is_(None)) | (status_column != 'ready')
+        ).all()
+        for post_id, filename in pending:
+            try:
+                with working_copy(media_key(folder, filename)) as path:
+                    jobs[kind](binary, path, options)
+                    for variant, extension in TRANSCODED_VARIANTS[folder]:
+                        publish(folder, os.path.join(os.path.dirname(path), variant_filename(filename, variant, extension)))
+                status = 'ready'
+            except (OSError, subprocess.SubprocessError) as error:
+                click.echo(f'Post {post_id}: {kind} failed ({error}).')
+                status = 'failed'
+            set_media_status(post_id, kind, status)
+        click.echo(f'Processed {len(pending)} {kind} files.')
+
+
+@bp.cli.command('migrate-media')
+@click.option('--source', default=None, help='Pasta com as subpastas antigas de mídia (padrão: app/static).')
+def migrate_media(source):
+    """
+    Move as mídias gravadas em app/static/<pasta> (versões anteriores) para o armazenamento configurado.
+
+    Args:
+        source (str): Pasta com as subpastas post_pics, post_audios e post_videos.
+    """
+    source = source or os.path.join(current_app.root_path, 'static')
+    moved = 0
+    for folder in MEDIA_FOLDERS:
+        directory = os.path.join(source, folder)
+        if not os.path.isdir(directory):
+            continue
+        for filename in os.listdir(directory):
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path) and not filename.startswith('.'):
+                storage.put(media_key(folder, filename), path)
+                moved += 1
+    click.echo(f'Moved {moved} media files to {current_app.config["MEDIA_STORAGE"]}.')
+
+
+@bp.cli.command('rebuild-search-index')
+def rebuild_search():
+    """
+    Reconstrói os índices de busca (FTS5) de posts, comentários e usuários.
+    """
+    if not search_enabled():
+        raise click.ClickException('Full-text search indexes are only available on SQLite.')
+    for table in rebuild_search_index():
+        click.echo(f'Rebuilt {table}.')
+
+
+@bp.cli.command('compile-templates')
+def compile_templates():
+    """
+    Compila todos os templates e grava o bytecode em JINJA_BYTECODE_CACHE (ex.: na construção da imagem).
+    """
+    if not current_app.config['JINJA_BYTECODE_CACHE']:
+        raise click.ClickException('JINJA_BYTECODE_CACHE is not set.')
+    names = preload(current_app)
+    click.echo(f'Compiled {len(names)} templates into {current_app.config["JINJA_BYTECODE_CACHE"]}.')
@@ -0,0 +1,107 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import os
+
+
+def default_config(instance_path):
+    """
+    Monta as configurações padrão da aplicação a partir das variáveis de ambiente.
+
+    Args:
+        instance_path (str): Pasta de instância da aplicação (base das pastas de mídias e uploads).
+
+    Returns:
+        dict: Configurações da aplicação.
+    """
+    return {
+        'SECRET_KEY': os.getenv('SECRET_KEY'),  # Chave secreta para segurança da aplicação
+        'SQLALCHEMY_DATABASE_URI': os.getenv('DATABASE_URL', 'sqlite:///site.db'),  # URI do banco de dados
+        'DATABASE_REPLICA_URL': os.getenv('DATABASE_REPLICA_URL'),  # URI da réplica de leitura (opcional)
+        'DB_POOL_SIZE': int(os.getenv('DB_POOL_SIZE', 10)),  # Conexões mantidas abertas por processo (exceto SQLite)
+        'DB_MAX_OVERFLOW': int(os.getenv('DB_MAX_OVERFLOW', 20)),  # Conexões extras permitidas em picos
+        'DB_POOL_TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 30)),  # Segundos de espera por uma conexão livre
+        'DB_POOL_RECYCLE': int(os.getenv('DB_POOL_RECYCLE', 1800)),  # Segundos até uma conexão ser renovada
+        'SQLITE_BUSY_TIMEOUT': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),  # Milissegundos de espera por um lock do SQLite
+        'SQLITE_MMAP_SIZE': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),  # Bytes do banco mapeados em memória
+        'SQLITE_CACHE_SIZE': int(os.getenv('SQLITE_CACHE_SIZE', -64000)),  # Cache de páginas por conexão (negativo = KiB)
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,  # Desabilita rastreamento de modificações do SQLAlchemy
+        'FEED_PAGE_SIZE': int(os.getenv('FEED_PAGE_SIZE', 20)),  # Quantidade de posts por página do feed
+        'FEED_FANOUT': os.getenv('FEED_FANOUT', 'read'),  # 'read' (filtra amizades na leitura) ou 'write' (timeline pré-calculada)
+        'NOTIFICATIONS_PAGE_SIZE': int(os.getenv('NOTIFICATIONS_PAGE_SIZE', 30)),  # Quantidade de notificações por página
+        'NOTIFICATION_RETENTION_DAYS': int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90)),  # Idade máxima das notificações mantidas
+        'MESSAGES_PAGE_SIZE': int(os.getenv('MESSAGES_PAGE_SIZE', 30)),  # Conversas e mensagens por página
+        'EVENT_BROKER': os.getenv('EVENT_BROKER', 'app.events.InProcessBroker'),  # Classe do pub/sub usado pelos eventos em tempo real
+        'EVENT_BROKER_URL': os.getenv('EVENT_BROKER_URL', 'redis://localhost:6379/0'),  # URL do Redis usado pelo RedisBroker
+        'SSE_MAX_CONNECTIONS': int(os.getenv('SSE_MAX_CONNECTIONS', 200)),  # Conexões SSE simultâneas por processo
+        # Modelo de processos do servidor (exportado pelo gunicorn.conf.py); limita o SSE quando necessário
+        'SERVER_WORKERS': int(os.getenv('WEB_CONCURRENCY', 1)),  # Processos que atendem a aplicação
+        'SERVER_WORKER_CLASS': os.getenv('GUNICORN_WORKER_CLASS', ''),  # Tipo de worker do gunicorn (vazio: servidor de desenvolvimento)
+        'SERVER_THREADS': int(os.getenv('GUNICORN_THREADS', 0)),  # Threads por worker (workers gthread)
+        'SSE_HEARTBEAT': float(os.getenv('SSE_HEARTBEAT', 15)),  # Segundos entre comentários de keep-alive
+        'SSE_QUEUE_SIZE': int(os.getenv('SSE_QUEUE_SIZE', 100)),  # Eventos pendentes por conexão
+        'SSE_RETRY_MS': int(os.getenv('SSE_RETRY_MS', 5000)),  # Intervalo de reconexão sugerido ao navegador
+        'IMAGE_WORKERS': int(os.getenv('IMAGE_WORKERS', 2)),  # Threads do processamento de imagens
+        'IMAGE_VARIANTS': {'thumb': 320, 'feed': 800, 'full': 1600},  # Largura máxima de cada variante de imagem
+        'FRIEND_GRAPH_REFRESH': float(os.getenv('FRIEND_GRAPH_REFRESH', 300)),  # Segundos entre recargas do grafo de amizades (0 desativa)
+        'FRIEND_SUGGESTIONS': int(os.getenv('FRIEND_SUGGESTIONS', 10)),  # Sugestões exibidas na página de amigos
+        'FRIEND_SUGGESTION_FANOUT': int(os.getenv('FRIEND_SUGGESTION_FANOUT', 500)),  # Amigos percorridos por nível nas sugestões
+        'FRIEND_REQUEST_RETENTION_DAYS': int(os.getenv('FRIEND_REQUEST_RETENTION_DAYS', 30)),  # Dias mantidos após a resposta dos pedidos de amizade
+        'SEARCH_PAGE_SIZE': int(os.getenv('SEARCH_PAGE_SIZE', 20)),  # Resultados de busca por página
+        'SEARCH_MAX_PAGES': int(os.getenv('SEARCH_MAX_PAGES', 50)),  # Última página de resultados acessível (limita o OFFSET)
+        'SEARCH_AUTOCOMPLETE_LIMIT': int(os.getenv('SEARCH_AUTOCOMPLETE_LIMIT', 8)),  # Sugestões do autocompletar de usuários
+        'WRITE_BEHIND': os.getenv('WRITE_BEHIND', 'false').lower() == 'true',  # Grava likes e notificações em lote por uma thread
+        'WRITE_BEHIND_INTERVAL': float(os.getenv('WRITE_BEHIND_INTERVAL', 0.5)),  # Atraso máximo, em segundos, até a gravação do lote
+        'WRITE_BEHIND_MAX_PENDING': int(os.getenv('WRITE_BEHIND_MAX_PENDING', 5000)),  # Itens na fila que antecipam a gravação
+        'WRITE_BEHIND_MAX_ATTEMPTS': int(os.getenv('WRITE_BEHIND_MAX_ATTEMPTS', 5)),  # Gravações rejeitadas pelo banco antes de um item ser descartado
+        'MEDIA_STORAGE': os.getenv('MEDIA_STORAGE', 'app.storage.LocalStorage'),  # Classe do armazenamento das mídias (LocalStorage ou S3Storage)
+        'MEDIA_ROOT': os.getenv('MEDIA_ROOT', os.path.join(instance_path, 'media')),  # Pasta das mídias no LocalStorage (volume compartilhado entre os nós)
+        'S3_BUCKET': os.getenv('S3_BUCKET', ''),  # Bucket das mídias no S3Storage
+        'S3_ENDPOINT_URL': os.getenv('S3_ENDPOINT_URL', ''),  # Endpoint de um serviço compatível com S3 (vazio: AWS)
+        'S3_REGION': os.getenv('S3_REGION', ''),  # Região do bucket
+        'S3_PREFIX': os.getenv('S3_PREFIX', ''),  # Prefixo das chaves no bucket (ex.: 'media/')
+        'S3_URL_EXPIRES': int(os.getenv('S3_URL_EXPIRES', 3600)),  # Validade, em segundos, das URLs assinadas da rota /media
+        'MEDIA_MAX_AGE': int(os.getenv('MEDIA_MAX_AGE', 365 * 24 * 3600)),  # Segundos de cache das mídias (os nomes dos arquivos nunca mudam)
+        'MEDIA_BASE_URL': os.getenv('MEDIA_BASE_URL', ''),  # URL base das mídias (ex.: CDN); vazio usa a rota /media
+        'MEDIA_ACCEL_REDIRECT': os.getenv('MEDIA_ACCEL_REDIRECT', ''),  # Prefixo interno do nginx para X-Accel-Redirect (opcional)
+        'USE_X_SENDFILE': os.getenv('MEDIA_X_SENDFILE', 'false').lower() == 'true',  # Delega o envio dos arquivos via X-Sendfile
+        'IMAGE_MAX_SIZE': int(os.getenv('IMAGE_MAX_SIZE', 10 * 1024 * 1024)),  # Tamanho máximo das imagens enviadas, em bytes
+        'AUDIO_MAX_SIZE': int(os.getenv('AUDIO_MAX_SIZE', 50 * 1024 * 1024)),  # Tamanho máximo dos áudios enviados, em bytes
+        'VIDEO_MAX_SIZE': int(os.getenv('VIDEO_MAX_SIZE', 500 * 1024 * 1024)),  # Tamanho máximo dos vídeos enviados, em bytes
+        'MAX_CONTENT_LENGTH': int(os.getenv('MAX_CONTENT_LENGTH', 600 * 1024 * 1024)),  # Tamanho máximo do corpo de uma requisição
+        'UPLOAD_CHUNK_SIZE': int(os.getenv('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)),  # Tamanho das partes dos uploads retomáveis
+        'UPLOAD_INCOMING_FOLDER': os.getenv('UPLOAD_INCOMING_FOLDER', os.path.join(instance_path, 'uploads')),  # Uploads em andamento (fora de static)
+        'UPLOAD_RETENTION_HOURS': float(os.getenv('UPLOAD_RETENTION_HOURS', 24)),  # Idade máxima dos uploads abandonados
+        'UPLOAD_MAX_OPEN_PER_USER': int(os.getenv('UPLOAD_MAX_OPEN_PER_USER', 5)),  # Uploads em partes em andamento por usuário
+        'TRANSCODE_WORKERS': int(os.getenv('TRANSCODE_WORKERS', 2)),  # Processos de conversão de vídeos e áudios
+        'TRANSCODE_TIMEOUT': int(os.getenv('TRANSCODE_TIMEOUT', 600)),  # Tempo máximo de cada conversão, em segundos
+        'FFMPEG_BINARY': os.getenv('FFMPEG_BINARY', ''),  # Caminho do ffmpeg (vazio: o do moviepy ou o do PATH)
+        'VIDEO_MAX_WIDTH': int(os.getenv('VIDEO_MAX_WIDTH', 1280)),  # Largura máxima dos vídeos convertidos
+        'VIDEO_MAX_BITRATE': int(os.getenv('VIDEO_MAX_BITRATE', 2500)),  # Bitrate máximo dos vídeos convertidos, em kbit/s
+        'AUDIO_BITRATE': int(os.getenv('AUDIO_BITRATE', 128)),  # Bitrate dos áudios convertidos, em kbit/s
+        'PASSWORD_HASH_METHOD': os.getenv('PASSWORD_HASH_METHOD', 'bcrypt'),  # Algoritmo das senhas: 'bcrypt', 'scrypt' ou 'argon2'
+        'BCRYPT_LOG_ROUNDS': int(os.getenv('BCRYPT_LOG_ROUNDS', 12)),  # Custo (log2) do bcrypt
+        'SCRYPT_COST': int(os.getenv('SCRYPT_COST', 15)),  # Custo (log2 de N) do scrypt
+        'ARGON2_TIME_COST': int(os.getenv('ARGON2_TIME_COST', 3)),  # Iterações do argon2
+        'ARGON2_MEMORY_COST': int(os.getenv('ARGON2_MEMORY_COST', 64 * 1024)),  # Memória do argon2, em KiB
+        'PASSWORD_HASH_WORKERS': int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2)),  # Hashes de senha calculados ao mesmo tempo (0: na thread da requisição)
+        'LOGIN_THROTTLE_WINDOW': float(os.getenv('LOGIN_THROTTLE_WINDOW', 900)),  # Segundos em que as falhas de login são lembradas
+        'LOGIN_MAX_ATTEMPTS_PER_IP': int(os.getenv('LOGIN_MAX_ATTEMPTS_PER_IP', 50)),  # Falhas de login permitidas por IP na janela
+        'LOGIN_MAX_ATTEMPTS_PER_ACCOUNT': int(os.getenv('LOGIN_MAX_ATTEMPTS_PER_ACCOUNT', 10)),  # Falhas de login permitidas por conta na janela
+        'LOGIN_THROTTLE_BACKEND': os.getenv('LOGIN_THROTTLE_BACKEND', 'app.throttle.MemoryThrottleStore'),  # Contadores das falhas de login (RedisThrottleStore: compartilhados entre os workers)
+        'LOGIN_THROTTLE_URL': os.getenv('LOGIN_THROTTLE_URL', 'redis://localhost:6379/0'),  # URL do Redis usado pelo RedisThrottleStore
+        'PROXY_FIX_X_FOR': int(os.getenv('PROXY_FIX_X_FOR', 0)),  # Proxies confiáveis à frente da aplicação (X-Forwarded-For); 0 usa o IP da conexão
+        'PROXY_FIX_X_PROTO': int(os.getenv('PROXY_FIX_X_PROTO', 0)),  # Proxies confiáveis que informam o protocolo (X-Forwarded-Proto)
+        'SLOW_QUERY_THRESHOLD': float(os.getenv('SLOW_QUERY_THRESHOLD', 100)),  # Consultas mais lentas que isso (ms) são registradas no log com a rota de origem
+        'METRICS_TOKEN': os.getenv('METRICS_TOKEN', ''),  # Token exigido em /metrics (Authorization: Bearer); vazio desativa a rota
+        'PROFILER_ENABLED': os.getenv('PROFILER_ENABLED', 'false').lower() == 'true',  # Amostra as pilhas de chamadas das requisições (desenvolvimento)
+        'PROFILER_INTERVAL': float(os.getenv('PROFILER_INTERVAL', 0.005)),  # Intervalo entre as amostras do profiler, em segundos
+        'JINJA_BYTECODE_CACHE': os.getenv('JINJA_BYTECODE_CACHE', os.path.join(instance_path, 'jinja')),  # Pasta do bytecode compilado dos templates (vazio desativa)
+        'FRAGMENT_CACHE_SIZE': int(os.getenv('FRAGMENT_CACHE_SIZE', 5000)),  # Cartões de posts renderizados mantidos na memória de cada processo (0 desativa o cache)
+        'FRAGMENT_CACHE_TTL': float(os.getenv('FRAGMENT_CACHE_TTL', 3600)),  # Segundos até um cartão ser renderizado novamente
+        'FRAGMENT_CACHE_BACKEND': os.getenv('FRAGMENT_CACHE_BACKEND', ''),  # Backend compartilhado dos cartões (ex.: 'app.fragments.RedisFragmentStore'); vazio usa só a memória
+        'FRAGMENT_CACHE_URL': os.getenv('FRAGMENT_CACHE_URL', 'redis://localhost:6379/0'),  # URL do Redis usado pelo RedisFragmentStore
+        'CONDITIONAL_PAGES': os.getenv('CONDITIONAL_PAGES', 'true').lower() == 'true',  # ETag/Last-Modified e respostas 304 no feed, perfis e amizades
+        'TIMELINE_BACKFILL_SIZE': int(os.getenv('TIMELINE_BACKFILL_SIZE', 200)),  # Posts copiados para a timeline ao criar amizades
+    }
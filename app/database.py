@@ -0,0 +1,173 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.sql.expression import Select
+
+# Nome do bind usado pelas consultas de leitura quando DATABASE_REPLICA_URL está configurada
+REPLICA_BIND = 'replica'
+
+
+def engine_options(config):
+    """
+    Monta as opções do engine a partir das configurações da aplicação.
+
+    O pool só é configurável fora do SQLite: o pysqlite usa seu próprio pool
+    (uma conexão por thread ou NullPool), que não aceita essas opções.
+
+    Args:
+        config (Config): Configurações da aplicação.
+
+    Returns:
+        dict: Valor de SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    if make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite':
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,  # Descarta conexões derrubadas pelo servidor antes de usá-las
+    }
+
+
+def insert_ignoring_duplicates(session, table, rows):
+    """
+    Insere várias linhas em uma única instrução, ignorando as que violarem a chave primária ou índices únicos.
+
+    Args:
+        session (Session): Sessão do banco de dados.
+        table (Table): Tabela de destino.
+        rows (list): Lista de dicionários com os valores das linhas.
+
+    Returns:
+        int: Quantidade de linhas inseridas.
+    """
+    if not rows:
+        return 0
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).on_conflict_do_nothing()
+    elif dialect == 'mysql':
+        statement = table.insert().prefix_with('IGNORE')
+    else:
+        statement = table.insert().prefix_with('OR IGNORE')
+    return session.execute(statement, rows).rowcount
+
+
+def set_sqlite_pragmas(config):
+    """
+    Cria o listener que ajusta cada nova conexão SQLite.
+
+    Args:
+        config (Config): Configurações da aplicação.
+
+    Returns:
+        function: Listener do evento 'connect' do engine.
+    """
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL: leitores não bloqueiam o escritor e o escritor não bloqueia os leitores
+        cursor.execute('PRAGMA journal_mode=WAL')
+        # Com WAL, NORMAL só sincroniza o disco nos checkpoints, sem risco de corromper o banco
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        # Espera o lock ser liberado em vez de falhar com "database is locked"
+        cursor.execute(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT'])}")
+        cursor.execute(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+        cursor.execute(f"PRAGMA cache_size={int(config['SQLITE_CACHE_SIZE'])}")
+        cursor.close()
+    return on_connect
+
+
+def use_read_replica(view):
+    """
+    Decorator que envia as consultas de leitura da view para a réplica de leitura.
+
+    Escritas (flush, INSERT/UPDATE/DELETE e SQL direto) continuam indo para o banco principal.
+    Sem DATABASE_REPLICA_URL configurada, o decorator não tem efeito.
+
+    Args:
+        view (function): Função da view.
+
+    Returns:
+        function: View decorada.
+    """
+    @wraps(view)
+    def decorated(*args, **kwargs):
+        g.use_read_replica = True
+        return view(*args, **kwargs)
+    return decorated
+
+
+class RoutingSession(SignallingSession):
+    """
+    Sessão que direciona os SELECTs das views marcadas com use_read_replica para a réplica.
+    """
+
+    def __init__(self, db, **options):
+        """
+        Inicializa a sessão guardando a extensão, usada para obter o engine da réplica.
+
+        Args:
+            db (SQLAlchemy): Extensão SQLAlchemy da aplicação.
+            **options: Opções da sessão.
+        """
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        """
+        Retorna o engine usado por uma consulta.
+
+        Args:
+            mapper (Mapper): Mapper do modelo consultado (opcional).
+            clause (ClauseElement): Instrução a ser executada (opcional).
+
+        Returns:
+            Engine: Engine da réplica para leituras das views marcadas; caso contrário, o engine padrão.
+        """
+        if (isinstance(clause, Select) and not self._flushing and REPLICA_BIND in (self.app.config['SQLALCHEMY_BINDS'] or {})
+                and has_app_context() and g.get('use_read_replica')):
+            return self.db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    Extensão SQLAlchemy com roteamento para a réplica de leitura e ajustes de conexão do SQLite.
+    """
+
+    def create_session(self, options):
+        """
+        Cria a fábrica de sessões usando RoutingSession.
+
+        Args:
+            options (dict): Opções da sessão.
+
+        Returns:
+            sessionmaker: Fábrica de sessões.
+        """
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def create_engine(self, sa_url, engine_opts):
+        """
+        Cria o engine e, no SQLite, registra os PRAGMAs aplicados a cada conexão.
+
+        Args:
+            sa_url (URL): URL do banco de dados.
+            engine_opts (dict): Opções do engine.
+
+        Returns:
+            Engine: Engine criado.
+        """
+        engine = super().create_engine(sa_url, engine_opts)
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', set_sqlite_pragmas(self.get_app().config))
+        return engine
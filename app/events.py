@@ -0,0 +1,364 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import json
+import queue
+import threading
+import time
+from sqlalchemy import event
+from werkzeug.utils import import_string
+from app import db, app_extension
+from app.models import Friendship
+
+# Workers do gunicorn em que cada conexão é um greenlet (as conexões SSE não ocupam uma thread)
+ASYNC_WORKER_CLASSES = ('gevent', 'eventlet')
+
+# Prefixo dos canais do Redis usados pelo RedisBroker
+REDIS_CHANNEL_PREFIX = 'events:'
+
+
+def user_topic(user_id):
+    """
+    Retorna o tópico privado de um usuário.
+
+    Args:
+        user_id (int): ID do usuário.
+
+    Returns:
+        str: Nome do tópico.
+    """
+    return f'user:{user_id}'
+
+
+def author_topic(author_id):
+    """
+    Retorna o tópico dos eventos sobre os posts de um autor (ex.: contagem de likes).
+
+    Cada evento é publicado uma única vez; quem vê os posts do autor (ele e os amigos) assina o
+    tópico ao conectar (ver stream_topics), e o broker entrega o evento a cada assinatura.
+
+    Args:
+        author_id (int): ID do autor.
+
+    Returns:
+        str: Nome do tópico.
+    """
+    return f'author:{author_id}'
+
+
+def stream_topics(user_id):
+    """
+    Retorna os tópicos assinados pela conexão SSE de um usuário.
+
+    Inclui o tópico privado e os tópicos dos autores cujos posts aparecem no feed (o próprio
+    usuário e os amigos), lidos em uma única consulta na abertura da conexão. Amizades criadas
+    depois só passam a valer na reconexão.
+
+    Args:
+        user_id (int): ID do usuário.
+
+    Returns:
+        tuple: Tópicos assinados.
+    """
+    friend_ids = [friend_id for (friend_id,) in db.session.query(Friendship.friend_id).filter(Friendship.user_id == user_id)]
+    return (user_topic(user_id), author_topic(user_id), *(author_topic(friend_id) for friend_id in friend_ids))
+
+
+class Subscription:
+    """
+    Fila de eventos de um cliente conectado.
+
+    Quando a fila enche (cliente lento), o evento mais antigo é descartado.
+    """
+
+    def __init__(self, topics, max_size):
+        """
+        Inicializa a assinatura.
+
+        Args:
+            topics (tuple): Tópicos assinados.
+            max_size (int): Quantidade máxima de eventos pendentes.
+        """
+        self.topics = topics
+        self.active = True
+        self.queue = queue.Queue(maxsize=max_size)
+
+    def put(self, item):
+        """
+        Enfileira um evento sem bloquear quem publica.
+
+        Args:
+            item (tuple): Par (nome do evento, dados).
+        """
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        """
+        Aguarda o próximo evento.
+
+        Args:
+            timeout (float): Tempo máximo de espera em segundos.
+
+        Returns:
+            tuple: Par (nome do evento, dados) ou None se o tempo acabar.
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class InProcessBroker:
+    """
+    Pub/sub em memória, válido apenas dentro do processo atual.
+
+    Outras implementações (ex.: RedisBroker) podem ser usadas via EVENT_BROKER,
+    desde que ofereçam os mesmos métodos e o atributo cross_process.
+
+    Métodos:
+        subscribe(topics): Cria uma assinatura para os tópicos.
+        unsubscribe(subscription): Remove uma assinatura.
+        publish(topic, name, data): Entrega um evento aos assinantes do tópico.
+        connection_count(): Quantidade de assinaturas ativas.
+    """
+
+    # Eventos publicados em um processo não chegam aos clientes conectados a outro
+    cross_process = False
+
+    def __init__(self, app=None):
+        """
+        Inicializa o broker.
+
+        Args:
+            app (Flask): Instância da aplicação Flask (opcional).
+        """
+        self.queue_size = app.config['SSE_QUEUE_SIZE'] if app is not None else 100
+        self._subscribers = {}
+        self._connections = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics):
+        """
+        Cria uma assinatura para os tópicos informados.
+
+        Args:
+            topics (tuple): Tópicos assinados.
+
+        Returns:
+            Subscription: Assinatura criada.
+        """
+        subscription = Subscription(topics, self.queue_size)
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+            self._connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        Remove uma assinatura.
+
+        Args:
+            subscription (Subscription): Assinatura a ser removida.
+        """
+        with self._lock:
+            if not subscription.active:
+                return
+            subscription.active = False
+            self._connections -= 1
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topic, name, data):
+        """
+        Entrega um evento aos assinantes de um tópico.
+
+        Args:
+            topic (str): Tópico do evento.
+            name (str): Nome do evento.
+            data (dict): Dados do evento (serializáveis em JSON).
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            subscription.put((name, data))
+
+    def connection_count(self):
+        """
+        Retorna a quantidade de assinaturas ativas.
+
+        Returns:
+            int: Quantidade de assinaturas.
+        """
+        with self._lock:
+            return self._connections
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Pub/sub entre processos e servidores pelo Redis de EVENT_BROKER_URL.
+
+    Os eventos são publicados no canal do tópico; cada processo com clientes conectados mantém uma
+    única assinatura dos canais do Redis (em uma thread, iniciada na primeira conexão) e entrega os
+    eventos recebidos às suas assinaturas locais. Falhas do Redis são registradas e não interrompem
+    as requisições: os eventos publicados durante a falha são perdidos.
+    """
+
+    cross_process = True
+
+    def __init__(self, app):
+        """
+        Cria o cliente Redis.
+
+        Args:
+            app (Flask): Aplicação Flask.
+
+        Raises:
+            RuntimeError: Se o pacote redis não estiver instalado.
+        """
+        super().__init__(app)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RedisBroker requires redis (pip install redis).')
+        self.client = redis.Redis.from_url(app.config['EVENT_BROKER_URL'])
+        self.redis_error = redis.RedisError
+        self.logger = app.logger
+        self._listener = None
+
+    def subscribe(self, topics):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='event-broker', daemon=True)
+                self._listener.start()
+        return super().subscribe(topics)
+
+    def publish(self, topic, name, data):
+        try:
+            self.client.publish(REDIS_CHANNEL_PREFIX + topic, json.dumps([name, data]))
+        except self.redis_error as error:
+            self.logger.warning('Event broker unavailable: %s', error)
+
+    def _listen(self):
+        # Repassa os eventos do Redis às assinaturas deste processo, reconectando após falhas
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(REDIS_CHANNEL_PREFIX + '*')
+                for message in pubsub.listen():
+                    topic = message['channel'].decode()[len(REDIS_CHANNEL_PREFIX):]
+                    name, data = json.loads(message['data'])
+                    InProcessBroker.publish(self, topic, name, data)
+            except self.redis_error as error:
+                self.logger.warning('Event broker unavailable: %s', error)
+                time.sleep(1)
+
+
+# Broker configurado em EVENT_BROKER (caminho de importação da classe), criado no primeiro uso
+broker = app_extension('event_broker', lambda app: import_string(app.config['EVENT_BROKER'])(app))
+
+
+def _connection_limit(app):
+    # Conexões SSE aceitas por processo, conforme o broker e os workers do servidor
+    config = app.config
+    if config['SERVER_WORKERS'] > 1 and not import_string(config['EVENT_BROKER']).cross_process:
+        app.logger.warning('Server-Sent Events disabled: %s only reaches clients of the same process and the server '
+                           'runs %d workers (set EVENT_BROKER=app.events.RedisBroker).',
+                           config['EVENT_BROKER'], config['SERVER_WORKERS'])
+        return 0
+    if config['SERVER_WORKER_CLASS'] and config['SERVER_WORKER_CLASS'] not in ASYNC_WORKER_CLASSES:
+        # Cada conexão ocupa uma thread do worker: ao menos uma fica livre para as demais requisições
+        return max(0, min(config['SSE_MAX_CONNECTIONS'], config['SERVER_THREADS'] - 1))
+    return config['SSE_MAX_CONNECTIONS']
+
+
+# Limite de conexões SSE do processo (0 desativa os eventos em tempo real)
+connection_limit = app_extension('sse_connection_limit', _connection_limit)
+
+
+def publish(topic, name, data):
+    """
+    Publica um evento imediatamente.
+
+    Args:
+        topic (str): Tópico do evento.
+        name (str): Nome do evento.
+        data (dict): Dados do evento.
+    """
+    broker.publish(topic, name, data)
+
+
+def publish_after_commit(topic, name, data):
+    """
+    Publica um evento somente depois que a transação atual for confirmada.
+
+    Args:
+        topic (str): Tópico do evento.
+        name (str): Nome do evento.
+        data (dict): Dados do evento.
+    """
+    db.session.info.setdefault('pending_events', []).append((topic, name, data))
+
+
+def format_sse(name, data):
+    """
+    Formata um evento no protocolo Server-Sent Events.
+
+    Args:
+        name (str): Nome do evento.
+        data (dict): Dados do evento.
+
+    Returns:
+        str: Evento formatado.
+    """
+    return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+def stream(subscription, retry_ms, heartbeat):
+    """
+    Gera o fluxo SSE de uma assinatura, com comentários de keep-alive enquanto não houver eventos.
+
+    O gerador não usa o contexto da requisição nem a sessão do banco de dados; em um worker
+    gevent/eventlet a espera na fila apenas suspende o greenlet da conexão. A assinatura é
+    removida por quem criou a resposta (Response.call_on_close).
+
+    Args:
+        subscription (Subscription): Assinatura do cliente.
+        retry_ms (int): Intervalo de reconexão sugerido ao navegador, em milissegundos.
+        heartbeat (float): Segundos entre comentários de keep-alive.
+
+    Yields:
+        str: Eventos formatados.
+    """
+    # Orienta o navegador a reconectar após alguns segundos se a conexão cair
+    yield f"retry: {retry_ms}\n\n"
+    while subscription.active:
+        item = subscription.get(timeout=heartbeat)
+        if item is None:
+            yield ': keep-alive\n\n'
+        else:
+            yield format_sse(*item)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_pending_events(session):
+    for topic, name, data in session.info.pop('pending_events', ()):
+        broker.publish(topic, name, data)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_pending_events(session):
+    session.info.pop('pending_events', None)
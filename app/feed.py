@@ -0,0 +1,105 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from collections import defaultdict
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from flask import current_app
+from app import db
+from app.models import Post, Friendship, Comment, Like, TimelineEntry
+from app.pagination import keyset_page
+from app.timeline import fanout_on_write_enabled
+from app.writebehind import write_behind_enabled, write_queue
+
+
+def feed_query(user):
+    """
+    Monta a consulta única do feed: posts do usuário e dos seus amigos.
+
+    Com FEED_FANOUT = 'write' os posts vêm da timeline pré-calculada do usuário
+    (varredura por faixa no índice); caso contrário são filtrados pelas amizades
+    no momento da leitura.
+
+    Args:
+        user (User): Usuário dono do feed.
+
+    Returns:
+        tuple: Consulta ordenada de forma decrescente e as colunas (timestamp, id) usadas no cursor.
+    """
+    if fanout_on_write_enabled():
+        query = Post.query.join(TimelineEntry, TimelineEntry.post_id == Post.id).filter(TimelineEntry.user_id == user.id)
+        timestamp_column, id_column = TimelineEntry.timestamp, TimelineEntry.post_id
+    else:
+        friend_ids = db.session.query(Friendship.friend_id).filter(Friendship.user_id == user.id)
+        query = Post.query.filter(or_(Post.user_id == user.id, Post.user_id.in_(friend_ids)))
+        timestamp_column, id_column = Post.timestamp, Post.id
+
+    # Carrega os autores na mesma consulta; os comentários só são carregados para os posts
+    # cujo cartão não está no cache de fragmentos (ver load_comments)
+    query = query.options(joinedload(Post.author)).order_by(timestamp_column.desc(), id_column.desc())
+    return query, timestamp_column, id_column
+
+
+def get_feed_page(user, cursor=None, page_size=None):
+    """
+    Busca uma página do feed usando paginação por cursor (keyset).
+
+    Args:
+        user (User): Usuário dono do feed.
+        cursor (str): Cursor da página anterior (opcional).
+        page_size (int): Quantidade de posts por página (opcional).
+
+    Returns:
+        tuple: Lista de posts da página e o cursor da próxima página (ou None).
+    """
+    page_size = page_size or current_app.config['FEED_PAGE_SIZE']
+    query, timestamp_column, id_column = feed_query(user)
+    return keyset_page(query, timestamp_column, id_column, cursor, page_size)
+
+
+def load_liked_post_ids(posts, user):
+    """
+    Carrega em lote quais posts da página o usuário curtiu.
+
+    As contagens de likes e comentários já vêm nas colunas do próprio post.
+
+    Args:
+        posts (list): Posts exibidos na página.
+        user (User): Usuário que está visualizando o feed.
+
+    Returns:
+        set: IDs dos posts curtidos pelo usuário.
+    """
+    post_ids = [post.id for post in posts]
+    if not post_ids:
+        return set()
+
+    liked = {
+        post_id for (post_id,) in db.session.query(Like.post_id)
+        .filter(Like.user_id == user.id, Like.post_id.in_(post_ids))
+    }
+    if write_behind_enabled():
+        # Inclui os likes do usuário que ainda estão na fila de gravação
+        liked = write_queue.liked_post_ids(user.id, post_ids, liked)
+    return liked
+
+
+def load_comments(posts):
+    """
+    Carrega em uma única consulta os comentários (e seus autores) de vários posts.
+
+    Os comentários são atribuídos a post.comments sem consultas adicionais durante a renderização.
+
+    Args:
+        posts (list): Posts cujos comentários serão exibidos.
+    """
+    if not posts:
+        return
+    comments = defaultdict(list)
+    for comment in (Comment.query.options(joinedload(Comment.user))
+                    .filter(Comment.post_id.in_([post.id for post in posts])).order_by(Comment.id)):
+        comments[comment.post_id].append(comment)
+    for post in posts:
+        set_committed_value(post, 'comments', comments[post.id])
@@ -2,19 +2,37 @@
 Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
 """
 
+import hashlib
 import hmac
-from flask import current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+import secrets
+import threading
+import bcrypt as bcrypt_backend
+from werkzeug.security import check_password_hash
+from app.utils import thread_pool
+
+# O bcrypt considera apenas os primeiros 72 bytes da senha (versões antigas truncavam sem avisar)
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
 
 class Bcrypt:
     """
-    Classe para integração do Bcrypt com Flask.
+    Classe para integração do hashing de senhas com Flask.
+
+    O algoritmo é escolhido em PASSWORD_HASH_METHOD ('bcrypt', 'scrypt' ou 'argon2'), com o custo
+    de BCRYPT_LOG_ROUNDS, SCRYPT_COST ou ARGON2_TIME_COST/ARGON2_MEMORY_COST. Hashes de qualquer
+    um dos algoritmos (e os do Werkzeug, como pbkdf2) continuam sendo verificados; needs_rehash
+    indica os que foram gerados com outro algoritmo ou custo.
+
+    Os cálculos rodam em um pool de PASSWORD_HASH_WORKERS threads (os três algoritmos liberam o GIL),
+    o que limita quantos hashes ocupam a CPU ao mesmo tempo; com 0 eles rodam na thread da requisição.
+    O pool é criado no primeiro uso, no processo que atende a requisição (ver app.utils.thread_pool).
 
     Métodos:
         __init__(app=None): Inicializa a classe Bcrypt.
         init_app(app): Configura a aplicação Flask para usar Bcrypt.
         generate_password_hash(password, rounds=None): Gera um hash para a senha fornecida.
         check_password_hash(pw_hash, password): Verifica se a senha fornecida corresponde ao hash armazenado.
+        needs_rehash(pw_hash): Verifica se o hash deve ser recalculado com o algoritmo e o custo atuais.
     """
 
     def __init__(self, app=None):
@@ -24,6 +42,9 @@ class Bcrypt:
         Args:
             app (Flask): Instância da aplicação Flask (opcional).
         """
+        self.workers = 0
+        self.executor = None
+        self._executor_lock = threading.Lock()
         if app is not None:
             self.init_app(app)
 
@@ -33,9 +54,85 @@ class Bcrypt:
 
         Args:
             app (Flask): Instância da aplicação Flask.
+
+        Raises:
+            ValueError: Se PASSWORD_HASH_METHOD não for um algoritmo suportado.
         """
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        if self.method not in ('bcrypt', 'scrypt', 'argon2'):
+            raise ValueError(f'Unsupported PASSWORD_HASH_METHOD: {self.method}')
+        self.log_rounds = app.config['BCRYPT_LOG_ROUNDS']
+        self.scrypt_cost = app.config['SCRYPT_COST']
+        self.argon2_time_cost = app.config['ARGON2_TIME_COST']
+        self.argon2_memory_cost = app.config['ARGON2_MEMORY_COST']
+        self._argon2 = None
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
         app.extensions['bcrypt'] = self
 
+    def _run(self, function, *args):
+        # Executa o cálculo no pool (a requisição espera o resultado, mas a CPU fica limitada ao pool)
+        if self.workers <= 0:
+            return function(*args)
+        if self.executor is None:
+            with self._executor_lock:
+                if self.executor is None:
+                    self.executor = thread_pool(self.workers, 'password-hash')
+        return self.executor.submit(function, *args).result()
+
+    def _argon2_hasher(self):
+        # argon2-cffi é opcional: só é necessário com PASSWORD_HASH_METHOD='argon2' ou hashes argon2 gravados
+        if self._argon2 is None:
+            try:
+                from argon2 import PasswordHasher
+            except ImportError:
+                raise RuntimeError('Argon2 password hashes require argon2-cffi (pip install argon2-cffi).')
+            self._argon2 = PasswordHasher(time_cost=self.argon2_time_cost, memory_cost=self.argon2_memory_cost)
+        return self._argon2
+
+    def _scrypt(self, password, salt, n, r, p):
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt.encode('utf-8'), n=n, r=r, p=p,
+                              maxmem=132 * n * r * p, dklen=64).hex()
+
+    def _hash(self, password, rounds):
+        if self.method == 'bcrypt':
+            salt = bcrypt_backend.gensalt(rounds or self.log_rounds)
+            return bcrypt_backend.hashpw(password.encode('utf-8')[:BCRYPT_MAX_PASSWORD_BYTES], salt).decode('utf-8')
+        if self.method == 'scrypt':
+            # Mesmo formato do Werkzeug 2.3+ ('scrypt:n:r:p$salt$hash'), que também consegue verificá-lo
+            n, r, p = 2 ** (rounds or self.scrypt_cost), 8, 1
+            salt = secrets.token_urlsafe(12)
+            return f'scrypt:{n}:{r}:{p}${salt}${self._scrypt(password, salt, n, r, p)}'
+        return self._argon2_hasher().hash(password)
+
+    def _check(self, pw_hash, password):
+        if pw_hash.startswith(('$2a$', '$2b$', '$2y$')):
+            return bcrypt_backend.checkpw(password.encode('utf-8')[:BCRYPT_MAX_PASSWORD_BYTES], pw_hash.encode('utf-8'))
+        if pw_hash.startswith('scrypt:'):
+            method, salt, expected = pw_hash.split('$', 2)
+            n, r, p = (int(value) for value in method.split(':')[1:])
+            return hmac.compare_digest(self._scrypt(password, salt, n, r, p), expected)
+        if pw_hash.startswith('$argon2'):
+            from argon2.exceptions import VerificationError, InvalidHash
+            try:
+                return self._argon2_hasher().verify(pw_hash, password)
+            except (VerificationError, InvalidHash):
+                return False
+        # Hashes do Werkzeug (pbkdf2:sha256...)
+        return check_password_hash(pw_hash, password)
+
+    def generate_password_hash(self, password, rounds=None):
+        """
+        Gera um hash para a senha fornecida.
+
+        Args:
+            password (str): Senha a ser protegida.
+            rounds (int): Custo (log2) do bcrypt ou do scrypt, em vez do configurado (opcional).
+
+        Returns:
+            str: Hash da senha.
+        """
+        return self._run(self._hash, password, rounds)
+
     def check_password_hash(self, pw_hash, password):
         """
         Verifica se a senha fornecida corresponde ao hash armazenado.
@@ -47,18 +144,24 @@ class Bcrypt:
         Returns:
             bool: True se a senha corresponder ao hash, False caso contrário.
         """
-        return check_password_hash(pw_hash, password)
-
+        try:
+            return self._run(self._check, pw_hash, password)
+        except ValueError:
+            # Hash malformado
+            return False
 
-    def check_password_hash(self, pw_hash, password):
+    def needs_rehash(self, pw_hash):
         """
-        Verifica se a senha fornecida corresponde ao hash armazenado.
+        Verifica se o hash foi gerado com outro algoritmo ou custo e deve ser recalculado no próximo login.
 
         Args:
             pw_hash (str): Hash armazenado da senha.
-            password (str): Senha fornecida para verificação.
 
         Returns:
-            bool: True se a senha corresponder ao hash, False caso contrário.
+            bool: True se o hash estiver desatualizado.
         """
-        return hmac.compare_digest(pw_hash, generate_password_hash(password))
+        if self.method == 'bcrypt':
+            return not (pw_hash.startswith('$2b$') and pw_hash[4:6] == f'{self.log_rounds:02d}')
+        if self.method == 'scrypt':
+            return not pw_hash.startswith(f'scrypt:{2 ** self.scrypt_cost}:8:1$')
+        return not pw_hash.startswith('$argon2id$') or self._argon2_hasher().check_needs_rehash(pw_hash)
@@ -3,12 +3,25 @@ Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
 """
 
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, TextAreaField, FileField
+from wtforms import StringField, PasswordField, SubmitField, TextAreaField, FileField, HiddenField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError
 from flask_wtf.file import FileAllowed
 from app.models import User
 from markupsafe import Markup
 
+
+def normalize_email(email):
+    """
+    Normaliza o e-mail informado (sem espaços nas pontas e em minúsculas).
+
+    Args:
+        email (str): E-mail digitado.
+
+    Returns:
+        str: E-mail normalizado, usado no cadastro, na busca do usuário e no limite de tentativas de login.
+    """
+    return email.strip().lower() if email else email
+
 class RegistrationForm(FlaskForm):
     """
     Formulário de registro de novos usuários.
@@ -21,7 +34,7 @@ class RegistrationForm(FlaskForm):
         submit (SubmitField): Botão para enviar o formulário.
     """
     username = StringField('Username', validators=[DataRequired(), Length(min=2, max=20)])
-    email = StringField('Email', validators=[DataRequired(), Email()])
+    email = StringField('Email', validators=[DataRequired(), Email()], filters=[normalize_email])
     password = PasswordField('Password', validators=[DataRequired()])
     confirm_password = PasswordField('Confirm Password', validators=[DataRequired(), EqualTo('password')])
     submit = SubmitField('Sign Up')
@@ -63,7 +76,7 @@ class LoginForm(FlaskForm):
         password (PasswordField): Senha do usuário.
         submit (SubmitField): Botão para enviar o formulário.
     """
-    email = StringField('Email', validators=[DataRequired(), Email()])
+    email = StringField('Email', validators=[DataRequired(), Email()], filters=[normalize_email])
     password = PasswordField('Password', validators=[DataRequired()])
     submit = SubmitField('Login')
 
@@ -77,6 +90,7 @@ class PostForm(FlaskForm):
         image (FileField): Imagem do post, aceita arquivos JPG e PNG.
         audio (FileField): Áudio do post, aceita arquivos MP3 e WAV.
         video (FileField): Vídeo do post, aceita arquivos MP4 e AVI.
+        video_upload (HiddenField): ID do vídeo já enviado em partes pela rota /uploads.
         submit (SubmitField): Botão para enviar o formulário.
     """
     title = StringField('Title', validators=[DataRequired()])
@@ -84,6 +98,7 @@ class PostForm(FlaskForm):
     image = FileField('Post Image', validators=[FileAllowed(['jpg', 'png'])])
     audio = FileField('Post Audio', validators=[FileAllowed(['mp3', 'wav'])])
     video = FileField('Post Video', validators=[FileAllowed(['mp4', 'avi'])])
+    video_upload = HiddenField()
     submit = SubmitField('Post')
 
 class MessageForm(FlaskForm):
@@ -0,0 +1,210 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import hashlib
+import json
+from flask import current_app
+from markupsafe import Markup
+from werkzeug.utils import import_string
+from app import app_extension
+from app.cache import TTLCache, MISSING
+from app.feed import load_comments
+from app.metrics import record_fragments
+
+# Templates das partes do cartão do post que não dependem de quem está vendo a página
+CARD_TEMPLATES = ('post_card.html', 'post_comments.html')
+
+# Tempo máximo de espera pelo Redis, em segundos: com o backend fora do ar os cartões são renderizados
+REDIS_TIMEOUT = 0.25
+
+
+class FragmentCache:
+    """
+    Cache dos cartões de posts renderizados.
+
+    Os fragmentos ficam em um LRU na memória do processo (FRAGMENT_CACHE_SIZE itens) e, com
+    FRAGMENT_CACHE_BACKEND, também em um backend compartilhado entre os processos e servidores,
+    consultado quando o fragmento não está na memória. As chaves incluem a versão do post e dos
+    templates, de modo que um fragmento nunca precisa ser invalidado: versões antigas deixam de ser
+    lidas e saem do cache pelo LRU ou pelo tempo de expiração.
+
+    Métodos:
+        get_many(keys): Busca vários fragmentos.
+        set_many(fragments): Armazena vários fragmentos.
+        clear(): Esvazia o cache da memória do processo.
+    """
+
+    def __init__(self, app):
+        """
+        Cria o cache a partir das configurações FRAGMENT_CACHE_*.
+
+        Args:
+            app (Flask): Aplicação Flask.
+        """
+        self.local = TTLCache(app.config['FRAGMENT_CACHE_TTL'], app.config['FRAGMENT_CACHE_SIZE'])
+        backend = app.config['FRAGMENT_CACHE_BACKEND']
+        self.shared = import_string(backend)(app) if backend else None
+        # Uma alteração nos templates muda todas as chaves (ex.: deploy com o backend compartilhado já preenchido)
+        sources = ''.join(app.jinja_env.loader.get_source(app.jinja_env, name)[0] for name in CARD_TEMPLATES)
+        self.prefix = 'post-card:' + hashlib.blake2b(sources.encode(), digest_size=6).hexdigest()
+
+    def get_many(self, keys):
+        """
+        Busca vários fragmentos, primeiro na memória e depois no backend compartilhado.
+
+        Args:
+            keys (list): Chaves dos fragmentos.
+
+        Returns:
+            dict: Fragmentos encontrados, por chave.
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing and self.shared is not None:
+            for key, value in self.shared.get_many(missing).items():
+                self.local.set(key, value)
+                found[key] = value
+        return found
+
+    def set_many(self, fragments):
+        """
+        Armazena vários fragmentos na memória e no backend compartilhado.
+
+        Args:
+            fragments (dict): Fragmentos por chave.
+        """
+        for key, value in fragments.items():
+            self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set_many(fragments)
+
+    def clear(self):
+        """
+        Esvazia o cache da memória do processo.
+        """
+        self.local.clear()
+
+
+class RedisFragmentStore:
+    """
+    Backend compartilhado do cache de fragmentos em um servidor Redis (FRAGMENT_CACHE_URL).
+
+    Falhas de conexão não interrompem as requisições: o fragmento é tratado como ausente e
+    renderizado novamente.
+
+    Métodos:
+        get_many(keys): Busca vários fragmentos com um único MGET.
+        set_many(fragments): Armazena vários fragmentos, com expiração, em um único pipeline.
+    """
+
+    def __init__(self, app):
+        """
+        Cria o cliente Redis.
+
+        Args:
+            app (Flask): Aplicação Flask.
+
+        Raises:
+            RuntimeError: Se o pacote redis não estiver instalado.
+        """
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RedisFragmentStore requires redis (pip install redis).')
+        self.client = redis.Redis.from_url(app.config['FRAGMENT_CACHE_URL'], socket_timeout=REDIS_TIMEOUT,
+                                           socket_connect_timeout=REDIS_TIMEOUT)
+        self.redis_error = redis.RedisError
+        self.ttl = int(app.config['FRAGMENT_CACHE_TTL'])
+        self.logger = app.logger
+
+    def get_many(self, keys):
+        try:
+            values = self.client.mget(keys)
+        except self.redis_error as error:
+            self.logger.warning('Fragment cache backend unavailable: %s', error)
+            return {}
+        return {key: tuple(json.loads(value)) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, fragments):
+        try:
+            with self.client.pipeline(transaction=False) as pipeline:
+                for key, value in fragments.items():
+                    pipeline.set(key, json.dumps(value), ex=self.ttl)
+                pipeline.execute()
+        except self.redis_error as error:
+            self.logger.warning('Fragment cache backend unavailable: %s', error)
+
+
+# Cache de fragmentos de cada processo
+fragment_cache = app_extension('fragment_cache', FragmentCache)
+
+
+def fragment_key(post):
+    """
+    Monta a chave do cartão de um post.
+
+    A versão é um resumo dos campos exibidos no cartão: muda quando o post é editado, quando um
+    comentário é adicionado (comment_count), quando a conversão de uma mídia termina ou quando o
+    autor muda de nome. A contagem de likes é renderizada a cada requisição e não faz parte da versão;
+    os nomes dos autores dos comentários só são atualizados quando o cartão expira (FRAGMENT_CACHE_TTL).
+
+    Args:
+        post (Post): Post com o autor carregado.
+
+    Returns:
+        str: Chave do fragmento.
+    """
+    fields = (post.title, post.content, post.date_posted.isoformat(), post.author.username, post.comment_count,
+              post.image_file, post.image_status, post.audio_file, post.audio_status, post.video_file, post.video_status)
+    version = hashlib.blake2b(repr(fields).encode(), digest_size=8).hexdigest()
+    return f'{fragment_cache.prefix}:{post.id}:{version}'
+
+
+def render_post_card(post):
+    """
+    Renderiza as partes do cartão de um post que são iguais para todos os usuários.
+
+    Args:
+        post (Post): Post com o autor e os comentários carregados.
+
+    Returns:
+        tuple: HTML do conteúdo (título, texto, mídias e autor) e dos comentários.
+    """
+    return tuple(current_app.jinja_env.get_template(name).render(post=post) for name in CARD_TEMPLATES)
+
+
+def render_post_cards(posts):
+    """
+    Busca no cache, ou renderiza, os cartões dos posts de uma página.
+
+    Só os comentários dos posts ausentes do cache são carregados do banco. As partes que dependem
+    do usuário (estado do like e botão de deletar) são renderizadas pelo template da página.
+
+    Args:
+        posts (list): Posts da página, com os autores carregados.
+
+    Returns:
+        dict: Par (conteúdo, comentários) em Markup por ID do post.
+    """
+    if not current_app.config['FRAGMENT_CACHE_SIZE']:
+        # Cache desativado
+        load_comments(posts)
+        return {post.id: tuple(Markup(part) for part in render_post_card(post)) for post in posts}
+
+    keys = {post.id: fragment_key(post) for post in posts}
+    cards = fragment_cache.get_many(list(keys.values()))
+    missed = [post for post in posts if keys[post.id] not in cards]
+    if missed:
+        load_comments(missed)
+        rendered = {keys[post.id]: render_post_card(post) for post in missed}
+        fragment_cache.set_many(rendered)
+        cards.update(rendered)
+    record_fragments(len(posts) - len(missed), len(missed))
+    return {post.id: tuple(Markup(part) for part in cards[keys[post.id]]) for post in posts}
@@ -0,0 +1,163 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from app import db, timeline
+from app.database import insert_ignoring_duplicates
+from app.models import FriendRequest, Friendship
+from app.graph import update_after_commit as update_friend_graph
+from app.notifications import notify
+from app.stamps import touch_users
+
+
+def send_request(sender, recipient):
+    """
+    Envia um pedido de amizade, evitando pedidos duplicados.
+
+    Args:
+        sender (User): Usuário que envia o pedido.
+        recipient (User): Usuário que recebe o pedido.
+
+    Returns:
+        str: Resultado: 'sent', 'self', 'friends', 'pending' (já enviado) ou 'incoming' (o destinatário já pediu).
+    """
+    if sender.id == recipient.id:
+        return 'self'
+    if sender.is_friends_with(recipient):
+        return 'friends'
+
+    pending = FriendRequest.query.filter(
+        FriendRequest.status == 'pending',
+        or_(
+            and_(FriendRequest.sender_id == sender.id, FriendRequest.recipient_id == recipient.id),
+            and_(FriendRequest.sender_id == recipient.id, FriendRequest.recipient_id == sender.id)
+        )
+    ).first()
+    if pending is not None:
+        return 'pending' if pending.sender_id == sender.id else 'incoming'
+
+    db.session.add(FriendRequest(sender_id=sender.id, recipient_id=recipient.id))
+    notify(recipient.id, f'{sender.username} sent you a friend request.')
+    touch_users([recipient.id])  # Página de pedidos do destinatário
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Um pedido idêntico foi criado ao mesmo tempo (índice único dos pedidos pendentes)
+        db.session.rollback()
+        return 'pending'
+    return 'sent'
+
+
+def accept_requests(user, request_ids):
+    """
+    Aceita vários pedidos de amizade recebidos pelo usuário em uma única transação.
+
+    A operação é idempotente: pedidos já respondidos são ignorados e amizades
+    existentes não são duplicadas.
+
+    Args:
+        user (User): Destinatário dos pedidos.
+        request_ids (list): IDs dos pedidos a aceitar.
+
+    Returns:
+        list: IDs dos remetentes cujos pedidos foram aceitos.
+    """
+    pending = db.session.query(FriendRequest.id, FriendRequest.sender_id).filter(
+        FriendRequest.id.in_(request_ids),
+        FriendRequest.recipient_id == user.id,
+        FriendRequest.status == 'pending'
+    ).all()
+    if not pending:
+        return []
+    request_ids = [request_id for request_id, _ in pending]
+    sender_ids = sorted({sender_id for _, sender_id in pending})
+
+    # Atualização condicional: se outra requisição já respondeu estes pedidos, nada é feito
+    now = datetime.utcnow()
+    accepted = FriendRequest.query.filter(
+        FriendRequest.id.in_(request_ids),
+        FriendRequest.status == 'pending'
+    ).update({FriendRequest.status: 'accepted', FriendRequest.responded_at: now}, synchronize_session=False)
+    if accepted != len(request_ids):
+        db.session.rollback()
+        return []
+
+    # Pedidos pendentes na direção oposta também deixam de fazer sentido
+    FriendRequest.query.filter(
+        FriendRequest.sender_id == user.id,
+        FriendRequest.recipient_id.in_(sender_ids),
+        FriendRequest.status == 'pending'
+    ).update({FriendRequest.status: 'accepted', FriendRequest.responded_at: now}, synchronize_session=False)
+
+    # Cria as amizades bidirecionais em uma única instrução (upsert)
+    insert_ignoring_duplicates(db.session, Friendship.__table__, [
+        row for sender_id in sender_ids for row in (
+            {'user_id': user.id, 'friend_id': sender_id, 'timestamp': now},
+            {'user_id': sender_id, 'friend_id': user.id, 'timestamp': now},
+        )
+    ])
+
+    for sender_id in sender_ids:
+        notify(sender_id, f'{user.username} accepted your friend request.')
+        # Preenche as timelines dos dois usuários com os posts recentes do novo amigo
+        timeline.backfill_friendship(user.id, sender_id)
+        # Atualiza o índice em memória do grafo de amizades após o commit
+        update_friend_graph('add', user.id, sender_id)
+    # Feed, amigos e perfis dos dois lados mudam com a nova amizade
+    touch_users([user.id, *sender_ids])
+    db.session.commit()
+    return sender_ids
+
+
+def reject_requests(user, request_ids):
+    """
+    Rejeita vários pedidos de amizade recebidos pelo usuário em uma única instrução.
+
+    Args:
+        user (User): Destinatário dos pedidos.
+        request_ids (list): IDs dos pedidos a rejeitar.
+
+    Returns:
+        int: Quantidade de pedidos rejeitados.
+    """
+    rejected = FriendRequest.query.filter(
+        FriendRequest.id.in_(request_ids),
+        FriendRequest.recipient_id == user.id,
+        FriendRequest.status == 'pending'
+    ).update({FriendRequest.status: 'rejected', FriendRequest.responded_at: datetime.utcnow()},
+             synchronize_session=False)
+    if rejected:
+        touch_users([user.id])
+    db.session.commit()
+    return rejected
+
+
+def purge_requests(max_age_days, batch_size=1000):
+    """
+    Remove, em lotes, os pedidos aceitos ou rejeitados há mais de max_age_days.
+
+    A idade é contada a partir da resposta (responded_at), não do envio: um pedido antigo
+    respondido ontem continua disponível pelo período completo.
+
+    Args:
+        max_age_days (int): Idade máxima, em dias, dos pedidos respondidos mantidos.
+        batch_size (int): Quantidade de pedidos removidos por transação.
+
+    Returns:
+        int: Quantidade de pedidos removidos.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    removed = 0
+    while True:
+        ids = [request_id for (request_id,) in db.session.query(FriendRequest.id).filter(
+            FriendRequest.status.in_(('accepted', 'rejected')),
+            FriendRequest.responded_at < cutoff
+        ).limit(batch_size)]
+        if not ids:
+            return removed
+        FriendRequest.query.filter(FriendRequest.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
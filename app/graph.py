@@ -0,0 +1,280 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from flask import current_app
+from sqlalchemy import event, or_, and_
+from sqlalchemy.exc import SQLAlchemyError
+from app import db, app_extension
+from app.models import Friendship
+
+
+class FriendGraph:
+    """
+    Índice em memória da tabela Friendship: para cada usuário, um array ordenado com os IDs dos amigos.
+
+    O índice é carregado do banco antes do fork dos workers (load_friend_graph) ou no primeiro uso,
+    recarregado em segundo plano a cada FRIEND_GRAPH_REFRESH segundos (para incorporar alterações
+    feitas por outros processos) e atualizado incrementalmente quando uma amizade é criada ou desfeita
+    neste processo. Os IDs ficam em arrays de inteiros de 64 bits.
+    Como pode estar desatualizado, ele só é usado nos amigos em comum e nas sugestões; as verificações
+    de acesso consultam a tabela Friendship (User.is_friends_with).
+
+    Métodos:
+        are_friends(user_id, other_id): Verifica uma amizade no índice em O(log n).
+        friend_ids(user_id): Retorna os IDs dos amigos de um usuário.
+        mutual_count(user_id, other_id): Conta os amigos em comum.
+        suggestions(user_id, limit): Sugere amigos de amigos, ordenados pela quantidade de amigos em comum.
+        add_friendship(user_id, friend_id): Registra uma amizade nos dois sentidos.
+        remove_friendship(user_id, friend_id): Remove uma amizade nos dois sentidos.
+    """
+
+    def __init__(self, refresh_interval):
+        """
+        Inicializa o índice vazio.
+
+        Args:
+            refresh_interval (float): Segundos entre recargas completas (0 desativa a recarga).
+        """
+        self.refresh_interval = refresh_interval
+        self._adjacency = None
+        self._loaded_at = 0
+        self._changes = None  # Alterações feitas durante uma carga, reaplicadas no novo índice
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _graph(self):
+        # Só a primeira carga bloqueia (normalmente feita no mestre); as recargas rodam em uma thread,
+        # e as requisições continuam usando o índice anterior até ela terminar
+        if self._adjacency is None:
+            with self._load_lock:
+                if self._adjacency is None:
+                    self.load()
+        elif self.refresh_interval and time.monotonic() - self._loaded_at > self.refresh_interval:
+            if self._load_lock.acquire(blocking=False):
+                threading.Thread(target=self._refresh, args=(current_app._get_current_object(),),
+                                 name='friend-graph-refresh', daemon=True).start()
+        return self._adjacency
+
+    def _refresh(self, app):
+        # Executado na thread de recarga; libera a trava quando termina
+        try:
+            with app.app_context():
+                try:
+                    self.load()
+                except SQLAlchemyError as error:
+                    app.logger.warning('Friend graph refresh failed: %s', error)
+                    self._loaded_at = time.monotonic()  # Nova tentativa só no próximo intervalo
+                finally:
+                    db.session.remove()
+        finally:
+            self._load_lock.release()
+
+    def load(self, batch_size=10000):
+        """
+        Carrega todas as amizades do banco em lotes, pela chave primária (user_id, friend_id).
+
+        Entre os lotes a thread cede a vez (em um worker gevent, aos outros greenlets). Amizades
+        criadas ou desfeitas durante a carga são reaplicadas no novo índice antes de ele substituir o atual.
+
+        Args:
+            batch_size (int): Quantidade de amizades lidas por consulta.
+        """
+        with self._lock:
+            self._changes = []
+        adjacency = {}
+        current_id, current = None, None
+        last_user_id, last_friend_id = 0, 0
+        while True:
+            rows = db.session.query(Friendship.user_id, Friendship.friend_id).filter(or_(
+                Friendship.user_id > last_user_id,
+                and_(Friendship.user_id == last_user_id, Friendship.friend_id > last_friend_id),
+            )).order_by(Friendship.user_id, Friendship.friend_id).limit(batch_size).all()
+            for user_id, friend_id in rows:
+                if user_id != current_id:
+                    current_id, current = user_id, array('q')
+                    adjacency[user_id] = current
+                current.append(friend_id)  # Já chega ordenado pela consulta
+            if len(rows) < batch_size:
+                break
+            last_user_id, last_friend_id = rows[-1]
+            time.sleep(0)
+        with self._lock:
+            for action, user_id, friend_id in self._changes:
+                self._apply(adjacency, action, user_id, friend_id)
+            self._changes = None
+            self._adjacency = adjacency
+            self._loaded_at = time.monotonic()
+
+    def friend_ids(self, user_id):
+        """
+        Retorna os IDs dos amigos de um usuário.
+
+        Args:
+            user_id (int): ID do usuário.
+
+        Returns:
+            array: IDs dos amigos em ordem crescente.
+        """
+        return self._graph().get(user_id, array('q'))
+
+    def are_friends(self, user_id, other_id):
+        """
+        Verifica se dois usuários são amigos no índice, por busca binária (pode estar desatualizado).
+
+        Args:
+            user_id (int): ID de um usuário.
+            other_id (int): ID do outro usuário.
+
+        Returns:
+            bool: True se forem amigos.
+        """
+        friends = self.friend_ids(user_id)
+        index = bisect_left(friends, other_id)
+        return index < len(friends) and friends[index] == other_id
+
+    def mutual_count(self, user_id, other_id):
+        """
+        Conta os amigos em comum intercalando os dois arrays ordenados.
+
+        Args:
+            user_id (int): ID de um usuário.
+            other_id (int): ID do outro usuário.
+
+        Returns:
+            int: Quantidade de amigos em comum.
+        """
+        first, second = self.friend_ids(user_id), self.friend_ids(other_id)
+        i = j = count = 0
+        while i < len(first) and j < len(second):
+            if first[i] == second[j]:
+                count += 1
+                i += 1
+                j += 1
+            elif first[i] < second[j]:
+                i += 1
+            else:
+                j += 1
+        return count
+
+    def suggestions(self, user_id, limit=10):
+        """
+        Sugere amigos de amigos, ordenados pela quantidade de amigos em comum.
+
+        Para usuários com muitos amigos, apenas FRIEND_SUGGESTION_FANOUT amigos
+        (e FRIEND_SUGGESTION_FANOUT amigos de cada um) são percorridos.
+
+        Args:
+            user_id (int): ID do usuário.
+            limit (int): Quantidade máxima de sugestões.
+
+        Returns:
+            list: Pares (ID do usuário sugerido, amigos em comum), do mais relevante para o menos.
+        """
+        fanout = current_app.config['FRIEND_SUGGESTION_FANOUT']
+        friends = self.friend_ids(user_id)
+        candidates = Counter()
+        for friend_id in friends[:fanout]:
+            for candidate_id in self.friend_ids(friend_id)[:fanout]:
+                candidates[candidate_id] += 1
+
+        candidates.pop(user_id, None)
+        ranked = ((count, -candidate_id) for candidate_id, count in candidates.items()
+                  if not self.are_friends(user_id, candidate_id))
+        return [(-negative_id, count) for count, negative_id in heapq.nlargest(limit, ranked)]
+
+    def _apply(self, adjacency, action, user_id, friend_id):
+        # Insere ou remove a amizade nos dois sentidos, mantendo os arrays ordenados
+        for first, second in ((user_id, friend_id), (friend_id, user_id)):
+            friends = adjacency.setdefault(first, array('q')) if action == 'add' else adjacency.get(first)
+            if friends is None:
+                continue
+            index = bisect_left(friends, second)
+            present = index < len(friends) and friends[index] == second
+            if action == 'add' and not present:
+                friends.insert(index, second)
+            elif action == 'remove' and present:
+                del friends[index]
+
+    def _update(self, action, user_id, friend_id):
+        with self._lock:
+            if self._changes is not None:
+                self._changes.append((action, user_id, friend_id))
+            if self._adjacency is not None:
+                self._apply(self._adjacency, action, user_id, friend_id)
+
+    def add_friendship(self, user_id, friend_id):
+        """
+        Registra uma amizade nos dois sentidos.
+
+        Args:
+            user_id (int): ID de um usuário.
+            friend_id (int): ID do outro usuário.
+        """
+        self._update('add', user_id, friend_id)
+
+    def remove_friendship(self, user_id, friend_id):
+        """
+        Remove uma amizade nos dois sentidos.
+
+        Args:
+            user_id (int): ID de um usuário.
+            friend_id (int): ID do outro usuário.
+        """
+        self._update('remove', user_id, friend_id)
+
+
+friend_graph = app_extension('friend_graph', lambda app: FriendGraph(refresh_interval=app.config['FRIEND_GRAPH_REFRESH']))
+
+
+def load_friend_graph(app):
+    """
+    Carrega o índice no processo mestre, antes do fork dos workers (ver wsgi.py).
+
+    Os workers herdam o índice já carregado, com as páginas de memória compartilhadas, em vez de
+    cada um carregá-lo na primeira requisição. As conexões abertas na carga são fechadas para que
+    os workers não as herdem. Se o banco não estiver disponível, o índice é carregado no primeiro uso.
+
+    Args:
+        app (Flask): Aplicação Flask.
+    """
+    with app.app_context():
+        try:
+            friend_graph._graph()
+        except SQLAlchemyError as error:
+            app.logger.warning('Friend graph not preloaded: %s', error)
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
+
+def update_after_commit(action, user_id, friend_id):
+    """
+    Agenda uma alteração no índice para depois do commit da transação atual.
+
+    Args:
+        action (str): 'add' ou 'remove'.
+        user_id (int): ID de um usuário.
+        friend_id (int): ID do outro usuário.
+    """
+    db.session.info.setdefault('friend_graph_updates', []).append((action, user_id, friend_id))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_graph_updates(session):
+    for action, user_id, friend_id in session.info.pop('friend_graph_updates', ()):
+        if action == 'add':
+            friend_graph.add_friendship(user_id, friend_id)
+        else:
+            friend_graph.remove_friendship(user_id, friend_id)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_graph_updates(session):
+    session.info.pop('friend_graph_updates', None)
@@ -0,0 +1,246 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import os
+import secrets
+import time
+from flask import current_app
+from app import db, app_extension
+from app.models import Post
+from app.serving import bp, media_url
+from app.storage import storage, media_key, working_copy, publish
+from app.stamps import touch_post_author
+from app.utils import thread_pool
+
+# Pool de workers do processamento de imagens; o Pillow libera o GIL ao decodificar e redimensionar
+image_executor = app_extension('image_executor', lambda app: thread_pool(app.config['IMAGE_WORKERS'], 'image-worker'))
+
+# Formatos gerados para cada variante: (extensão, formato do Pillow, opções de gravação)
+IMAGE_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+# Variantes geradas pela conversão de vídeos e áudios (app.transcoding), na ordem em que são gravadas
+TRANSCODED_VARIANTS = {
+    'post_videos': (('web', 'mp4'), ('poster', 'jpg')),
+    'post_audios': (('web', 'm4a'),),
+}
+
+
+@bp.app_template_global('media_variant')
+def variant_filename(filename, variant, extension):
+    """
+    Retorna o nome do arquivo de uma variante de mídia (imagem redimensionada, vídeo convertido, capa).
+
+    Args:
+        filename (str): Nome do arquivo original (ex.: 'a1b2c3.png').
+        variant (str): Nome da variante (ex.: 'feed').
+        extension (str): Extensão da variante (ex.: 'webp', 'jpg', 'mp4').
+
+    Returns:
+        str: Nome do arquivo da variante (ex.: 'a1b2c3_feed.webp').
+    """
+    name, _ = os.path.splitext(filename)
+    return f'{name}_{variant}.{extension}'
+
+
+@bp.app_template_global()
+def image_variant_url(filename, variant, extension):
+    """
+    Retorna a URL de uma variante de imagem de post.
+
+    Args:
+        filename (str): Nome do arquivo original.
+        variant (str): Nome da variante.
+        extension (str): Extensão da variante.
+
+    Returns:
+        str: URL da variante.
+    """
+    return media_url('post_pics', variant_filename(filename, variant, extension))
+
+
+@bp.app_template_global()
+def image_srcset(filename, extension):
+    """
+    Monta o atributo srcset com todas as variantes de uma imagem de post.
+
+    Args:
+        filename (str): Nome do arquivo original.
+        extension (str): Extensão das variantes.
+
+    Returns:
+        str: Valor do atributo srcset.
+    """
+    return ', '.join(
+        f'{image_variant_url(filename, variant, extension)} {width}w'
+        for variant, width in current_app.config['IMAGE_VARIANTS'].items()
+    )
+
+
+def generate_image_variants(path):
+    """
+    Gera as variantes redimensionadas de uma imagem, sem metadados (EXIF, ICC, GPS).
+
+    As variantes são gravadas na pasta do arquivo original.
+
+    Args:
+        path (str): Caminho do arquivo original.
+
+    Returns:
+        list: Caminhos das variantes geradas.
+    """
+    # O Pillow só é carregado pelos workers que processam imagens
+    from PIL import Image, ImageOps
+
+    folder, filename = os.path.split(path)
+    generated = []
+    with Image.open(path) as original:
+        # Aplica a orientação do EXIF antes de descartar os metadados
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        for variant, width in current_app.config['IMAGE_VARIANTS'].items():
+            resized = image.copy()
+            resized.thumbnail((width, width * 4), Image.LANCZOS)  # Nunca amplia a imagem
+            for extension, image_format, options in IMAGE_FORMATS:
+                output = resized
+                if image_format == 'JPEG' and output.mode != 'RGB':
+                    # JPEG não tem transparência: aplica um fundo branco
+                    background = Image.new('RGB', output.size, (255, 255, 255))
+                    background.paste(output, mask=output.getchannel('A'))
+                    output = background
+                target = os.path.join(folder, variant_filename(filename, variant, extension))
+                # Grava em um arquivo temporário e renomeia, para nunca servir uma variante incompleta;
+                # o nome temporário é único porque posts com a mesma imagem podem ser processados juntos
+                temporary = f'{target}.{secrets.token_hex(4)}.tmp'
+                output.save(temporary, image_format, **options)
+                os.replace(temporary, target)
+                generated.append(target)
+    return generated
+
+
+def process_post_image(app, post_id, filename):
+    """
+    Processa a imagem de um post em um worker e atualiza o status do post.
+
+    Args:
+        app (Flask): Aplicação Flask (o worker não tem o contexto da requisição).
+        post_id (int): ID do post.
+        filename (str): Nome do arquivo original em post_pics.
+    """
+    with app.app_context():
+        try:
+            # A mesma imagem (mesmo hash) já processada para outro post é reaproveitada
+            last_variant = variant_filename(filename, list(app.config['IMAGE_VARIANTS'])[-1], IMAGE_FORMATS[-1][0])
+            if not storage.exists(media_key('post_pics', last_variant)):
+                with working_copy(media_key('post_pics', filename)) as path:
+                    for variant_path in generate_image_variants(path):
+                        publish('post_pics', variant_path)
+            status = 'ready'
+        except Exception:  # Inclui os erros de armazenamentos remotos
+            app.logger.exception('Image processing failed for post %s', post_id)
+            status = 'failed'
+        try:
+            Post.query.filter_by(id=post_id).update({Post.image_status: status}, synchronize_session=False)
+            touch_post_author(post_id)
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+
+def schedule_image_processing(post):
+    """
+    Envia a imagem de um post para o pool de workers.
+
+    Deve ser chamado depois do commit do post.
+
+    Args:
+        post (Post): Post com imagem pendente.
+    """
+    image_executor.submit(process_post_image, current_app._get_current_object(), post.id, post.image_file)
+
+
+def media_keys(folder, filename):
+    """
+    Retorna as chaves de um arquivo de mídia e de todas as suas variantes.
+
+    Args:
+        folder (str): Pasta da mídia.
+        filename (str): Nome do arquivo original.
+
+    Returns:
+        list: Chaves do original e das variantes (imagens redimensionadas, conversões e capa).
+    """
+    if folder == 'post_pics':
+        variants = [(variant, extension) for variant in current_app.config['IMAGE_VARIANTS'] for extension, _, _ in IMAGE_FORMATS]
+    else:
+        variants = TRANSCODED_VARIANTS[folder]
+    return [media_key(folder, filename)] + [
+        media_key(folder, variant_filename(filename, variant, extension)) for variant, extension in variants
+    ]
+
+
+# Colunas dos posts que referenciam os arquivos de cada pasta de mídia
+MEDIA_COLUMNS = {'post_pics': Post.image_file, 'post_audios': Post.audio_file, 'post_videos': Post.video_file}
+
+
+def delete_unreferenced_media(files, hours=None):
+    """
+    Remove do armazenamento as mídias que não são mais usadas por nenhum post.
+
+    Como os nomes derivam do conteúdo, o mesmo arquivo pode pertencer a vários posts;
+    deve ser chamado depois do commit que removeu (ou alterou) o post. Um upload idêntico
+    reaproveita o arquivo existente (e renova a sua data) antes de o novo post ser gravado,
+    por isso arquivos gravados nas últimas horas são mantidos: ficam para o 'flask purge-media'.
+
+    Args:
+        files (list): Pares (pasta, nome do arquivo) das mídias liberadas.
+        hours (float): Idade mínima, em horas, dos arquivos removidos (padrão: UPLOAD_RETENTION_HOURS).
+
+    Returns:
+        int: Quantidade de mídias removidas.
+    """
+    hours = hours if hours is not None else current_app.config['UPLOAD_RETENTION_HOURS']
+    removed = 0
+    for folder, filename in files:
+        if not filename or db.session.query(Post.query.filter(MEDIA_COLUMNS[folder] == filename).exists()).scalar():
+            continue
+        try:
+            modified = storage.modified(media_key(folder, filename))
+            if modified is not None and time.time() - modified < hours * 3600:
+                continue
+            for key in media_keys(folder, filename):
+                storage.delete(key)
+        except Exception:
+            # O post já foi removido: um arquivo que sobrar não afeta as páginas
+            current_app.logger.exception('Could not delete media %s/%s', folder, filename)
+            continue
+        removed += 1
+    return removed
+
+
+def purge_unreferenced_media(hours=None, batch_size=500):
+    """
+    Percorre o armazenamento e remove as mídias (com as variantes) que nenhum post usa.
+
+    Remove os arquivos mantidos por delete_unreferenced_media e os de uploads nunca usados em um post.
+
+    Args:
+        hours (float): Idade mínima, em horas, dos arquivos removidos (padrão: UPLOAD_RETENTION_HOURS).
+        batch_size (int): Quantidade de arquivos verificados por consulta.
+
+    Returns:
+        int: Quantidade de mídias removidas.
+    """
+    removed = 0
+    for folder, column in MEDIA_COLUMNS.items():
+        # Só os originais: as variantes ('a1b2c3_feed.webp') saem junto com eles
+        originals = [key.split('/', 1)[1] for key in storage.keys(folder) if '_' not in key.split('/', 1)[1]]
+        for start in range(0, len(originals), batch_size):
+            batch = originals[start:start + batch_size]
+            referenced = {filename for (filename,) in db.session.query(column).filter(column.in_(batch))}
+            removed += delete_unreferenced_media([(folder, filename) for filename in batch if filename not in referenced], hours)
+    return removed
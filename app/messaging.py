@@ -0,0 +1,135 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from flask import current_app
+from app import db
+from app.models import Message, Conversation, ConversationMember
+from app.pagination import keyset_page
+from app.events import publish_after_commit, user_topic
+
+
+def conversation_between(user_id, other_user_id, create=False):
+    """
+    Busca a conversa entre dois usuários.
+
+    Args:
+        user_id (int): ID de um dos participantes.
+        other_user_id (int): ID do outro participante.
+        create (bool): Cria a conversa (e as entradas da caixa de entrada) se ainda não existir.
+
+    Returns:
+        Conversation: Conversa encontrada ou criada, ou None.
+    """
+    user_a_id, user_b_id = sorted((user_id, other_user_id))
+    conversation = Conversation.query.filter_by(user_a_id=user_a_id, user_b_id=user_b_id).first()
+    if conversation is not None or not create:
+        return conversation
+
+    try:
+        # Só a criação fica no savepoint: um conflito não desfaz as outras alterações pendentes de quem chama
+        with db.session.begin_nested():
+            conversation = Conversation(user_a_id=user_a_id, user_b_id=user_b_id)
+            db.session.add(conversation)
+            db.session.flush()
+            db.session.add(ConversationMember(conversation_id=conversation.id, user_id=user_a_id, other_user_id=user_b_id))
+            if user_b_id != user_a_id:
+                db.session.add(ConversationMember(conversation_id=conversation.id, user_id=user_b_id, other_user_id=user_a_id))
+    except IntegrityError:
+        # Outra requisição criou a mesma conversa ao mesmo tempo; reutiliza a dela
+        return Conversation.query.filter_by(user_a_id=user_a_id, user_b_id=user_b_id).one()
+    return conversation
+
+
+def deliver_message(sender, recipient, body):
+    """
+    Envia uma mensagem, atualizando a última mensagem da conversa e o contador de não lidas do destinatário.
+
+    O commit fica a cargo de quem chama.
+
+    Args:
+        sender (User): Remetente.
+        recipient (User): Destinatário.
+        body (str): Conteúdo da mensagem.
+
+    Returns:
+        Message: Mensagem criada.
+    """
+    conversation = conversation_between(sender.id, recipient.id, create=True)
+    message = Message(sender_id=sender.id, recipient_id=recipient.id, body=body,
+                      conversation_id=conversation.id, timestamp=datetime.utcnow())
+    db.session.add(message)
+    db.session.flush()
+
+    conversation.last_message = message
+    conversation.last_message_at = message.timestamp
+    ConversationMember.query.filter_by(conversation_id=conversation.id).update(
+        {ConversationMember.last_message_at: message.timestamp}, synchronize_session=False
+    )
+    if recipient.id != sender.id:
+        ConversationMember.query.filter_by(conversation_id=conversation.id, user_id=recipient.id).update(
+            {ConversationMember.unread_count: ConversationMember.unread_count + 1}, synchronize_session=False
+        )
+        # Entrega a mensagem aos clientes conectados do destinatário depois do commit
+        publish_after_commit(user_topic(recipient.id), 'message', {
+            'sender': sender.username,
+            'body': body,
+            'timestamp': message.timestamp.strftime('%Y-%m-%d %H:%M'),
+        })
+    return message
+
+
+def get_inbox_page(user, cursor=None):
+    """
+    Busca uma página das conversas do usuário, da mensagem mais recente para a mais antiga.
+
+    Args:
+        user (User): Dono da caixa de entrada.
+        cursor (str): Cursor da página anterior (opcional).
+
+    Returns:
+        tuple: Lista de ConversationMember da página e o cursor da próxima página (ou None).
+    """
+    query = ConversationMember.query.filter(
+        ConversationMember.user_id == user.id,
+        ConversationMember.last_message_at.isnot(None)
+    ).options(
+        # Carrega o outro participante e a última mensagem junto com a página
+        joinedload(ConversationMember.other_user),
+        joinedload(ConversationMember.conversation).joinedload(Conversation.last_message)
+    ).order_by(ConversationMember.last_message_at.desc(), ConversationMember.conversation_id.desc())
+    return keyset_page(query, ConversationMember.last_message_at, ConversationMember.conversation_id,
+                       cursor, current_app.config['MESSAGES_PAGE_SIZE'],
+                       key=lambda member: (member.last_message_at, member.conversation_id))
+
+
+def get_thread_page(conversation, cursor=None):
+    """
+    Busca uma página das mensagens de uma conversa, da mais recente para a mais antiga.
+
+    Args:
+        conversation (Conversation): Conversa.
+        cursor (str): Cursor da página anterior (opcional).
+
+    Returns:
+        tuple: Lista de mensagens da página e o cursor da próxima página (ou None).
+    """
+    query = Message.query.filter_by(conversation_id=conversation.id).order_by(Message.timestamp.desc(), Message.id.desc())
+    return keyset_page(query, Message.timestamp, Message.id, cursor, current_app.config['MESSAGES_PAGE_SIZE'])
+
+
+def mark_conversation_read(conversation, user):
+    """
+    Zera o contador de não lidas da conversa para o usuário.
+
+    Args:
+        conversation (Conversation): Conversa.
+        user (User): Participante que leu a conversa.
+    """
+    ConversationMember.query.filter_by(conversation_id=conversation.id, user_id=user.id).filter(
+        ConversationMember.unread_count > 0
+    ).update({ConversationMember.unread_count: 0}, synchronize_session=False)
+    db.session.commit()
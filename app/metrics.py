@@ -0,0 +1,362 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from flask import Blueprint, abort, current_app, g, has_app_context, has_request_context, request, Response
+from jinja2 import Template
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app_extension
+
+# Limites dos buckets do histograma de duração das requisições, em segundos
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Contadores por endpoint (o prometheus_client acrescenta o sufixo _total) e suas descrições
+ENDPOINT_COUNTERS = (
+    ('sql_statements', 'SQL statements executed.'),
+    ('sql_duration_seconds', 'Time spent executing SQL statements.'),
+    ('template_sql_statements', 'SQL statements executed while rendering templates (lazy loads).'),
+    ('template_render_seconds', 'Time spent rendering templates, including the SQL they trigger.'),
+    ('slow_queries', 'SQL statements slower than SLOW_QUERY_THRESHOLD.'),
+    ('fragment_cache_hits', 'Rendered fragments served from the fragment cache.'),
+    ('fragment_cache_misses', 'Fragments rendered because they were not cached.'),
+    ('response_bytes', 'Response body bytes (when the length is known).'),
+)
+
+# Endpoints que não entram nas métricas (a própria coleta e os arquivos estáticos)
+EXCLUDED_ENDPOINTS = ('metrics.metrics', 'metrics.profile', 'static')
+
+# Profundidade máxima das pilhas amostradas e pilhas distintas guardadas por endpoint
+PROFILE_MAX_DEPTH = 80
+PROFILE_MAX_STACKS = 5000
+
+
+class RequestStats:
+    """
+    Medições de uma requisição em andamento (guardadas em g).
+
+    Atributos:
+        started (float): Início da requisição (perf_counter).
+        sql_count (int): Instruções SQL executadas.
+        sql_time (float): Tempo total das instruções SQL, em segundos.
+        template_sql_count (int): Instruções executadas durante a renderização (carregamentos lazy nos templates).
+        template_time (float): Tempo de renderização dos templates, em segundos (inclui o SQL disparado por eles).
+        slow_queries (int): Instruções acima de SLOW_QUERY_THRESHOLD.
+        rendering (int): Templates sendo renderizados no momento.
+        fragment_hits (int): Fragmentos HTML encontrados no cache (ver app.fragments).
+        fragment_misses (int): Fragmentos HTML renderizados por não estarem no cache.
+        status (int): Status da resposta (500 até a resposta ser gerada).
+        response_bytes (int): Tamanho do corpo da resposta, quando conhecido.
+    """
+
+    __slots__ = ('started', 'sql_count', 'sql_time', 'template_sql_count', 'template_time', 'slow_queries', 'rendering',
+                 'fragment_hits', 'fragment_misses', 'status', 'response_bytes')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_sql_count = 0
+        self.template_time = 0.0
+        self.slow_queries = 0
+        self.rendering = 0
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+        self.status = 500
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    """
+    Acumula as métricas das requisições por endpoint (prometheus_client).
+
+    Com PROMETHEUS_MULTIPROC_DIR (definido pelo gunicorn.conf.py), cada processo grava os valores em
+    arquivos nessa pasta e render soma os de todos os workers, inclusive os já encerrados, de modo
+    que os contadores não voltam a zero quando um worker reinicia nem mudam conforme o worker que
+    atende a coleta. Sem a pasta, os valores ficam na memória do processo.
+
+    Métodos:
+        record(endpoint, method, status, duration, stats, response_bytes): Registra uma requisição concluída.
+        render(): Gera o texto no formato de exposição do Prometheus.
+    """
+
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        self.requests = Counter('app_requests', 'Requests handled, by endpoint, method and status.',
+                                ('endpoint', 'method', 'status'), registry=self.registry)
+        self.durations = Histogram('app_request_duration_seconds', 'Request duration (excluding streamed bodies).',
+                                   ('endpoint',), buckets=DURATION_BUCKETS, registry=self.registry)
+        self.totals = {name: Counter(f'app_{name}', description, ('endpoint',), registry=self.registry)
+                       for name, description in ENDPOINT_COUNTERS}
+
+    def record(self, endpoint, method, status, duration, stats, response_bytes):
+        """
+        Registra uma requisição concluída.
+
+        Args:
+            endpoint (str): Endpoint da rota.
+            method (str): Método HTTP.
+            status (int): Status da resposta.
+            duration (float): Duração da requisição, em segundos.
+            stats (RequestStats): Medições da requisição.
+            response_bytes (int): Tamanho do corpo da resposta.
+        """
+        self.requests.labels(endpoint, method, str(status)).inc()
+        self.durations.labels(endpoint).observe(duration)
+        for name, value in (('sql_statements', stats.sql_count),
+                            ('sql_duration_seconds', stats.sql_time),
+                            ('template_sql_statements', stats.template_sql_count),
+                            ('template_render_seconds', stats.template_time),
+                            ('slow_queries', stats.slow_queries),
+                            ('fragment_cache_hits', stats.fragment_hits),
+                            ('fragment_cache_misses', stats.fragment_misses),
+                            ('response_bytes', response_bytes)):
+            self.totals[name].labels(endpoint).inc(value)
+
+    def render(self):
+        """
+        Gera o texto das métricas no formato de exposição do Prometheus (text/plain 0.0.4).
+
+        Returns:
+            bytes: Métricas de todas as rotas (de todos os workers, com PROMETHEUS_MULTIPROC_DIR).
+        """
+        if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return generate_latest(registry)
+        return generate_latest(self.registry)
+
+
+class SamplingProfiler:
+    """
+    Profiler por amostragem das requisições (modo de desenvolvimento).
+
+    Uma thread lê periodicamente a pilha de chamadas das threads que estão atendendo
+    requisições e conta as pilhas por endpoint, no formato "folded" usado por
+    flamegraph.pl e speedscope.
+
+    Métodos:
+        begin(endpoint): Passa a amostrar a thread atual.
+        end(): Para de amostrar a thread atual.
+        folded(endpoint): Pilhas amostradas no formato folded.
+    """
+
+    def __init__(self, interval):
+        """
+        Args:
+            interval (float): Intervalo entre as amostras, em segundos.
+        """
+        self.interval = interval
+        self._active = {}  # ident da thread -> endpoint
+        self._stacks = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self, endpoint):
+        with self._lock:
+            self._active[threading.get_ident()] = endpoint
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+
+    def end(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, endpoint in active.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                folded = ';'.join(reversed(stack))
+                with self._lock:
+                    stacks = self._stacks[endpoint]
+                    if folded in stacks or len(stacks) < PROFILE_MAX_STACKS:
+                        stacks[folded] += 1
+
+    def folded(self, endpoint=None):
+        """
+        Retorna as pilhas amostradas no formato folded ("frame;frame;frame contagem").
+
+        Args:
+            endpoint (str): Endpoint (opcional; sem ele, todos, com o endpoint como primeiro frame).
+
+        Returns:
+            str: Uma pilha por linha.
+        """
+        with self._lock:
+            endpoints = [endpoint] if endpoint else sorted(self._stacks)
+            lines = [f'{stack if endpoint else name + ";" + stack} {count}'
+                     for name in endpoints for stack, count in sorted(self._stacks.get(name, {}).items())]
+        return '\n'.join(lines) + '\n'
+
+
+bp = Blueprint('metrics', __name__)
+
+# Métricas e profiler de cada processo (os workers não herdam as contagens do processo mestre)
+registry = app_extension('metrics_registry', lambda app: MetricsRegistry())
+profiler = app_extension('request_profiler', lambda app: SamplingProfiler(app.config['PROFILER_INTERVAL']))
+
+
+def _current_stats():
+    # Medições da requisição atual (None fora de requisições, ex.: workers em segundo plano)
+    return g.get('request_stats') if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    if not has_app_context():
+        # Engines usados fora da aplicação (ex.: scripts de benchmark)
+        return
+    stats = _current_stats()
+    slow = elapsed * 1000 >= current_app.config['SLOW_QUERY_THRESHOLD']
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_time += elapsed
+        if stats.rendering:
+            stats.template_sql_count += 1
+        if slow:
+            stats.slow_queries += 1
+    if slow:
+        source = f'{request.method} {request.path} ({request.endpoint})' if has_request_context() else 'background'
+        current_app.logger.warning('Slow query (%.1f ms) from %s: %s', elapsed * 1000, source, ' '.join(statement.split())[:1000])
+
+
+def record_fragments(hits, misses):
+    """
+    Soma os acertos e as falhas do cache de fragmentos às medições da requisição atual.
+
+    Args:
+        hits (int): Fragmentos encontrados no cache.
+        misses (int): Fragmentos renderizados.
+    """
+    stats = _current_stats()
+    if stats is not None:
+        stats.fragment_hits += hits
+        stats.fragment_misses += misses
+
+
+class TimedTemplate(Template):
+    """
+    Template do Jinja que mede o tempo de renderização na requisição atual.
+
+    Só a renderização do template principal é medida: includes e blocos herdados fazem parte dela.
+    """
+
+    def render(self, *args, **kwargs):
+        stats = _current_stats()
+        if stats is None:
+            return super().render(*args, **kwargs)
+        stats.rendering += 1
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            stats.rendering -= 1
+            if not stats.rendering:
+                stats.template_time += time.perf_counter() - started
+
+
+def init_app(app):
+    """
+    Ativa a instrumentação na aplicação: eventos do engine, templates com medição de tempo e as rotas /metrics.
+
+    Args:
+        app (Flask): Aplicação Flask.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    app.jinja_env.template_class = TimedTemplate
+    app.register_blueprint(bp)
+
+
+@bp.before_app_request
+def _start_request_metrics():
+    if request.endpoint in EXCLUDED_ENDPOINTS:
+        return
+    g.request_stats = RequestStats()
+    if current_app.config['PROFILER_ENABLED']:
+        profiler.begin(request.endpoint)
+
+
+@bp.after_app_request
+def _capture_response(response):
+    stats = g.get('request_stats')
+    if stats is not None:
+        stats.status = response.status_code
+        stats.response_bytes = 0 if response.is_streamed else response.content_length or 0
+    return response
+
+
+@bp.teardown_app_request
+def _record_request_metrics(error):
+    # No teardown, e não no after_request: requisições que terminam com uma exceção também são contadas
+    stats = g.pop('request_stats', None)
+    if stats is not None:
+        if current_app.config['PROFILER_ENABLED']:
+            profiler.end()
+        duration = time.perf_counter() - stats.started
+        registry.record(request.endpoint or 'unknown', request.method, stats.status, duration, stats, stats.response_bytes)
+
+
+def _check_metrics_token():
+    # Exige "Authorization: Bearer <token>"; sem METRICS_TOKEN configurado, as rotas não existem
+    token = current_app.config['METRICS_TOKEN']
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        abort(401)
+
+
+@bp.route('/metrics')
+def metrics():
+    """
+    Rota de métricas no formato do Prometheus: requisições, duração, SQL, templates e tamanho das respostas por endpoint.
+
+    Com PROMETHEUS_MULTIPROC_DIR, as métricas somam todos os workers; sem ela, são do processo que atende a requisição.
+
+    Returns:
+        Response: Texto no formato de exposição do Prometheus.
+    """
+    _check_metrics_token()
+    return Response(registry.render(), mimetype=CONTENT_TYPE_LATEST)
+
+
+@bp.route('/metrics/profile')
+def profile():
+    """
+    Rota das pilhas amostradas pelo profiler (PROFILER_ENABLED), no formato folded.
+
+    O parâmetro 'endpoint' filtra um endpoint; a saída pode ser aberta no speedscope ou no flamegraph.pl.
+
+    Returns:
+        Response: Pilhas no formato folded ou 404 se o profiler estiver desativado.
+    """
+    _check_metrics_token()
+    if not current_app.config['PROFILER_ENABLED']:
+        abort(404)
+    return Response(profiler.folded(request.args.get('endpoint')), mimetype='text/plain')
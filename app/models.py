@@ -44,6 +44,8 @@ class User(db.Model, UserMixin):
         password (str): Hash da senha do usuário.
         about_me (str): Descrição do usuário.
         last_seen (datetime): Última vez que o usuário esteve online.
+        unread_notification_count (int): Quantidade de notificações não lidas (desnormalizada).
+        changed_at (datetime): Última alteração que afeta as páginas do usuário e dos amigos (ETags de app.stamps).
         posts (list): Lista de posts associados ao usuário.
         sent_requests (list): Lista de pedidos de amizade enviados pelo usuário.
         received_requests (list): Lista de pedidos de amizade recebidos pelo usuário.
@@ -53,9 +55,11 @@ class User(db.Model, UserMixin):
     username = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     image_file = db.Column(db.String(20), nullable=False, default='default.jpg')
-    password = db.Column(db.String(60), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     about_me = db.Column(db.Text, nullable=True)
     last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    unread_notification_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Mantido por app.notifications
+    changed_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)  # Mantido por app.stamps.touch_users
     posts = db.relationship('Post', backref='author', lazy=True)
     sent_requests = db.relationship('FriendRequest', foreign_keys='FriendRequest.sender_id', backref='sender', lazy='dynamic')
     received_requests = db.relationship('FriendRequest', foreign_keys='FriendRequest.recipient_id', backref='recipient', lazy='dynamic')
@@ -80,8 +84,11 @@ class User(db.Model, UserMixin):
         Returns:
             bool: True se os usuários são amigos, False caso contrário.
         """
-        # Verifica se há uma relação de amizade entre o usuário atual e o usuário fornecido
-        return self.friends.filter(Friendship.friend_id == user.id).count() > 0
+        # Busca pela chave primária de Friendship: usada nas verificações de acesso, não pode ficar desatualizada
+        # como o índice em memória de app.graph
+        return db.session.query(
+            Friendship.query.filter_by(user_id=self.id, friend_id=user.id).exists()
+        ).scalar()
 
 class Post(db.Model):
     """
@@ -93,23 +100,43 @@ class Post(db.Model):
         date_posted (datetime): Data e hora em que o post foi criado.
         content (str): Conteúdo do post.
         image_file (str): Nome do arquivo de imagem associado ao post.
+        image_status (str): Estado das variantes da imagem (pending, ready, failed).
         audio_file (str): Nome do arquivo de áudio associado ao post.
+        audio_status (str): Estado da conversão do áudio (processing, ready, failed).
         video_file (str): Nome do arquivo de vídeo associado ao post.
+        video_status (str): Estado da conversão do vídeo e da capa (processing, ready, failed).
         user_id (int): ID do usuário que criou o post.
+        like_count (int): Quantidade de likes do post (desnormalizada).
+        comment_count (int): Quantidade de comentários do post (desnormalizada).
     """
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     content = db.Column(db.Text, nullable=False)
     image_file = db.Column(db.String(20), nullable=True)
+    image_status = db.Column(db.String(10), nullable=True)  # Variantes geradas por app.media em segundo plano
     audio_file = db.Column(db.String(20), nullable=True)
+    audio_status = db.Column(db.String(10), nullable=True)  # Conversão feita por app.transcoding em segundo plano
     video_file = db.Column(db.String(20), nullable=True)  # Novo campo para vídeo
+    video_status = db.Column(db.String(10), nullable=True)  # Conversão e capa feitas por app.transcoding
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)  # Coluna timestamp
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    
+    # Contadores mantidos por like_post, comment_post e delete_post (ver 'flask recount-posts')
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Índice para os posts de um usuário em ordem cronológica (perfil e feed); os das mídias
+    # atendem à verificação de referências antes de remover um arquivo (app.media.delete_unreferenced_media)
+    __table_args__ = (
+        db.Index('ix_post_user_id_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_post_image_file', 'image_file'),
+        db.Index('ix_post_audio_file', 'audio_file'),
+        db.Index('ix_post_video_file', 'video_file'),
+    )
+
     @property
     def likes_count(self):
-        return Like.query.filter_by(post_id=self.id).count()
+        return self.like_count
 
     def __repr__(self):
         """
@@ -131,16 +158,26 @@ class Message(db.Model):
         recipient_id (int): ID do usuário que recebeu a mensagem.
         body (str): Conteúdo da mensagem.
         timestamp (datetime): Data e hora em que a mensagem foi enviada.
+        conversation_id (int): ID da conversa entre remetente e destinatário.
     """
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     body = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id', name='fk_message_conversation_id'), nullable=True)
 
     sender = db.relationship('User', foreign_keys=[sender_id], backref='sent_messages')
     recipient = db.relationship('User', foreign_keys=[recipient_id], backref='received_messages')
 
+    # Índices para as caixas de saída e de entrada em ordem cronológica
+    __table_args__ = (
+        db.Index('ix_message_sender_id_timestamp', 'sender_id', 'timestamp'),
+        db.Index('ix_message_recipient_id_timestamp', 'recipient_id', 'timestamp'),
+        # Índice para a paginação das mensagens de uma conversa
+        db.Index('ix_message_conversation_id_timestamp', 'conversation_id', 'timestamp', 'id'),
+    )
+
 
     def __repr__(self):
         """
@@ -161,12 +198,25 @@ class FriendRequest(db.Model):
         recipient_id (int): ID do usuário que recebeu o pedido de amizade.
         timestamp (datetime): Data e hora em que o pedido de amizade foi enviado.
         status (str): Status do pedido de amizade (pendente, aceito, rejeitado).
+        responded_at (datetime): Data e hora em que o pedido foi aceito ou rejeitado.
     """
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(10), nullable=False, default='pending')
+    responded_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Índice para os pedidos pendentes recebidos por um usuário
+        db.Index('ix_friend_request_recipient_id_status', 'recipient_id', 'status'),
+        # Índice para a remoção dos pedidos respondidos antigos (flask purge-friend-requests)
+        db.Index('ix_friend_request_status_responded_at', 'status', 'responded_at'),
+        # Impede mais de um pedido pendente entre o mesmo remetente e destinatário
+        db.Index('uq_friend_request_pending_pair', 'sender_id', 'recipient_id', unique=True,
+                 sqlite_where=db.text("status = 'pending'"),
+                 postgresql_where=db.text("status = 'pending'")),
+    )
 
     def __repr__(self):
         """
@@ -185,6 +235,12 @@ class Like(db.Model):
     user = db.relationship('User', back_populates='likes')
     post = db.relationship('Post', back_populates='likes')
 
+    # Um usuário curte um post no máximo uma vez; o índice único também atende a busca do like do usuário
+    __table_args__ = (
+        db.Index('uq_like_user_id_post_id', 'user_id', 'post_id', unique=True),
+        db.Index('ix_like_post_id', 'post_id'),
+    )
+
 User.likes = db.relationship('Like', back_populates='user')
 Post.likes = db.relationship('Like', back_populates='post')
 
@@ -197,6 +253,9 @@ class Comment(db.Model):
     post = db.relationship('Post', back_populates='comments')
     user = db.relationship('User')
 
+    # Índice para os comentários de um post
+    __table_args__ = (db.Index('ix_comment_post_id', 'post_id'),)
+
 Post.comments = db.relationship('Comment', back_populates='post')
 
 class Notification(db.Model):
@@ -204,3 +263,72 @@ class Notification(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     message = db.Column(db.String(255), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    read_at = db.Column(db.DateTime, nullable=True)  # None enquanto a notificação não for lida
+
+    # Índice para as notificações de um usuário em ordem cronológica;
+    # o índice em timestamp atende a limpeza das notificações antigas
+    __table_args__ = (
+        db.Index('ix_notification_user_id_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_notification_timestamp', 'timestamp'),
+    )
+
+class TimelineEntry(db.Model):
+    """
+    Entrada da timeline pré-calculada (fan-out na escrita) de um usuário.
+
+    Atributos:
+        user_id (int): ID do usuário dono da timeline.
+        post_id (int): ID do post entregue na timeline.
+        timestamp (datetime): Cópia do timestamp do post, usada na ordenação do feed.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    # Índice usado na leitura do feed: varredura por faixa dentro da timeline do usuário
+    __table_args__ = (db.Index('ix_timeline_entry_user_timestamp', 'user_id', 'timestamp', 'post_id'),)
+
+class Conversation(db.Model):
+    """
+    Conversa entre um par de usuários.
+
+    Atributos:
+        id (int): ID único da conversa.
+        user_a_id (int): Menor ID entre os dois participantes.
+        user_b_id (int): Maior ID entre os dois participantes.
+        last_message_id (int): ID da última mensagem da conversa.
+        last_message_at (datetime): Data e hora da última mensagem.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    user_a_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_b_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    last_message_id = db.Column(db.Integer, db.ForeignKey('message.id', use_alter=True, name='fk_conversation_last_message_id'), nullable=True)
+    last_message_at = db.Column(db.DateTime, nullable=True)
+
+    last_message = db.relationship('Message', foreign_keys=[last_message_id], post_update=True)
+
+    # Uma única conversa por par de usuários
+    __table_args__ = (db.UniqueConstraint('user_a_id', 'user_b_id', name='uq_conversation_user_a_id_user_b_id'),)
+
+class ConversationMember(db.Model):
+    """
+    Estado de uma conversa para um dos participantes (caixa de entrada).
+
+    Atributos:
+        conversation_id (int): ID da conversa.
+        user_id (int): ID do participante.
+        other_user_id (int): ID do outro participante.
+        unread_count (int): Quantidade de mensagens não lidas pelo participante.
+        last_message_at (datetime): Cópia de Conversation.last_message_at, usada na ordenação da caixa de entrada.
+    """
+    conversation_id = db.Column(db.Integer, db.ForeignKey('conversation.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    other_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    unread_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_message_at = db.Column(db.DateTime, nullable=True)
+
+    conversation = db.relationship('Conversation')
+    other_user = db.relationship('User', foreign_keys=[other_user_id])
+
+    # Índice da caixa de entrada: conversas do usuário pela mensagem mais recente
+    __table_args__ = (db.Index('ix_conversation_member_user_id_last_message_at', 'user_id', 'last_message_at', 'conversation_id'),)
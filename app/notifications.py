@@ -0,0 +1,119 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from flask import current_app
+from app import db
+from app.models import User, Notification
+from app.pagination import keyset_page
+from app.events import publish_after_commit, user_topic
+from app.writebehind import write_behind_enabled, enqueue_notification_after_commit
+
+
+def notify(user_id, message):
+    """
+    Cria uma notificação para um usuário.
+
+    O contador de não lidas do usuário é incrementado na mesma transação;
+    o commit fica a cargo de quem chama. Com WRITE_BEHIND ativo, a notificação
+    entra na fila de escritas em lote depois do commit.
+
+    Args:
+        user_id (int): ID do usuário notificado.
+        message (str): Texto da notificação.
+
+    Returns:
+        Notification: Notificação criada (None no modo write-behind).
+    """
+    if write_behind_enabled():
+        enqueue_notification_after_commit(user_id, message)
+        return None
+    notification = Notification(user_id=user_id, message=message[:255])
+    db.session.add(notification)
+    return notification
+
+
+def get_notifications_page(user, cursor=None):
+    """
+    Busca uma página das notificações de um usuário, das mais recentes para as mais antigas.
+
+    Args:
+        user (User): Usuário dono das notificações.
+        cursor (str): Cursor da página anterior (opcional).
+
+    Returns:
+        tuple: Lista de notificações da página e o cursor da próxima página (ou None).
+    """
+    query = Notification.query.filter_by(user_id=user.id).order_by(Notification.timestamp.desc(), Notification.id.desc())
+    return keyset_page(query, Notification.timestamp, Notification.id, cursor, current_app.config['NOTIFICATIONS_PAGE_SIZE'])
+
+
+def mark_all_read(user):
+    """
+    Marca todas as notificações do usuário como lidas e zera o contador.
+
+    Args:
+        user (User): Usuário dono das notificações.
+    """
+    Notification.query.filter(
+        Notification.user_id == user.id,
+        Notification.read_at.is_(None)
+    ).update({Notification.read_at: datetime.utcnow()}, synchronize_session=False)
+    User.query.filter_by(id=user.id).update({User.unread_notification_count: 0, User.changed_at: datetime.utcnow()},
+                                            synchronize_session=False)
+    db.session.commit()
+
+
+def trim_notifications(max_age_days, batch_size=1000):
+    """
+    Remove notificações mais antigas que max_age_days, em lotes.
+
+    Os contadores de não lidas dos usuários são ajustados na mesma transação de cada lote.
+
+    Args:
+        max_age_days (int): Idade máxima, em dias, das notificações mantidas.
+        batch_size (int): Quantidade de notificações removidas por transação.
+
+    Returns:
+        int: Quantidade de notificações removidas.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+    removed = 0
+    while True:
+        ids = [notification_id for (notification_id,) in db.session.query(Notification.id)
+               .filter(Notification.timestamp < cutoff)
+               .order_by(Notification.timestamp)
+               .limit(batch_size)]
+        if not ids:
+            return removed
+
+        # Desconta dos contadores as notificações não lidas do lote
+        unread = db.session.query(Notification.user_id, func.count(Notification.id)).filter(
+            Notification.id.in_(ids),
+            Notification.read_at.is_(None)
+        ).group_by(Notification.user_id).all()
+        for user_id, count in unread:
+            User.query.filter_by(id=user_id).update(
+                {User.unread_notification_count: User.unread_notification_count - count, User.changed_at: datetime.utcnow()},
+                synchronize_session=False
+            )
+
+        Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(ids)
+
+
+@event.listens_for(Notification, 'after_insert')
+def _increment_unread_count(mapper, connection, target):
+    # Mantém o contador (e o carimbo de alteração do usuário) na mesma transação da inserção, com um UPDATE atômico
+    if target.read_at is None:
+        user_table = User.__table__
+        connection.execute(
+            user_table.update()
+            .where(user_table.c.id == target.user_id)
+            .values(unread_notification_count=user_table.c.unread_notification_count + 1, changed_at=datetime.utcnow())
+        )
+        # Avisa os clientes conectados do usuário depois do commit
+        publish_after_commit(user_topic(target.user_id), 'notification', {'message': target.message})
@@ -0,0 +1,79 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import base64
+from datetime import datetime
+from sqlalchemy import or_, and_
+
+# Formato usado para serializar o timestamp dentro do cursor
+CURSOR_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def encode_cursor(timestamp, item_id):
+    """
+    Gera um cursor opaco a partir da posição do último item de uma página.
+
+    Args:
+        timestamp (datetime): Timestamp do último item exibido.
+        item_id (int): ID do último item exibido.
+
+    Returns:
+        str: Cursor codificado em base64 com o par (timestamp, id).
+    """
+    raw = f"{timestamp.strftime(CURSOR_TIMESTAMP_FORMAT)}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decodifica um cursor gerado por encode_cursor.
+
+    Args:
+        cursor (str): Cursor recebido na query string.
+
+    Returns:
+        tuple: Par (timestamp, id) ou None se o cursor for inválido.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        timestamp, item_id = raw.split('|')
+        return datetime.strptime(timestamp, CURSOR_TIMESTAMP_FORMAT), int(item_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def keyset_page(query, timestamp_column, id_column, cursor, page_size, key=None):
+    """
+    Busca uma página de uma consulta ordenada por (timestamp, id) decrescente.
+
+    Args:
+        query (Query): Consulta já ordenada por timestamp_column e id_column decrescentes.
+        timestamp_column (Column): Coluna de timestamp usada na ordenação.
+        id_column (Column): Coluna de ID usada como desempate.
+        cursor (str): Cursor da página anterior (opcional).
+        page_size (int): Quantidade de itens por página.
+        key (callable): Função que retorna o par (timestamp, id) de um item (padrão: item.timestamp, item.id).
+
+    Returns:
+        tuple: Lista de itens da página e o cursor da próxima página (ou None).
+    """
+    position = decode_cursor(cursor)
+    if position is not None:
+        timestamp, item_id = position
+        # Continua exatamente após o último item da página anterior
+        query = query.filter(or_(
+            timestamp_column < timestamp,
+            and_(timestamp_column == timestamp, id_column < item_id)
+        ))
+
+    # Busca um item a mais para saber se existe uma próxima página
+    items = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        key = key or (lambda item: (item.timestamp, item.id))
+        next_cursor = encode_cursor(*key(items[-1]))
+    return items, next_cursor
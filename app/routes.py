@@ -2,19 +2,33 @@
 Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
 """
 
-import os
-import secrets
-from flask import render_template, url_for, flash, redirect, request, abort, jsonify
-from app import app, db, bcrypt
+from flask import Blueprint, current_app, render_template, url_for, flash, redirect, request, abort, jsonify, Response
+from app import db, bcrypt
+from app.database import use_read_replica
 from app.forms import RegistrationForm, LoginForm, PostForm, MessageForm, ProfileForm, FriendRequestForm
-from app.models import User, Post, Message, FriendRequest, Friendship, Comment, Notification, Like
+from app.models import User, Post, FriendRequest, Friendship, Comment, Like
+from app.feed import get_feed_page, load_liked_post_ids
+from app.fragments import render_post_cards
+from app import timeline, events, media, friendships, transcoding, uploads
+from app import search as search_index
+from app.notifications import notify, get_notifications_page, mark_all_read
+from app.graph import friend_graph, update_after_commit as update_friend_graph
+from app.writebehind import write_behind_enabled, write_queue
+from app.throttle import login_throttle
+from app.stamps import conditional_page, network_stamp, profile_stamp, friend_requests_stamp, touch_users
+from app.messaging import conversation_between, deliver_message, get_inbox_page, get_thread_page, mark_conversation_read
 from flask_login import login_user, current_user, logout_user, login_required
-from PIL import Image
+from sqlalchemy.exc import IntegrityError
+
+bp = Blueprint('main', __name__)
 
 def save_file(form_file, folder):
     """
     Salva um arquivo enviado pelo usuário em um diretório específico.
 
+    O arquivo já foi gravado em blocos na pasta de uploads durante a leitura da requisição;
+    aqui ele apenas recebe o nome derivado do hash do conteúdo, reaproveitando mídias idênticas.
+
     Args:
         form_file (FileStorage): Arquivo enviado pelo usuário.
         folder (str): Diretório onde o arquivo será salvo.
@@ -22,48 +36,38 @@ def save_file(form_file, folder):
     Returns:
         str: Nome do arquivo salvo.
     """
-    # Gera um nome de arquivo único usando um hash hexadecimal
-    random_hex = secrets.token_hex(8)
-    _, f_ext = os.path.splitext(form_file.filename)
-    file_fn = random_hex + f_ext
-    file_path = os.path.join(app.root_path, 'static', folder, file_fn)
-
-    # Salva o arquivo no diretório especificado
-    form_file.save(file_path)
-    return file_fn
+    return uploads.save_upload(form_file, folder)
 
-@app.route("/")
-@app.route("/home")
+@bp.route("/")
+@bp.route("/home")
 @login_required
+@use_read_replica
+@conditional_page(network_stamp)
 def home():
     """
     Rota para a página inicial, exibindo os posts do usuário logado e dos amigos.
 
+    A página é paginada por cursor (timestamp, id); com o parâmetro 'partial'
+    apenas os posts da página são renderizados, para a rolagem infinita.
+
     Returns:
         str: Renderização do template 'home.html' com os posts do usuário e amigos.
     """
-    # Busca os posts dos amigos, excluindo o usuário atual
-    friends_posts = Post.query.filter(
-        Post.author.has(Friendship.friend_id == current_user.id),
-        Post.user_id != current_user.id  # Exclui os posts do próprio usuário
-    ).order_by(Post.timestamp.desc()).all()
-
-    # Busca os posts do usuário logado
-    user_posts = Post.query.filter_by(user_id=current_user.id).order_by(Post.timestamp.desc()).all()
-    
-    # Combina os posts do usuário e dos amigos
-    posts = user_posts + friends_posts
+    # Busca uma única página do feed, já ordenada pelo banco de dados
+    posts, next_cursor = get_feed_page(current_user, request.args.get('cursor'))
+    # Estado de curtida do usuário em uma única consulta para a página inteira
+    liked_post_ids = load_liked_post_ids(posts, current_user)
+    # Partes fixas dos cartões vindas do cache de fragmentos (só os posts ausentes são renderizados)
+    post_cards = render_post_cards(posts)
+    page = dict(posts=posts, next_cursor=next_cursor, liked_post_ids=liked_post_ids, post_cards=post_cards)
 
-    # Ordena os posts por timestamp decrescente (do mais recente ao mais antigo)
-    posts.sort(key=lambda post: post.timestamp, reverse=True)
+    if request.args.get('partial'):
+        return render_template('feed_page.html', **page)
 
-    # Contagem de notificações
-    notification_count = Notification.query.filter_by(user_id=current_user.id).count()
+    # Renderiza o template passando os posts (a contagem de notificações vem do context processor)
+    return render_template('home.html', **page)
 
-    # Renderiza o template passando os posts e a contagem de notificações
-    return render_template('home.html', posts=posts, notification_count=notification_count)
-
-@app.route("/register", methods=['GET', 'POST'])
+@bp.route("/register", methods=['GET', 'POST'])
 def register():
     """
     Rota para a página de registro de novos usuários.
@@ -72,23 +76,23 @@ def register():
         str: Renderização do template 'register.html' com o formulário de registro.
     """
     if current_user.is_authenticated:
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
 
     form = RegistrationForm()
     if form.validate_on_submit():
         # Cria um hash da senha para armazenamento seguro
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        hashed_password = bcrypt.generate_password_hash(form.password.data)
         user = User(username=form.username.data, email=form.email.data, password=hashed_password)
 
         # Adiciona o novo usuário ao banco de dados
         db.session.add(user)
         db.session.commit()
         flash('Your account has been created! You are now able to log in', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
 
     return render_template('register.html', title='Register', form=form)
 
-@app.route("/login", methods=['GET', 'POST'])
+@bp.route("/login", methods=['GET', 'POST'])
 def login():
     """
     Rota para a página de login de usuários.
@@ -97,21 +101,38 @@ def login():
         str: Renderização do template 'login.html' com o formulário de login.
     """
     if current_user.is_authenticated:
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
 
     form = LoginForm()
     if form.validate_on_submit():
-        user = User.query.filter_by(email=form.email.data).first()
+        account = form.email.data  # Normalizado pelo formulário
+        # Recusa antes de calcular o hash: tentativas em massa de um IP não consomem CPU
+        retry_after = login_throttle.retry_after(request.remote_addr)
+        if retry_after:
+            flash('Too many failed login attempts. Please try again later.', 'danger')
+            return render_template('login.html', title='Login', form=form), 429, {'Retry-After': str(retry_after)}
+
+        user = User.query.filter_by(email=account).first()
         if user and bcrypt.check_password_hash(user.password, form.password.data):
+            login_throttle.reset(account)
+            # Recalcula o hash se o algoritmo ou o custo configurados mudaram
+            if bcrypt.needs_rehash(user.password):
+                user.password = bcrypt.generate_password_hash(form.password.data)
+                db.session.commit()
             login_user(user, remember=True)
             next_page = request.args.get('next')
-            return redirect(next_page) if next_page else redirect(url_for('home'))
+            return redirect(next_page) if next_page else redirect(url_for('main.home'))
         else:
+            login_throttle.record_failure(request.remote_addr, account)
+            retry_after = login_throttle.account_retry_after(account)
+            if retry_after:
+                flash('Too many failed login attempts. Please try again later.', 'danger')
+                return render_template('login.html', title='Login', form=form), 429, {'Retry-After': str(retry_after)}
             flash('Login Unsuccessful. Please check email and password', 'danger')
 
     return render_template('login.html', title='Login', form=form)
 
-@app.route("/logout")
+@bp.route("/logout")
 def logout():
     """
     Rota para logout do usuário.
@@ -120,9 +141,9 @@ def logout():
         str: Redirecionamento para a página inicial.
     """
     logout_user()
-    return redirect(url_for('home'))
+    return redirect(url_for('main.home'))
 
-@app.route("/post/new", methods=['GET', 'POST'])
+@bp.route("/post/new", methods=['GET', 'POST'])
 @login_required
 def new_post():
     """
@@ -137,20 +158,79 @@ def new_post():
         image_file = save_file(form.image.data, 'post_pics') if form.image.data else None
         audio_file = save_file(form.audio.data, 'post_audios') if form.audio.data else None
         video_file = save_file(form.video.data, 'post_videos') if form.video.data else None
+        if video_file is None and form.video_upload.data:
+            # Vídeo enviado antes, em partes, pela rota /uploads
+            video_file = uploads.claim_upload(form.video_upload.data, current_user.id, 'post_videos')
 
         # Cria um novo post com os dados fornecidos
         post = Post(title=form.title.data, content=form.content.data, image_file=image_file, audio_file=audio_file,
-                    video_file=video_file, author=current_user)
+                    video_file=video_file, author=current_user, image_status='pending' if image_file else None,
+                    audio_status='processing' if audio_file else None, video_status='processing' if video_file else None)
 
         # Adiciona o novo post ao banco de dados
         db.session.add(post)
+        db.session.flush()
+        # Entrega o post nas timelines do autor e dos amigos (se o fan-out na escrita estiver ativo)
+        timeline.fan_out_post(post)
+        touch_users([current_user.id])  # Feed do autor e dos amigos
         db.session.commit()
+        # Gera as variantes da imagem fora da requisição
+        if image_file:
+            media.schedule_image_processing(post)
+        # Converte vídeo e áudio em processos separados; o post mostra "processing" até terminar
+        if audio_file or video_file:
+            transcoding.schedule_transcoding(post)
         flash('Your post has been created!', 'success')
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
 
     return render_template('post.html', title='New Post', form=form)
 
-@app.route("/post/<int:post_id>/delete", methods=['POST'])
+@bp.route("/uploads", methods=['POST'])
+@login_required
+def create_upload():
+    """
+    Rota que inicia um upload em partes (retomável), usado para vídeos grandes.
+
+    Recebe 'filename' e 'size' (JSON ou formulário); o limite de tamanho do tipo de mídia
+    é verificado antes de qualquer byte ser enviado.
+
+    Returns:
+        Response: JSON com o ID do upload, o offset atual e o tamanho sugerido das partes (201).
+    """
+    data = request.get_json(silent=True) or request.form
+    try:
+        session = uploads.create_upload(current_user.id, data.get('filename', ''), int(data.get('size', 0)))
+    except ValueError:
+        abort(400)
+    return jsonify(id=session['id'], offset=session['offset'], chunk_size=session['chunk_size']), 201
+
+@bp.route("/uploads/<upload_id>", methods=['GET', 'PATCH'])
+@login_required
+def upload_chunk(upload_id):
+    """
+    Rota que consulta (GET) ou continua (PATCH) um upload em partes.
+
+    No PATCH, o cabeçalho 'Upload-Offset' deve ser igual ao offset atual; o corpo da
+    requisição é gravado em blocos diretamente no arquivo parcial. Se a conexão cair,
+    o cliente consulta o offset com GET e retoma a partir dele.
+
+    Args:
+        upload_id (str): ID do upload.
+
+    Returns:
+        Response: JSON com o offset atual e, ao terminar, o nome do arquivo; 409 se o offset não confere.
+    """
+    session = uploads.load_upload(upload_id, current_user.id)
+    if session is None:
+        abort(404)
+    if request.method == 'PATCH':
+        try:
+            session = uploads.append_chunk(session, int(request.headers.get('Upload-Offset', -1)), request.stream)
+        except ValueError:
+            return jsonify(offset=session['offset']), 409
+    return jsonify(offset=session['offset'], complete=session['filename'] is not None)
+
+@bp.route("/post/<int:post_id>/delete", methods=['POST'])
 @login_required
 def delete_post(post_id):
     """
@@ -166,70 +246,119 @@ def delete_post(post_id):
     if post.author != current_user:
         abort(403)
 
-    # Remove os likes associados ao post
+    # Remove os likes e comentários associados ao post; os contadores saem junto com o post
     Like.query.filter_by(post_id=post_id).delete()  # Remove todos os likes desse post
+    Comment.query.filter_by(post_id=post_id).delete()  # Remove todos os comentários desse post
+    timeline.remove_post(post_id)  # Remove o post das timelines
+    touch_users([current_user.id])
+
+    # Mídias do post, removidas do armazenamento se nenhum outro post usar o mesmo arquivo
+    files = [('post_pics', post.image_file), ('post_audios', post.audio_file), ('post_videos', post.video_file)]
 
     # Remove o post do banco de dados
     db.session.delete(post)
     db.session.commit()
+    media.delete_unreferenced_media(files)
     flash('Your post has been deleted!', 'success')
-    return redirect(url_for('home'))
+    return redirect(url_for('main.home'))
 
-@app.route('/send_message/<recipient>', methods=['GET', 'POST'])
+@bp.route('/send_message/<recipient>', methods=['GET', 'POST'])
 @login_required
 def send_message(recipient):
     """
-    Redireciona para a página de mensagens com o destinatário selecionado.
+    Redireciona para a conversa com o destinatário selecionado.
     """
     user = User.query.filter_by(username=recipient).first_or_404()
     if not current_user.is_friends_with(user):
         flash('You can only send messages to your friends.', 'danger')
-        return redirect(url_for('messages'))
+        return redirect(url_for('main.messages'))
 
-    # Redireciona para a página de mensagens com o destinatário pré-selecionado
-    return redirect(url_for('messages', selected_recipient=recipient))
+    # Redireciona para a conversa com o destinatário
+    return redirect(url_for('main.conversation', username=user.username))
 
 
-@app.route('/messages', methods=['GET', 'POST'])
+@bp.route('/messages', methods=['GET', 'POST'])
 @login_required
 def messages():
     """
-    Rota para visualizar mensagens enviadas e recebidas, e exibir amigos para iniciar novas conversas.
+    Rota da caixa de entrada: conversas ordenadas pela mensagem mais recente, e amigos para iniciar novas conversas.
     """
-    sent_messages = Message.query.filter_by(sender_id=current_user.id).all()
-    received_messages = Message.query.filter_by(recipient_id=current_user.id).all()
-    friends = current_user.friends.all()
-
-    # Para pré-selecionar o destinatário ao redirecionar de send_message/<recipient>
-    selected_recipient = request.args.get('selected_recipient', None)
-
+    form = MessageForm()
     if request.method == 'POST':
         recipient_username = request.form.get('recipient')
-        message_body = request.form.get('body')
+
+        if not form.validate_on_submit():
+            flash('Failed to send the message. Messages must have between 1 and 500 characters.', 'danger')
+            return redirect(url_for('main.messages', selected_recipient=recipient_username))
 
         recipient = User.query.filter_by(username=recipient_username).first()
 
         if recipient and current_user.is_friends_with(recipient):
-            # Criar a mensagem
-            new_message = Message(sender_id=current_user.id, recipient_id=recipient.id, body=message_body)
-            db.session.add(new_message)
+            # Cria a mensagem e atualiza a conversa
+            deliver_message(current_user, recipient, form.body.data)
+            notify(recipient.id, f'New message from {current_user.username}.')
             db.session.commit()
             flash('Message sent successfully!', 'success')
-        else:
-            flash('Failed to send the message. Invalid recipient.', 'danger')
+            return redirect(url_for('main.conversation', username=recipient.username))
+
+        flash('Failed to send the message. Invalid recipient.', 'danger')
+        return redirect(url_for('main.messages'))
 
-        return redirect(url_for('messages'))
+    # Busca uma página de conversas, já com o outro participante e a última mensagem
+    conversations, next_cursor = get_inbox_page(current_user, request.args.get('cursor'))
+    friends = current_user.friends.all()
+
+    # Para pré-selecionar o destinatário ao redirecionar de send_message/<recipient>
+    selected_recipient = request.args.get('selected_recipient', None)
 
     return render_template(
         'messages.html',
-        sent_messages=sent_messages,
-        received_messages=received_messages,
+        form=form,
+        conversations=conversations,
+        next_cursor=next_cursor,
         friends=friends,
         selected_recipient=selected_recipient
     )
 
-@app.route('/user/<username>')
+@bp.route('/messages/<username>', methods=['GET', 'POST'])
+@login_required
+def conversation(username):
+    """
+    Rota para visualizar uma conversa, paginada da mensagem mais recente para a mais antiga.
+
+    Args:
+        username (str): Nome de usuário do outro participante.
+
+    Returns:
+        str: Renderização do template 'conversation.html' com uma página de mensagens.
+    """
+    user = User.query.filter_by(username=username).first_or_404()
+
+    form = MessageForm()
+    if request.method == 'POST':
+        if not current_user.is_friends_with(user):
+            flash('You can only send messages to your friends.', 'danger')
+            return redirect(url_for('main.messages'))
+        if not form.validate_on_submit():
+            flash('Failed to send the message. Messages must have between 1 and 500 characters.', 'danger')
+            return redirect(url_for('main.conversation', username=user.username))
+        deliver_message(current_user, user, form.body.data)
+        notify(user.id, f'New message from {current_user.username}.')
+        db.session.commit()
+        return redirect(url_for('main.conversation', username=user.username))
+
+    thread = conversation_between(current_user.id, user.id)
+    thread_messages, next_cursor = [], None
+    if thread is not None:
+        thread_messages, next_cursor = get_thread_page(thread, request.args.get('cursor'))
+        mark_conversation_read(thread, current_user)
+
+    return render_template('conversation.html', form=form, user=user, messages=thread_messages, next_cursor=next_cursor)
+
+@bp.route('/user/<username>')
 @login_required
+@use_read_replica
+@conditional_page(profile_stamp)
 def user_profile(username):
     """
     Rota para visualizar o perfil de um usuário.
@@ -241,9 +370,11 @@ def user_profile(username):
         str: Renderização do template 'user_profile.html' com as informações do usuário.
     """
     user = User.query.filter_by(username=username).first_or_404()
-    return render_template('user_profile.html', user=user)
+    is_friend = user.id != current_user.id and current_user.is_friends_with(user)
+    mutual_friends = friend_graph.mutual_count(current_user.id, user.id) if user.id != current_user.id else 0
+    return render_template('user_profile.html', user=user, is_friend=is_friend, mutual_friends=mutual_friends)
 
-@app.route('/edit_profile', methods=['GET', 'POST'])
+@bp.route('/edit_profile', methods=['GET', 'POST'])
 @login_required
 def edit_profile():
     """
@@ -257,16 +388,17 @@ def edit_profile():
         # Atualiza os dados do perfil do usuário
         current_user.username = form.username.data
         current_user.about_me = form.about_me.data
+        touch_users([current_user.id])
         db.session.commit()
         flash('Your profile has been updated!', 'success')
-        return redirect(url_for('user_profile', username=current_user.username))
+        return redirect(url_for('main.user_profile', username=current_user.username))
     elif request.method == 'GET':
         # Preenche o formulário com os dados atuais do usuário
         form.username.data = current_user.username
         form.about_me.data = current_user.about_me
     return render_template('edit_profile.html', title='Edit Profile', form=form)
 
-@app.route('/send_friend_request', methods=['GET', 'POST'])
+@bp.route('/send_friend_request', methods=['GET', 'POST'])
 @login_required
 def send_friend_request():
     """
@@ -280,21 +412,27 @@ def send_friend_request():
         # Busca o destinatário pelo nome de usuário
         recipient = User.query.filter_by(username=form.username.data).first()
         if recipient:
-            if recipient.id == current_user.id:  # Adiciona a validação aqui
+            # Cria o pedido apenas se não houver amizade nem pedido pendente entre os dois
+            result = friendships.send_request(current_user, recipient)
+            if result == 'self':
                 flash('You cannot send a friend request to yourself.', 'danger')
-                return redirect(url_for('home'))
-            # Cria um novo pedido de amizade
-            friend_request = FriendRequest(sender_id=current_user.id, recipient_id=recipient.id)
-            db.session.add(friend_request)
-            db.session.commit()
-            flash('Friend request sent!', 'success')
+            elif result == 'friends':
+                flash(f'You are already friends with {recipient.username}.', 'info')
+            elif result == 'pending':
+                flash('Friend request already sent.', 'info')
+            elif result == 'incoming':
+                flash(f'{recipient.username} already sent you a friend request.', 'info')
+                return redirect(url_for('main.friend_requests'))
+            else:
+                flash('Friend request sent!', 'success')
         else:
             flash('User not found.', 'danger')
-        return redirect(url_for('home'))
+        return redirect(url_for('main.home'))
     return render_template('send_friend_request.html', title='Send Friend Request', form=form)
 
-@app.route('/friend_requests')
+@bp.route('/friend_requests')
 @login_required
+@conditional_page(friend_requests_stamp)
 def friend_requests():
     """
     Rota para visualizar pedidos de amizade recebidos.
@@ -306,7 +444,7 @@ def friend_requests():
     requests = FriendRequest.query.filter_by(recipient_id=current_user.id, status='pending').all()
     return render_template('friend_requests.html', requests=requests)
 
-@app.route('/accept_friend_request/<int:request_id>')
+@bp.route('/accept_friend_request/<int:request_id>')
 @login_required
 def accept_friend_request(request_id):
     """
@@ -322,19 +460,38 @@ def accept_friend_request(request_id):
     friend_request = FriendRequest.query.get_or_404(request_id)
     if friend_request.recipient_id != current_user.id:
         abort(403)
-    # Atualiza o status do pedido de amizade para 'accepted'
-    friend_request.status = 'accepted'
-    # Cria relações de amizade bidirecionais
-    friendship1 = Friendship(user_id=current_user.id, friend_id=friend_request.sender_id)
-    friendship2 = Friendship(user_id=friend_request.sender_id, friend_id=current_user.id)
-    db.session.add(friend_request)
-    db.session.add(friendship1)
-    db.session.add(friendship2)
-    db.session.commit()
+    # Aceita o pedido de forma idempotente, criando as amizades em uma única transação
+    friendships.accept_requests(current_user, [friend_request.id])
     flash('Friend request accepted!', 'success')
-    return redirect(url_for('friend_requests'))
+    return redirect(url_for('main.friend_requests'))
+
+@bp.route('/remove_friend/<username>', methods=['POST'])
+@login_required
+def remove_friend(username):
+    """
+    Rota para desfazer uma amizade.
+
+    Args:
+        username (str): Nome de usuário do amigo.
+
+    Returns:
+        str: Redirecionamento para o perfil do usuário.
+    """
+    user = User.query.filter_by(username=username).first_or_404()
+    # Remove as duas direções da amizade
+    Friendship.query.filter(
+        ((Friendship.user_id == current_user.id) & (Friendship.friend_id == user.id)) |
+        ((Friendship.user_id == user.id) & (Friendship.friend_id == current_user.id))
+    ).delete(synchronize_session=False)
+    # Remove das timelines os posts do ex-amigo
+    timeline.remove_friendship(current_user.id, user.id)
+    update_friend_graph('remove', current_user.id, user.id)
+    touch_users([current_user.id, user.id])
+    db.session.commit()
+    flash('Friend removed.', 'success')
+    return redirect(url_for('main.user_profile', username=user.username))
 
-@app.route('/reject_friend_request/<int:request_id>')
+@bp.route('/reject_friend_request/<int:request_id>')
 @login_required
 def reject_friend_request(request_id):
     """
@@ -351,16 +508,44 @@ def reject_friend_request(request_id):
     if friend_request.recipient_id != current_user.id:
         abort(403)
     # Atualiza o status do pedido de amizade para 'rejected'
-    friend_request.status = 'rejected'
-    db.session.add(friend_request)
-    db.session.commit()
+    friendships.reject_requests(current_user, [friend_request.id])
     flash('Friend request rejected.', 'success')
-    return redirect(url_for('friend_requests'))
+    return redirect(url_for('main.friend_requests'))
+
+@bp.route('/friend_requests/bulk', methods=['POST'])
+@login_required
+def bulk_friend_requests():
+    """
+    Rota para aceitar ou rejeitar vários pedidos de amizade de uma vez.
+
+    Returns:
+        str: Redirecionamento para a página de pedidos de amizade.
+    """
+    request_ids = request.form.getlist('request_ids', type=int)
+    action = request.form.get('action')
+    if not request_ids or action not in ('accept', 'reject'):
+        flash('Select at least one friend request.', 'danger')
+        return redirect(url_for('main.friend_requests'))
+    if action == 'accept':
+        accepted = friendships.accept_requests(current_user, request_ids)
+        flash(f'{len(accepted)} friend requests accepted!', 'success')
+    else:
+        rejected = friendships.reject_requests(current_user, request_ids)
+        flash(f'{rejected} friend requests rejected.', 'success')
+    return redirect(url_for('main.friend_requests'))
 
-@app.route('/like/<int:post_id>', methods=['POST'])
+@bp.route('/like/<int:post_id>', methods=['POST'])
 @login_required
 def like_post(post_id):
     post = Post.query.get_or_404(post_id)
+    if write_behind_enabled():
+        # O like entra na fila de escritas em lote; a resposta traz a contagem otimista
+        notification = None
+        if post.user_id != current_user.id:
+            notification = (post.user_id, f'{current_user.username} liked your post "{post.title}".')
+        liked, likes_count = write_queue.toggle_like(current_user.id, post, notification)
+        return jsonify({'liked': liked, 'likes_count': likes_count})
+
     # Verifica se o usuário já curtiu o post
     like = Like.query.filter_by(user_id=current_user.id, post_id=post_id).first()
     
@@ -368,48 +553,142 @@ def like_post(post_id):
         # Adiciona o like se o usuário não tiver curtido
         like = Like(user_id=current_user.id, post_id=post.id)
         db.session.add(like)
-        db.session.commit()
+        if post.user_id != current_user.id:
+            notify(post.user_id, f'{current_user.username} liked your post "{post.title}".')
+        delta = 1
         liked = True
     else:
         # Remove o like se o usuário já tiver curtido
         db.session.delete(like)
-        db.session.commit()
+        delta = -1
         liked = False
 
+    # Atualiza o contador na mesma transação, sem recontar os likes
+    Post.query.filter_by(id=post.id).update({Post.like_count: Post.like_count + delta}, synchronize_session=False)
+    # Contagem exibida aos amigos do autor e estado do like de quem curtiu
+    touch_users([post.user_id, current_user.id])
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Outra requisição do mesmo usuário já registrou o like (índice único em user_id, post_id)
+        db.session.rollback()
+        liked = True
+
     # Retorna JSON com o estado do like e a contagem atualizada
-    likes_count = Like.query.filter_by(post_id=post_id).count()  # Contagem de likes
+    likes_count = db.session.query(Post.like_count).filter_by(id=post.id).scalar()
+    # Um único evento no tópico do autor: chega aos clientes do autor e dos amigos, os únicos que veem o post
+    events.publish(events.author_topic(post.user_id), 'like', {'post_id': post.id, 'likes_count': likes_count})
     return jsonify({'liked': liked, 'likes_count': likes_count})
 
 
-@app.route('/comment/<int:post_id>', methods=['POST'])
+@bp.route('/comment/<int:post_id>', methods=['POST'])
 @login_required
 def comment_post(post_id):
     post = Post.query.get_or_404(post_id)
     comment_body = request.form.get('body')
     comment = Comment(body=comment_body, post_id=post.id, user_id=current_user.id)
     db.session.add(comment)
+    if post.user_id != current_user.id:
+        notify(post.user_id, f'{current_user.username} commented on your post "{post.title}".')
+    # Incrementa o contador de comentários na mesma transação
+    Post.query.filter_by(id=post.id).update({Post.comment_count: Post.comment_count + 1}, synchronize_session=False)
+    touch_users([post.user_id])
     db.session.commit()
     flash('Comment added!', 'success')
-    return redirect(url_for('home'))  # ou para a página do post
+    return redirect(url_for('main.home'))  # ou para a página do post
 
-@app.route('/friends')
+@bp.route('/friends')
 @login_required
+@use_read_replica
+@conditional_page(network_stamp)
 def friends():
-    friends = current_user.friends  # Certifique-se de que isso retorne uma lista de amigos
+    friends = current_user.friends.all()
     if not friends:  # Adicione verificação para amigos vazios
         flash('You have no friends yet.')  # Use um flash para informar o usuário
-    return render_template('friends.html', friends=friends)
 
-@app.route('/notifications')
+    # Sugestões de amigos de amigos, calculadas no índice em memória e carregadas em uma única consulta
+    ranked = friend_graph.suggestions(current_user.id, current_app.config['FRIEND_SUGGESTIONS'])
+    users = {user.id: user for user in User.query.filter(User.id.in_([user_id for user_id, _ in ranked]))} if ranked else {}
+    # O índice pode estar atrasado em relação a amizades feitas em outros processos
+    friend_ids = {friend.id for friend in friends}
+    suggestions = [(users[user_id], mutual) for user_id, mutual in ranked if user_id in users and user_id not in friend_ids]
+    return render_template('friends.html', friends=friends, suggestions=suggestions)
+
+@bp.route('/notifications')
 @login_required
 def notifications():
-    # Aqui você irá buscar as notificações do usuário
-    notifications_list = Notification.query.filter_by(user_id=current_user.id).all()  # Ajuste conforme seu modelo
-    return render_template('notifications.html', notifications=notifications_list)
+    # Busca uma página das notificações do usuário, das mais recentes para as mais antigas
+    notifications_list, next_cursor = get_notifications_page(current_user, request.args.get('cursor'))
+    return render_template('notifications.html', notifications=notifications_list, next_cursor=next_cursor)
+
+@bp.route('/notifications/mark_all_read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    # Marca todas as notificações como lidas em uma única instrução
+    mark_all_read(current_user)
+    return redirect(url_for('main.notifications'))
+
+@bp.route('/search')
+@login_required
+def search():
+    """
+    Rota de busca em posts, comentários e usuários, com resultados ordenados por relevância.
 
-@app.context_processor
+    Returns:
+        str: Renderização do template 'search.html' com os resultados da página.
+    """
+    terms = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'posts')
+    if kind not in ('posts', 'comments', 'users'):
+        kind = 'posts'
+    page = request.args.get('page', 1, type=int)
+    results, has_next = search_index.search(kind, terms, page) if terms else ([], False)
+    return render_template('search.html', title='Search', terms=terms, kind=kind, page=page,
+                           results=results, has_next=has_next)
+
+@bp.route('/search/usernames')
+@login_required
+def autocomplete_usernames():
+    """
+    Rota do autocompletar de nomes de usuário.
+
+    Returns:
+        Response: Lista JSON com os nomes de usuário que começam com o prefixo 'q'.
+    """
+    return jsonify(search_index.autocomplete_usernames(request.args.get('q', '')))
+
+@bp.route('/events')
+@login_required
+def event_stream():
+    """
+    Rota de eventos em tempo real (Server-Sent Events): mensagens, notificações e contagens de likes.
+
+    Returns:
+        Response: Fluxo 'text/event-stream' ou 204 se o limite de conexões do processo for atingido
+            (ou se os eventos estiverem desativados, ver events.connection_limit).
+    """
+    # O fluxo continua depois do fim do contexto da requisição: usa o próprio broker, não o proxy
+    broker = events.broker._get_current_object()
+    config = current_app.config
+    if broker.connection_count() >= events.connection_limit:
+        # 204 faz o EventSource parar de reconectar; a página continua funcionando sem push
+        return Response(status=204)
+
+    subscription = broker.subscribe(events.stream_topics(current_user.id))
+    # Libera a conexão do banco de dados antes de manter a resposta aberta
+    db.session.remove()
+    response = Response(events.stream(subscription, config['SSE_RETRY_MS'], config['SSE_HEARTBEAT']),
+                        mimetype='text/event-stream', headers={
+                            'Cache-Control': 'no-cache',
+                            'X-Accel-Buffering': 'no',  # Desativa o buffer do proxy (nginx)
+                        })
+    # Remove a assinatura quando o cliente desconectar
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
+
+@bp.app_context_processor
 def inject_notification_count():
     if current_user.is_authenticated:
-        notification_count = Notification.query.filter_by(user_id=current_user.id).count()
-        return dict(notification_count=notification_count)
+        # Contador desnormalizado, lido da própria linha do usuário (sem consulta extra)
+        return dict(notification_count=current_user.unread_notification_count)
     return dict(notification_count=0)
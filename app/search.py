@@ -0,0 +1,216 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from sqlalchemy import event, or_, text
+from sqlalchemy.orm import joinedload
+from flask import current_app
+from app import db
+from app.models import User, Post, Comment
+
+# Índices FTS5 de conteúdo externo: guardam apenas o índice invertido e leem o texto da tabela original.
+# Os triggers mantêm os índices sincronizados com qualquer escrita (ORM, SQL direto ou comandos em lote);
+# os triggers de UPDATE só disparam quando as colunas indexadas mudam (não nos contadores de likes).
+SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5("
+    "title, content, content='post', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS comment_fts USING fts5("
+    "body, content='comment', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    # Nomes de usuário são um único token (inclusive '_' e '.') com índices de prefixo para a busca por início de palavra
+    "CREATE VIRTUAL TABLE IF NOT EXISTS user_fts USING fts5("
+    "username, about_me, content='user', content_rowid='id', "
+    "tokenize=\"unicode61 remove_diacritics 2 tokenchars '_.'\", prefix='1 2 3')",
+
+    "CREATE TRIGGER IF NOT EXISTS post_fts_insert AFTER INSERT ON post BEGIN "
+    "INSERT INTO post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_delete AFTER DELETE ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS post_fts_update AFTER UPDATE OF title, content ON post BEGIN "
+    "INSERT INTO post_fts(post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+
+    "CREATE TRIGGER IF NOT EXISTS comment_fts_insert AFTER INSERT ON comment BEGIN "
+    "INSERT INTO comment_fts(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS comment_fts_delete AFTER DELETE ON comment BEGIN "
+    "INSERT INTO comment_fts(comment_fts, rowid, body) VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS comment_fts_update AFTER UPDATE OF body ON comment BEGIN "
+    "INSERT INTO comment_fts(comment_fts, rowid, body) VALUES ('delete', old.id, old.body); "
+    "INSERT INTO comment_fts(rowid, body) VALUES (new.id, new.body); END",
+
+    "CREATE TRIGGER IF NOT EXISTS user_fts_insert AFTER INSERT ON \"user\" BEGIN "
+    "INSERT INTO user_fts(rowid, username, about_me) VALUES (new.id, new.username, new.about_me); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_delete AFTER DELETE ON \"user\" BEGIN "
+    "INSERT INTO user_fts(user_fts, rowid, username, about_me) VALUES ('delete', old.id, old.username, old.about_me); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_update AFTER UPDATE OF username, about_me ON \"user\" BEGIN "
+    "INSERT INTO user_fts(user_fts, rowid, username, about_me) VALUES ('delete', old.id, old.username, old.about_me); "
+    "INSERT INTO user_fts(rowid, username, about_me) VALUES (new.id, new.username, new.about_me); END",
+)
+
+SEARCH_TABLES = ('post_fts', 'comment_fts', 'user_fts')
+
+# Pesos do bm25 por coluna: o título pesa mais que o corpo do post, e o nome de usuário mais que a descrição
+POST_RANK = 'bm25(post_fts, 10.0, 1.0)'
+COMMENT_RANK = 'bm25(comment_fts)'
+USER_RANK = 'bm25(user_fts, 10.0, 1.0)'
+
+
+def search_enabled():
+    """
+    Verifica se o banco de dados suporta os índices FTS5.
+
+    Returns:
+        bool: True se o banco for SQLite.
+    """
+    return db.session.get_bind().dialect.name == 'sqlite'
+
+
+def create_search_schema(connection):
+    """
+    Cria (se ainda não existirem) as tabelas FTS5 e os triggers de sincronização.
+
+    Args:
+        connection (Connection): Conexão com o banco SQLite.
+    """
+    for statement in SEARCH_SCHEMA:
+        connection.execute(text(statement))
+
+
+@event.listens_for(db.Model.metadata, 'after_create')
+def _create_search_schema(target, connection, **kw):
+    # Bancos criados com db.create_all() também ganham os índices de busca (exceto binds sem as tabelas, como a réplica)
+    if connection.dialect.name == 'sqlite' and all(
+        connection.dialect.has_table(connection, table) for table in ('post', 'comment', 'user')
+    ):
+        create_search_schema(connection)
+
+
+@event.listens_for(db.Model.metadata, 'before_drop')
+def _drop_search_schema(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for table in SEARCH_TABLES:
+            connection.execute(text(f'DROP TABLE IF EXISTS {table}'))
+
+
+def match_expression(terms, prefix=False):
+    """
+    Converte o texto digitado pelo usuário em uma expressão MATCH segura.
+
+    Cada palavra vira uma frase entre aspas (a sintaxe do FTS5 não é exposta) e todas são obrigatórias.
+
+    Args:
+        terms (str): Texto da busca.
+        prefix (bool): Se True, a última palavra é buscada como prefixo.
+
+    Returns:
+        str: Expressão MATCH ou None se não houver palavras.
+    """
+    words = [word.replace('"', '') for word in terms.split()]
+    words = [f'"{word}"' for word in words if word]
+    if not words:
+        return None
+    if prefix:
+        words[-1] += '*'
+    return ' '.join(words)
+
+
+def _ranked_ids(table, rank, expression, offset, limit):
+    # Os IDs saem do índice já ordenados pela relevância (bm25)
+    rows = db.session.execute(
+        text(f'SELECT rowid FROM {table} WHERE {table} MATCH :expression ORDER BY {rank} LIMIT :limit OFFSET :offset'),
+        {'expression': expression, 'limit': limit, 'offset': offset}
+    )
+    return [row_id for (row_id,) in rows]
+
+
+def _in_order(query, model, ids):
+    # Carrega os objetos em uma única consulta e restaura a ordem de relevância
+    objects = {obj.id: obj for obj in query.filter(model.id.in_(ids))} if ids else {}
+    return [objects[obj_id] for obj_id in ids if obj_id in objects]
+
+
+def search(kind, terms, page=1):
+    """
+    Busca posts, comentários ou usuários, ordenados por relevância.
+
+    Args:
+        kind (str): 'posts', 'comments' ou 'users'.
+        terms (str): Texto da busca.
+        page (int): Número da página (a partir de 1, limitado a SEARCH_MAX_PAGES).
+
+    Returns:
+        tuple: Lista de resultados da página e se existe uma próxima página.
+    """
+    page_size = current_app.config['SEARCH_PAGE_SIZE']
+    page = max(1, min(page, current_app.config['SEARCH_MAX_PAGES']))
+    offset = (page - 1) * page_size
+    # Usuários são buscados pelo início das palavras (ex.: 'fel' encontra 'felipe')
+    expression = match_expression(terms, prefix=(kind == 'users'))
+    if expression is None:
+        return [], False
+
+    if kind == 'users':
+        model, query = User, User.query
+        table, rank, columns = 'user_fts', USER_RANK, (User.username, User.about_me)
+    elif kind == 'comments':
+        model, query = Comment, Comment.query.options(joinedload(Comment.user), joinedload(Comment.post))
+        table, rank, columns = 'comment_fts', COMMENT_RANK, (Comment.body,)
+    else:
+        model, query = Post, Post.query.options(joinedload(Post.author))
+        table, rank, columns = 'post_fts', POST_RANK, (Post.title, Post.content)
+
+    if search_enabled():
+        ids = _ranked_ids(table, rank, expression, offset, page_size + 1)
+        results = _in_order(query, model, ids[:page_size])
+    else:
+        # Outros bancos: busca simples por substring, dos mais recentes para os mais antigos
+        words = terms.split()
+        fallback = db.session.query(model.id).filter(*[or_(*[column.ilike(f'%{word}%') for column in columns]) for word in words])
+        ids = [obj_id for (obj_id,) in fallback.order_by(model.id.desc()).offset(offset).limit(page_size + 1)]
+        results = _in_order(query, model, ids[:page_size])
+    has_next = len(ids) > page_size and page < current_app.config['SEARCH_MAX_PAGES']
+    return results, has_next
+
+
+def autocomplete_usernames(prefix, limit=None):
+    """
+    Sugere nomes de usuário que começam com o prefixo informado (diferencia maiúsculas de minúsculas).
+
+    A busca é uma varredura por faixa no índice único de username: O(log n + limit),
+    independentemente da quantidade de usuários, e em ordem alfabética.
+
+    Args:
+        prefix (str): Início do nome de usuário.
+        limit (int): Quantidade máxima de sugestões (padrão: SEARCH_AUTOCOMPLETE_LIMIT).
+
+    Returns:
+        list: Nomes de usuário encontrados.
+    """
+    limit = limit or current_app.config['SEARCH_AUTOCOMPLETE_LIMIT']
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    rows = db.session.query(User.username).filter(
+        User.username >= prefix,
+        User.username < prefix + '\U0010ffff'
+    ).order_by(User.username).limit(limit)
+    return [username for (username,) in rows]
+
+
+def rebuild_search_index():
+    """
+    Recria os índices de busca a partir das tabelas originais.
+
+    Usa o comando 'rebuild' do FTS5, que lê cada tabela em uma única varredura, e
+    depois 'optimize', que funde os segmentos do índice para acelerar as consultas.
+    Também recria os triggers caso tenham sido perdidos (ex.: migração que recriou a tabela).
+
+    Returns:
+        list: Tabelas FTS5 reconstruídas.
+    """
+    connection = db.session.connection()
+    create_search_schema(connection)
+    for table in SEARCH_TABLES:
+        connection.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+        connection.execute(text(f"INSERT INTO {table}({table}) VALUES ('optimize')"))
+    db.session.commit()
+    return list(SEARCH_TABLES)
@@ -0,0 +1,129 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import mimetypes
+import os
+from flask import Blueprint, abort, current_app, redirect, send_file, url_for, Response
+from app.storage import storage, media_key
+
+# Pastas de mídia enviadas pelos usuários; os nomes dos arquivos derivam do conteúdo (hash) e nunca mudam
+MEDIA_FOLDERS = ('post_pics', 'post_audios', 'post_videos')
+
+# Pastas cujos originais não são entregues: só as variantes ('a1b2c3_feed.webp'), geradas sem metadados (EXIF, GPS)
+PRIVATE_ORIGINALS = ('post_pics',)
+
+bp = Blueprint('media', __name__)
+
+
+@bp.app_template_global()
+def media_url(folder, filename):
+    """
+    Retorna a URL de um arquivo de mídia.
+
+    Com MEDIA_BASE_URL configurada (ex.: um CDN), a URL aponta para ela.
+
+    Args:
+        folder (str): Pasta da mídia (ex.: 'post_videos').
+        filename (str): Nome do arquivo.
+
+    Returns:
+        str: URL do arquivo.
+    """
+    base_url = current_app.config['MEDIA_BASE_URL']
+    if base_url:
+        return f"{base_url.rstrip('/')}/{folder}/{filename}"
+    return url_for('media.serve_media', folder=folder, filename=filename)
+
+
+@bp.app_template_global()
+def media_mimetype(filename):
+    """
+    Retorna o tipo MIME de um arquivo de mídia pela extensão.
+
+    Args:
+        filename (str): Nome do arquivo.
+
+    Returns:
+        str: Tipo MIME (ex.: 'video/x-msvideo' para AVI).
+    """
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+def set_immutable_cache(response):
+    """
+    Marca a resposta como armazenável por navegadores e CDNs por MEDIA_MAX_AGE segundos, sem revalidação.
+
+    Args:
+        response (Response): Resposta de um arquivo de mídia.
+
+    Returns:
+        Response: A mesma resposta.
+    """
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['MEDIA_MAX_AGE']
+    response.cache_control.immutable = True
+    return response
+
+
+def accel_redirect_response(filename, path):
+    """
+    Delega o envio do arquivo ao servidor de front-end (nginx) via X-Accel-Redirect.
+
+    Args:
+        filename (str): Nome do arquivo.
+        path (str): Caminho do arquivo no disco.
+
+    Returns:
+        Response: Resposta vazia com o cabeçalho X-Accel-Redirect.
+    """
+    response = Response(mimetype=media_mimetype(filename))
+    # Caminho relativo a MEDIA_ROOT, incluindo as subpastas do armazenamento local
+    relative = os.path.relpath(path, storage.root).replace(os.sep, '/')
+    response.headers['X-Accel-Redirect'] = f"{current_app.config['MEDIA_ACCEL_REDIRECT'].rstrip('/')}/{relative}"
+    # O nginx atende Range e requisições condicionais com base no arquivo
+    response.last_modified = os.path.getmtime(path)
+    return response
+
+
+@bp.route('/media/<folder>/<filename>')
+def serve_media(folder, filename):
+    """
+    Rota de entrega das mídias dos posts.
+
+    O arquivo é transmitido em blocos, sem ser carregado na memória, com suporte a
+    requisições parciais (Range, usadas para avançar vídeos e áudios) e condicionais
+    (ETag/If-None-Match e Last-Modified/If-Modified-Since, respondidas com 304).
+    A entrega pode ser delegada ao servidor de front-end com MEDIA_ACCEL_REDIRECT (nginx)
+    ou MEDIA_X_SENDFILE (Apache/lighttpd). Em armazenamentos remotos (S3), a rota
+    redireciona para uma URL assinada do arquivo. Das imagens só as variantes são entregues:
+    o original mantém os metadados (EXIF, GPS) enviados pelo usuário.
+
+    Args:
+        folder (str): Pasta da mídia.
+        filename (str): Nome do arquivo.
+
+    Returns:
+        Response: Arquivo (200/206), 304, redirecionamento ou resposta delegada ao front-end.
+    """
+    if folder not in MEDIA_FOLDERS or filename.startswith('.'):
+        abort(404)
+    if folder in PRIVATE_ORIGINALS and '_' not in filename:
+        # Imagem original enviada pelo usuário, com a localização e os dados da câmera
+        abort(404)
+    key = media_key(folder, filename)
+    path = storage.local_path(key)
+    if path is None:
+        # O serviço de armazenamento atende Range e requisições condicionais
+        return redirect(storage.url(key))
+    if not os.path.isfile(path):
+        abort(404)
+
+    if current_app.config['MEDIA_ACCEL_REDIRECT']:
+        response = accel_redirect_response(filename, path)
+    else:
+        # Com USE_X_SENDFILE (MEDIA_X_SENDFILE) o Flask apenas envia o cabeçalho X-Sendfile
+        # etag=True explícito: sem ele o send_file do Flask 2.0 não gera o ETag
+        response = send_file(path, conditional=True, etag=True, max_age=current_app.config['MEDIA_MAX_AGE'])
+        response.headers.setdefault('Accept-Ranges', 'bytes')
+    return set_immutable_cache(response)
@@ -0,0 +1,143 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func, or_
+from werkzeug.http import is_resource_modified
+from app import db, app_extension
+from app.models import User, Post, Friendship, FriendRequest
+
+# Versão dos templates: um deploy que altera as páginas muda todos os ETags
+page_version = app_extension('page_version', lambda app: hashlib.blake2b(''.join(
+    app.jinja_env.loader.get_source(app.jinja_env, name)[0] for name in sorted(app.jinja_env.list_templates())
+).encode(), digest_size=8).hexdigest())
+
+
+def touch_users(user_ids):
+    """
+    Registra uma alteração que afeta as páginas dos usuários (User.changed_at).
+
+    A atualização entra na transação atual; o commit fica a cargo de quem chama.
+
+    Args:
+        user_ids (iterable): IDs dos usuários afetados.
+    """
+    # Ordem fixa dos IDs para que transações simultâneas bloqueiem as linhas na mesma ordem
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        User.query.filter(User.id.in_(user_ids)).update({User.changed_at: datetime.utcnow()}, synchronize_session=False)
+
+
+def touch_post_author(post_id):
+    """
+    Registra uma alteração em um post (ex.: conversão de mídia concluída) no carimbo do autor.
+
+    Args:
+        post_id (int): ID do post.
+    """
+    author_id = db.session.query(Post.user_id).filter(Post.id == post_id).as_scalar()
+    User.query.filter(User.id == author_id).update({User.changed_at: datetime.utcnow()}, synchronize_session=False)
+
+
+def network_stamp():
+    """
+    Última alteração do usuário logado ou de um dos seus amigos (feed e página de amigos).
+
+    Cobre posts, comentários e likes recebidos, conversões de mídia, amizades e nomes de usuário.
+    Os nomes dos autores dos comentários que não são amigos ficam de fora: como nos cartões em cache
+    (app.fragments.fragment_key), a troca de nome aparece na próxima alteração da página.
+
+    Returns:
+        tuple: Partes adicionais do ETag (nenhuma) e a data da última alteração.
+    """
+    friend_ids = db.session.query(Friendship.friend_id).filter(Friendship.user_id == current_user.id)
+    changed_at = db.session.query(func.max(User.changed_at)).filter(
+        or_(User.id == current_user.id, User.id.in_(friend_ids))
+    ).scalar()
+    return (), changed_at
+
+
+def profile_stamp(username):
+    """
+    Carimbo do perfil visitado (dados, amizades e amigos em comum com o usuário logado).
+
+    Args:
+        username (str): Nome do usuário do perfil.
+
+    Returns:
+        tuple: Partes adicionais do ETag e a data da última alteração, ou None se o usuário não existir.
+    """
+    user = db.session.query(User.id, User.changed_at).filter(User.username == username).first()
+    if user is None:
+        return None
+    return (user.id,), user.changed_at
+
+
+def friend_requests_stamp():
+    """
+    Última alteração entre os remetentes dos pedidos de amizade pendentes do usuário logado.
+
+    Pedidos novos e respondidos alteram o carimbo do próprio usuário (incluído em todo ETag).
+
+    Returns:
+        tuple: Partes adicionais do ETag (nenhuma) e a data da última alteração.
+    """
+    changed_at = db.session.query(func.max(User.changed_at)).join(
+        FriendRequest, FriendRequest.sender_id == User.id
+    ).filter(FriendRequest.recipient_id == current_user.id, FriendRequest.status == 'pending').scalar()
+    return (), changed_at
+
+
+def conditional_page(stamp):
+    """
+    Decorator que responde 304 (Not Modified) quando a página não mudou desde a última visita.
+
+    A função stamp recebe os argumentos da view e retorna as partes do ETag e a data da última
+    alteração da página, lidas dos carimbos (User.changed_at) em uma única consulta. O ETag também
+    inclui a URL, o usuário logado e o seu carimbo (notificações, nome e amizades) e a versão dos
+    templates. Quando ele coincide com If-None-Match (ou, sem ETag, If-Modified-Since não é anterior
+    à última alteração), a view não é executada. Páginas com mensagens flash pendentes são
+    renderizadas sem validadores, já que as mensagens só aparecem uma vez.
+
+    Args:
+        stamp (function): Função que calcula os carimbos da página (None: a view decide, ex.: 404).
+
+    Returns:
+        function: Decorator da view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated(*args, **kwargs):
+            if not current_app.config['CONDITIONAL_PAGES'] or session.get('_flashes'):
+                return view(*args, **kwargs)
+            validators = stamp(*args, **kwargs)
+            if validators is None:
+                return view(*args, **kwargs)
+            parts, changed_at = validators
+            changed_at = max(filter(None, (changed_at, current_user.changed_at)), default=None)
+            etag = hashlib.blake2b(repr((
+                page_version._get_current_object(), request.full_path, current_user.id, current_user.changed_at,
+                current_user.unread_notification_count, parts, changed_at
+            )).encode(), digest_size=16).hexdigest()
+
+            if is_resource_modified(request.environ, etag=etag, last_modified=changed_at):
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            else:
+                response = current_app.response_class(status=304)
+            response.set_etag(etag, weak=True)
+            if changed_at is not None:
+                response.last_modified = changed_at
+            # Só o navegador guarda a página, e sempre a revalida; outro usuário no mesmo navegador não a reaproveita
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response
+        return decorated
+    return decorator
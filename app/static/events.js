@@ -0,0 +1,48 @@
+/* Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde) */
+
+/* Eventos em tempo real (Server-Sent Events): notificações, mensagens e contagens de likes */
+(function () {
+    if (!('EventSource' in window)) {
+        return; /* Sem suporte: a página continua funcionando com recarregamentos */
+    }
+
+    var source = new EventSource('/events');
+
+    /* Incrementa o contador de notificações da barra de navegação */
+    source.addEventListener('notification', function () {
+        var badge = document.querySelector('.notification-count');
+        if (badge) {
+            var count = parseInt(badge.textContent, 10) || 0;
+            badge.textContent = count + 1;
+        }
+    });
+
+    /* Acrescenta a mensagem se a conversa com o remetente estiver aberta */
+    source.addEventListener('message', function (event) {
+        var data = JSON.parse(event.data);
+        var thread = document.querySelector('[data-conversation-with="' + data.sender + '"]');
+        if (!thread) {
+            return;
+        }
+        var item = document.createElement('div');
+        var sender = document.createElement('strong');
+        var body = document.createElement('p');
+        var time = document.createElement('small');
+        sender.textContent = data.sender + ':';
+        body.textContent = data.body;
+        time.textContent = data.timestamp;
+        item.appendChild(sender);
+        item.appendChild(body);
+        item.appendChild(time);
+        thread.appendChild(item);
+    });
+
+    /* Atualiza a contagem de likes dos posts exibidos na página */
+    source.addEventListener('like', function (event) {
+        var data = JSON.parse(event.data);
+        var counter = document.getElementById('like-count-' + data.post_id);
+        if (counter) {
+            counter.textContent = data.likes_count;
+        }
+    });
+})();
@@ -0,0 +1,56 @@
+/* Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde) */
+
+/* Rolagem infinita do feed: carrega a próxima página quando o link "Older posts" aparece na tela */
+(function () {
+    var feed = document.getElementById('feed');
+    if (!feed || !('IntersectionObserver' in window)) {
+        return; /* Sem suporte: o link continua funcionando como paginação normal */
+    }
+
+    var loading = false;
+
+    var observer = new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+            if (entry.isIntersecting) {
+                loadNextPage(entry.target);
+            }
+        });
+    }, { rootMargin: '400px' });
+
+    function loadNextPage(link) {
+        if (loading) {
+            return;
+        }
+        loading = true;
+        observer.unobserve(link);
+
+        fetch(link.dataset.partialUrl, { credentials: 'same-origin' })
+            .then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.text();
+            })
+            .then(function (html) {
+                /* Substitui o link pelos posts da próxima página (que trazem um novo link, se houver) */
+                link.insertAdjacentHTML('beforebegin', html);
+                link.remove();
+                observeMoreLink();
+            })
+            .catch(function () {
+                observer.observe(link); /* Tenta novamente na próxima vez que o link aparecer */
+            })
+            .finally(function () {
+                loading = false;
+            });
+    }
+
+    function observeMoreLink() {
+        var link = feed.querySelector('.feed-more');
+        if (link) {
+            observer.observe(link);
+        }
+    }
+
+    observeMoreLink();
+})();
@@ -0,0 +1,43 @@
+/* Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde) */
+
+/* Autocompletar de nomes de usuário nos campos com o atributo data-autocomplete-url */
+(function () {
+    var inputs = document.querySelectorAll('input[data-autocomplete-url]');
+
+    Array.prototype.forEach.call(inputs, function (input, index) {
+        var list = document.createElement('datalist');
+        var timer = null;
+        var lastPrefix = null;
+
+        list.id = 'autocomplete-' + index;
+        input.setAttribute('list', list.id);
+        input.insertAdjacentElement('afterend', list);
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            /* Aguarda uma pausa na digitação para não consultar o servidor a cada tecla */
+            timer = setTimeout(function () {
+                var prefix = input.value.trim();
+                if (!prefix || prefix === lastPrefix) {
+                    return;
+                }
+                lastPrefix = prefix;
+                fetch(input.dataset.autocompleteUrl + '?q=' + encodeURIComponent(prefix), { credentials: 'same-origin' })
+                    .then(function (response) {
+                        return response.ok ? response.json() : [];
+                    })
+                    .then(function (usernames) {
+                        list.innerHTML = '';
+                        usernames.forEach(function (username) {
+                            var option = document.createElement('option');
+                            option.value = username;
+                            list.appendChild(option);
+                        });
+                    })
+                    .catch(function () {
+                        lastPrefix = null;
+                    });
+            }, 150);
+        });
+    });
+})();
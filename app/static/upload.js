@@ -0,0 +1,107 @@
+/* Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde) */
+
+/* Upload em partes (retomável) dos arquivos nos campos com o atributo data-upload-url */
+(function () {
+    var inputs = document.querySelectorAll('input[type=file][data-upload-url]');
+    var MAX_RETRIES = 5;
+
+    function sendChunk(url, file, offset, chunkSize) {
+        return fetch(url, {
+            method: 'PATCH',
+            credentials: 'same-origin',
+            headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/octet-stream' },
+            body: file.slice(offset, offset + chunkSize)
+        }).then(function (response) {
+            /* 409: o servidor tem outro offset (parte já recebida); a resposta informa de onde continuar */
+            if (response.ok || response.status === 409) {
+                return response.json();
+            }
+            throw new Error('Upload failed with status ' + response.status);
+        });
+    }
+
+    function currentOffset(url) {
+        return fetch(url, { credentials: 'same-origin' }).then(function (response) {
+            if (!response.ok) {
+                throw new Error('Upload not found');
+            }
+            return response.json();
+        });
+    }
+
+    function upload(input, file, progress) {
+        return fetch(input.dataset.uploadUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+        }).then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.status === 413 ? 'File is too large.' : 'File not accepted.');
+            }
+            return response.json();
+        }).then(function (session) {
+            var url = input.dataset.uploadUrl + '/' + session.id;
+            var retries = 0;
+
+            function next(state) {
+                progress.value = state.offset / file.size;
+                if (state.offset >= file.size) {
+                    return session.id;
+                }
+                return sendChunk(url, file, state.offset, session.chunk_size)
+                    .then(function (result) {
+                        retries = 0;
+                        return next(result);
+                    })
+                    .catch(function (error) {
+                        /* Conexão perdida: espera, consulta o offset recebido pelo servidor e retoma */
+                        if (++retries > MAX_RETRIES) {
+                            throw error;
+                        }
+                        return new Promise(function (resolve) {
+                            setTimeout(resolve, 1000 * retries);
+                        }).then(function () {
+                            return currentOffset(url);
+                        }).then(next);
+                    });
+            }
+
+            return next(session);
+        });
+    }
+
+    Array.prototype.forEach.call(inputs, function (input) {
+        var form = input.form;
+        var hidden = form.querySelector('input[name="' + input.dataset.uploadField + '"]');
+        var submit = form.querySelector('[type=submit]');
+        var progress = document.createElement('progress');
+
+        progress.hidden = true;
+        input.insertAdjacentElement('afterend', progress);
+
+        input.addEventListener('change', function () {
+            var file = input.files[0];
+            hidden.value = '';
+            if (!file) {
+                return;
+            }
+            progress.hidden = false;
+            progress.value = 0;
+            submit.disabled = true;
+            upload(input, file, progress)
+                .then(function (uploadId) {
+                    hidden.value = uploadId;
+                    /* O arquivo já está no servidor: não é enviado de novo com o formulário */
+                    input.value = '';
+                })
+                .catch(function (error) {
+                    progress.hidden = true;
+                    alert(error.message);
+                })
+                .then(function () {
+                    submit.disabled = false;
+                });
+        });
+    });
+})();
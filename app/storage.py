@@ -0,0 +1,297 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import mimetypes
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from werkzeug.utils import import_string
+from app import app_extension
+
+# Tamanho dos blocos lidos ao transmitir um arquivo
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def media_key(folder, filename):
+    """
+    Monta a chave de um arquivo de mídia no armazenamento.
+
+    Args:
+        folder (str): Pasta da mídia (ex.: 'post_videos').
+        filename (str): Nome do arquivo.
+
+    Returns:
+        str: Chave do arquivo (ex.: 'post_videos/a1b2c3.mp4').
+    """
+    return f'{folder}/{filename}'
+
+
+class LocalStorage:
+    """
+    Armazenamento em disco local (ou volume compartilhado), endereçado pelo conteúdo.
+
+    Os nomes dos arquivos começam pelo hash do conteúdo, usado para distribuí-los em
+    subpastas ('post_videos/a1/b2/a1b2c3....mp4') e evitar diretórios com milhões de entradas.
+    Variantes ('a1b2c3..._web.mp4') ficam na mesma subpasta do original.
+
+    Outras implementações (ex.: S3Storage) podem ser usadas via MEDIA_STORAGE,
+    desde que ofereçam os mesmos métodos.
+
+    Métodos:
+        put(key, path): Armazena um arquivo local (o arquivo de origem é consumido); se o conteúdo já
+            existe, renova a sua data de modificação.
+        get(key, path): Copia um arquivo armazenado para um caminho local.
+        stream(key): Lê um arquivo armazenado em blocos.
+        delete(key): Remove um arquivo armazenado.
+        exists(key): Verifica se um arquivo está armazenado.
+        modified(key): Data da última gravação (timestamp), ou None se o arquivo não existe.
+        keys(folder): Lista as chaves armazenadas em uma pasta.
+        local_path(key): Caminho do arquivo no disco (None em armazenamentos remotos).
+        url(key): URL direta do arquivo (None quando servido pela rota /media).
+    """
+
+    def __init__(self, app):
+        """
+        Inicializa o armazenamento na pasta MEDIA_ROOT.
+
+        Args:
+            app (Flask): Aplicação Flask.
+        """
+        self.root = app.config['MEDIA_ROOT']
+
+    def path_for(self, key):
+        """
+        Retorna o caminho no disco de uma chave, com as subpastas derivadas do nome do arquivo.
+
+        Args:
+            key (str): Chave do arquivo.
+
+        Returns:
+            str: Caminho do arquivo.
+        """
+        folder, filename = key.split('/', 1)
+        return os.path.join(self.root, folder, filename[:2], filename[2:4], filename)
+
+    def put(self, key, path):
+        # O conteúdo define o nome: se a chave já existe, o arquivo é o mesmo e a cópia é descartada
+        target = self.path_for(key)
+        if os.path.abspath(path) == os.path.abspath(target):
+            return
+        try:
+            # Renova a data do arquivo reaproveitado: delete_unreferenced_media preserva arquivos recentes,
+            # que podem pertencer a um post ainda não gravado
+            os.utime(target)
+            os.remove(path)
+            return
+        except FileNotFoundError:
+            pass
+        folder = os.path.dirname(target)
+        os.makedirs(folder, exist_ok=True)
+        # Move para um nome temporário único e renomeia: o arquivo nunca é visível incompleto,
+        # e gravações simultâneas do mesmo conteúdo não compartilham o arquivo temporário
+        handle, temporary = tempfile.mkstemp(dir=folder, prefix='.', suffix='.tmp')
+        os.close(handle)
+        try:
+            shutil.move(path, temporary)
+            os.replace(temporary, target)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def get(self, key, path):
+        shutil.copyfile(self.path_for(key), path)
+
+    def stream(self, key, chunk_size=STREAM_CHUNK_SIZE):
+        with open(self.path_for(key), 'rb') as source:
+            for block in iter(lambda: source.read(chunk_size), b''):
+                yield block
+
+    def delete(self, key):
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key):
+        return os.path.isfile(self.path_for(key))
+
+    def modified(self, key):
+        try:
+            return os.path.getmtime(self.path_for(key))
+        except FileNotFoundError:
+            return None
+
+    def keys(self, folder):
+        for directory, _, filenames in os.walk(os.path.join(self.root, folder)):
+            for filename in filenames:
+                # Arquivos temporários de gravações em andamento começam com '.'
+                if not filename.startswith('.'):
+                    yield media_key(folder, filename)
+
+    def local_path(self, key):
+        return self.path_for(key)
+
+    def url(self, key):
+        return None
+
+
+class S3Storage:
+    """
+    Armazenamento em um bucket S3 ou compatível (MinIO, Ceph, R2...), via boto3.
+
+    As chaves são gravadas sem subpastas (o S3 não tem limite de objetos por prefixo),
+    com Content-Type e Cache-Control de arquivo imutável. A rota /media redireciona
+    para uma URL assinada; com MEDIA_BASE_URL as páginas apontam direto para o bucket ou CDN.
+
+    Métodos:
+        Os mesmos de LocalStorage.
+    """
+
+    def __init__(self, app):
+        """
+        Cria o cliente S3 a partir das configurações S3_*.
+
+        As credenciais seguem a configuração padrão do boto3 (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, perfis, IAM).
+
+        Args:
+            app (Flask): Aplicação Flask.
+
+        Raises:
+            RuntimeError: Se o boto3 não estiver instalado.
+        """
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError('S3Storage requires boto3 (pip install boto3).')
+        self.client = boto3.client('s3', endpoint_url=app.config['S3_ENDPOINT_URL'] or None,
+                                   region_name=app.config['S3_REGION'] or None)
+        self.client_error = ClientError
+        self.bucket = app.config['S3_BUCKET']
+        self.prefix = app.config['S3_PREFIX']
+        self.cache_control = f"public, max-age={app.config['MEDIA_MAX_AGE']}, immutable"
+        self.url_expires = app.config['S3_URL_EXPIRES']
+
+    def object_key(self, key):
+        return self.prefix + key
+
+    def object_args(self, key):
+        return {'ContentType': mimetypes.guess_type(key)[0] or 'application/octet-stream', 'CacheControl': self.cache_control}
+
+    def missing(self, error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def put(self, key, path):
+        try:
+            try:
+                # Copia o objeto sobre ele mesmo para renovar a data (LastModified) do conteúdo reaproveitado
+                self.client.copy_object(Bucket=self.bucket, Key=self.object_key(key), MetadataDirective='REPLACE',
+                                        CopySource={'Bucket': self.bucket, 'Key': self.object_key(key)},
+                                        **self.object_args(key))
+            except self.client_error as error:
+                if not self.missing(error):
+                    raise
+                self.client.upload_file(path, self.bucket, self.object_key(key), ExtraArgs=self.object_args(key))
+        finally:
+            os.remove(path)
+
+    def get(self, key, path):
+        self.client.download_file(self.bucket, self.object_key(key), path)
+
+    def stream(self, key, chunk_size=STREAM_CHUNK_SIZE):
+        body = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))['Body']
+        try:
+            for block in body.iter_chunks(chunk_size):
+                yield block
+        finally:
+            body.close()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def exists(self, key):
+        return self.modified(key) is not None
+
+    def modified(self, key):
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except self.client_error as error:
+            if self.missing(error):
+                return None
+            raise
+        return response['LastModified'].timestamp()
+
+    def keys(self, folder):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.object_key(media_key(folder, ''))):
+            for item in page.get('Contents', ()):
+                yield item['Key'][len(self.prefix):]
+
+    def local_path(self, key):
+        return None
+
+    def url(self, key):
+        return self.client.generate_presigned_url('get_object', ExpiresIn=self.url_expires,
+                                                  Params={'Bucket': self.bucket, 'Key': self.object_key(key)})
+
+
+# Armazenamento configurado em MEDIA_STORAGE (caminho de importação da classe), criado no primeiro uso
+storage = app_extension('media_storage', lambda app: import_string(app.config['MEDIA_STORAGE'])(app))
+
+
+def checkout(key):
+    """
+    Disponibiliza um arquivo armazenado no disco local, para ferramentas que precisam de um caminho (Pillow, ffmpeg).
+
+    No armazenamento local retorna o próprio arquivo; nos remotos, baixa uma cópia em uma pasta temporária.
+
+    Args:
+        key (str): Chave do arquivo.
+
+    Returns:
+        tuple: Caminho local do arquivo e a pasta temporária a remover depois (ou None).
+    """
+    path = storage.local_path(key)
+    if path is not None:
+        return path, None
+    folder = tempfile.mkdtemp(prefix='media-')
+    path = os.path.join(folder, key.rsplit('/', 1)[-1])
+    try:
+        storage.get(key, path)
+    except Exception:
+        shutil.rmtree(folder, ignore_errors=True)
+        raise
+    return path, folder
+
+
+@contextmanager
+def working_copy(key):
+    """
+    Contexto que disponibiliza um arquivo armazenado no disco local (ver checkout).
+
+    Args:
+        key (str): Chave do arquivo.
+
+    Yields:
+        str: Caminho local do arquivo.
+    """
+    path, folder = checkout(key)
+    try:
+        yield path
+    finally:
+        if folder is not None:
+            shutil.rmtree(folder, ignore_errors=True)
+
+
+def publish(folder, path):
+    """
+    Armazena um arquivo gerado localmente (variante) ao lado do original.
+
+    Args:
+        folder (str): Pasta da mídia.
+        path (str): Caminho do arquivo gerado; o nome do arquivo é mantido.
+    """
+    storage.put(media_key(folder, os.path.basename(path)), path)
@@ -0,0 +1,204 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import math
+import threading
+import time
+from werkzeug.utils import import_string
+from app import app_extension
+from app.cache import TTLCache, MISSING
+
+# Tempo máximo de espera pelo Redis, em segundos: com o backend fora do ar o login não é bloqueado
+REDIS_TIMEOUT = 0.25
+
+
+class MemoryThrottleStore:
+    """
+    Contadores de falhas na memória do processo.
+
+    Cada worker do servidor tem os seus contadores: com N workers, um atacante consegue até N vezes
+    os limites configurados. Use RedisThrottleStore quando o servidor roda mais de um processo.
+
+    Métodos:
+        get(key): Quantidade de falhas e segundos até a expiração.
+        increment(key): Registra uma falha e renova a expiração.
+        delete(key): Zera as falhas.
+    """
+
+    def __init__(self, app, max_tracked=100000):
+        """
+        Inicializa os contadores.
+
+        Args:
+            app (Flask): Aplicação Flask.
+            max_tracked (int): Quantidade máxima de IPs e contas acompanhados (limita a memória).
+        """
+        self.window = app.config['LOGIN_THROTTLE_WINDOW']
+        self._failures = TTLCache(self.window, max_tracked)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        item = self._failures.get(key)
+        if item is MISSING:
+            return 0, 0
+        count, expires_at = item
+        return count, max(0.0, expires_at - time.monotonic())
+
+    def increment(self, key):
+        with self._lock:
+            count, _ = self.get(key)
+            self._failures.set(key, (count + 1, time.monotonic() + self.window))
+
+    def delete(self, key):
+        self._failures.delete(key)
+
+
+class RedisThrottleStore:
+    """
+    Contadores de falhas no Redis de LOGIN_THROTTLE_URL, compartilhados entre processos e servidores.
+
+    Falhas de conexão não bloqueiam o login: são registradas no log e as tentativas são aceitas.
+
+    Métodos:
+        Os mesmos de MemoryThrottleStore.
+    """
+
+    def __init__(self, app):
+        """
+        Cria o cliente Redis.
+
+        Args:
+            app (Flask): Aplicação Flask.
+
+        Raises:
+            RuntimeError: Se o pacote redis não estiver instalado.
+        """
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RedisThrottleStore requires redis (pip install redis).')
+        self.client = redis.Redis.from_url(app.config['LOGIN_THROTTLE_URL'], socket_timeout=REDIS_TIMEOUT,
+                                           socket_connect_timeout=REDIS_TIMEOUT)
+        self.redis_error = redis.RedisError
+        self.window = math.ceil(app.config['LOGIN_THROTTLE_WINDOW'])
+        self.logger = app.logger
+
+    def get(self, key):
+        try:
+            with self.client.pipeline(transaction=False) as pipeline:
+                count, ttl = pipeline.get('login-throttle:' + key).ttl('login-throttle:' + key).execute()
+        except self.redis_error as error:
+            self.logger.warning('Login throttle backend unavailable: %s', error)
+            return 0, 0
+        return int(count or 0), max(0, ttl or 0)
+
+    def increment(self, key):
+        try:
+            # INCR e EXPIRE na mesma transação: a expiração é renovada a cada falha
+            with self.client.pipeline() as pipeline:
+                pipeline.incr('login-throttle:' + key).expire('login-throttle:' + key, self.window).execute()
+        except self.redis_error as error:
+            self.logger.warning('Login throttle backend unavailable: %s', error)
+
+    def delete(self, key):
+        try:
+            self.client.delete('login-throttle:' + key)
+        except self.redis_error as error:
+            self.logger.warning('Login throttle backend unavailable: %s', error)
+
+
+class LoginThrottle:
+    """
+    Limite de tentativas de login com falha por IP e por conta.
+
+    As falhas expiram LOGIN_THROTTLE_WINDOW segundos depois da última falha e ficam no backend de
+    LOGIN_THROTTLE_BACKEND (na memória de cada processo, por padrão). Atingido o limite do IP, o login
+    é recusado antes de calcular o hash da senha, de modo que ataques de credential stuffing não
+    consomem a CPU do servidor. Atingido o limite da conta, só as senhas incorretas são recusadas:
+    o dono da conta não fica bloqueado.
+
+    Métodos:
+        retry_after(ip): Segundos até novas tentativas do IP serem aceitas (0 se liberado).
+        account_retry_after(account): Segundos até novas tentativas na conta serem aceitas (0 se liberado).
+        record_failure(ip, account): Registra uma tentativa com falha.
+        reset(account): Zera as falhas da conta após um login bem-sucedido.
+    """
+
+    def __init__(self, store, max_per_ip, max_per_account):
+        """
+        Inicializa o limite.
+
+        Args:
+            store (MemoryThrottleStore): Backend dos contadores.
+            max_per_ip (int): Falhas permitidas por IP na janela.
+            max_per_account (int): Falhas permitidas por conta na janela.
+        """
+        self.store = store
+        self.max_per_ip = max_per_ip
+        self.max_per_account = max_per_account
+
+    def _retry_after(self, key, limit):
+        count, seconds_left = self.store.get(key)
+        return max(1, math.ceil(seconds_left)) if count >= limit else 0
+
+    def retry_after(self, ip):
+        """
+        Verifica se o IP atingiu o limite de falhas (consultado antes de calcular o hash da senha).
+
+        Args:
+            ip (str): Endereço IP do cliente.
+
+        Returns:
+            int: Segundos restantes até novas tentativas serem aceitas, ou 0 se o login está liberado.
+        """
+        return self._retry_after('ip:' + ip, self.max_per_ip)
+
+    def account_retry_after(self, account):
+        """
+        Verifica se a conta atingiu o limite de falhas.
+
+        Consultado só depois de uma senha incorreta: quem sabe a senha entra mesmo com a conta
+        sob ataque, e o atacante continua limitado por IP.
+
+        Args:
+            account (str): Identificador da conta (e-mail informado, exista ou não).
+
+        Returns:
+            int: Segundos restantes até novas tentativas na conta serem aceitas, ou 0 se ainda há tentativas.
+        """
+        return self._retry_after('account:' + account, self.max_per_account)
+
+    def record_failure(self, ip, account):
+        """
+        Registra uma tentativa de login com falha.
+
+        Args:
+            ip (str): Endereço IP do cliente.
+            account (str): Identificador da conta.
+        """
+        self.store.increment('ip:' + ip)
+        self.store.increment('account:' + account)
+
+    def reset(self, account):
+        """
+        Zera as falhas de uma conta após um login bem-sucedido.
+
+        Args:
+            account (str): Identificador da conta.
+        """
+        self.store.delete('account:' + account)
+
+
+def _create_throttle(app):
+    config = app.config
+    store_class = import_string(config['LOGIN_THROTTLE_BACKEND'])
+    if store_class is MemoryThrottleStore and config['SERVER_WORKERS'] > 1:
+        app.logger.warning('Login attempt limits are counted per process: with %d workers the effective limits are '
+                           '%d times the configured ones (set LOGIN_THROTTLE_BACKEND=app.throttle.RedisThrottleStore).',
+                           config['SERVER_WORKERS'], config['SERVER_WORKERS'])
+    return LoginThrottle(store_class(app), config['LOGIN_MAX_ATTEMPTS_PER_IP'], config['LOGIN_MAX_ATTEMPTS_PER_ACCOUNT'])
+
+
+# Limite de tentativas de login, criado no primeiro uso
+login_throttle = app_extension('login_throttle', _create_throttle)
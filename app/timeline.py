@@ -0,0 +1,115 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from sqlalchemy import select, literal, and_, or_, exists
+from flask import current_app
+from app import db
+from app.models import Post, Friendship, TimelineEntry
+
+timeline_table = TimelineEntry.__table__
+
+
+def fanout_on_write_enabled():
+    """
+    Indica se o feed é lido da timeline pré-calculada (FEED_FANOUT = 'write').
+
+    Returns:
+        bool: True se o fan-out na escrita estiver ativo.
+    """
+    return current_app.config['FEED_FANOUT'] == 'write'
+
+
+def fan_out_post(post):
+    """
+    Entrega um novo post na timeline do autor e de todos os seus amigos.
+
+    O post precisa já ter um ID (após db.session.flush()); o commit fica a cargo de quem chama.
+
+    Args:
+        post (Post): Post recém-criado.
+    """
+    if not fanout_on_write_enabled():
+        return
+
+    # Uma única instrução INSERT ... SELECT sobre as amizades do autor
+    friends = select([
+        Friendship.friend_id, literal(post.id), literal(post.timestamp)
+    ]).where(Friendship.user_id == post.user_id)
+    db.session.execute(timeline_table.insert().from_select(['user_id', 'post_id', 'timestamp'], friends))
+    db.session.execute(timeline_table.insert().values(user_id=post.user_id, post_id=post.id, timestamp=post.timestamp))
+
+
+def remove_post(post_id):
+    """
+    Remove um post de todas as timelines.
+
+    Args:
+        post_id (int): ID do post removido.
+    """
+    if not fanout_on_write_enabled():
+        return
+    TimelineEntry.query.filter_by(post_id=post_id).delete(synchronize_session=False)
+
+
+def backfill_friendship(user_id, friend_id):
+    """
+    Copia os posts recentes de cada um dos usuários para a timeline do outro.
+
+    Args:
+        user_id (int): ID de um dos usuários da nova amizade.
+        friend_id (int): ID do outro usuário.
+    """
+    if not fanout_on_write_enabled():
+        return
+
+    limit = current_app.config['TIMELINE_BACKFILL_SIZE']
+    for owner_id, author_id in ((user_id, friend_id), (friend_id, user_id)):
+        recent_posts = select([
+            literal(owner_id), Post.id, Post.timestamp
+        ]).where(and_(
+            Post.user_id == author_id,
+            # Ignora posts que já estão na timeline do usuário
+            ~exists().where(and_(TimelineEntry.user_id == owner_id, TimelineEntry.post_id == Post.id))
+        )).order_by(Post.timestamp.desc(), Post.id.desc()).limit(limit)
+        db.session.execute(timeline_table.insert().from_select(['user_id', 'post_id', 'timestamp'], recent_posts))
+
+
+def remove_friendship(user_id, friend_id):
+    """
+    Remove da timeline de cada usuário os posts do ex-amigo.
+
+    Args:
+        user_id (int): ID de um dos usuários da amizade desfeita.
+        friend_id (int): ID do outro usuário.
+    """
+    if not fanout_on_write_enabled():
+        return
+
+    for owner_id, author_id in ((user_id, friend_id), (friend_id, user_id)):
+        author_posts = db.session.query(Post.id).filter(Post.user_id == author_id)
+        TimelineEntry.query.filter(
+            TimelineEntry.user_id == owner_id,
+            TimelineEntry.post_id.in_(author_posts)
+        ).delete(synchronize_session=False)
+
+
+def rebuild_timeline(user_id, limit):
+    """
+    Reconstrói a timeline de um usuário a partir dos posts dele e dos amigos.
+
+    Usado ao ativar o fan-out na escrita sobre um banco de dados já existente.
+
+    Args:
+        user_id (int): ID do usuário.
+        limit (int): Quantidade máxima de posts mantidos na timeline.
+    """
+    TimelineEntry.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    friend_ids = select([Friendship.friend_id]).where(Friendship.user_id == user_id)
+    recent_posts = select([
+        literal(user_id), Post.id, Post.timestamp
+    ]).where(or_(
+        Post.user_id == user_id,
+        Post.user_id.in_(friend_ids)
+    )).order_by(Post.timestamp.desc(), Post.id.desc()).limit(limit)
+    db.session.execute(timeline_table.insert().from_select(['user_id', 'post_id', 'timestamp'], recent_posts))
@@ -0,0 +1,216 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from flask import current_app
+from app import db, app_extension
+from app.models import Post
+from app.media import variant_filename, TRANSCODED_VARIANTS
+from app.storage import storage, media_key, checkout, publish
+from app.stamps import touch_users, touch_post_author
+from app.utils import thread_pool
+
+# Pool de processos da conversão de vídeos e áudios; as requisições apenas enfileiram os trabalhos
+transcode_executor = app_extension('transcode_executor', lambda app: ProcessPoolExecutor(max_workers=app.config['TRANSCODE_WORKERS']))
+
+# Threads que preparam os trabalhos (download do original em armazenamentos remotos) fora da thread da requisição
+checkout_executor = app_extension('transcode_checkout_executor', lambda app: thread_pool(app.config['TRANSCODE_WORKERS'], 'transcode-checkout'))
+
+# Pasta e coluna de status de cada tipo de mídia
+MEDIA_KINDS = {
+    'video': ('post_videos', Post.video_file, Post.video_status),
+    'audio': ('post_audios', Post.audio_file, Post.audio_status),
+}
+
+
+def ffmpeg_binary():
+    """
+    Localiza o executável do ffmpeg.
+
+    Usa FFMPEG_BINARY, o binário distribuído com o moviepy (imageio-ffmpeg) ou o ffmpeg do PATH.
+
+    Returns:
+        str: Caminho do executável.
+    """
+    if current_app.config['FFMPEG_BINARY']:
+        return current_app.config['FFMPEG_BINARY']
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return shutil.which('ffmpeg') or 'ffmpeg'
+
+
+def run_ffmpeg(binary, arguments, target, timeout):
+    """
+    Executa o ffmpeg gravando em um arquivo temporário que só é renomeado se a conversão terminar.
+
+    Args:
+        binary (str): Caminho do ffmpeg.
+        arguments (list): Argumentos de entrada e codificação (sem o arquivo de saída).
+        target (str): Caminho final do arquivo gerado.
+        timeout (float): Tempo máximo da conversão em segundos.
+    """
+    # Nome temporário único: posts com o mesmo arquivo podem ser convertidos ao mesmo tempo
+    temporary = f'{target}.{os.getpid()}.tmp'
+    try:
+        subprocess.run([binary, '-hide_banner', '-loglevel', 'error', '-y', *arguments, temporary],
+                       check=True, timeout=timeout, stdin=subprocess.DEVNULL, capture_output=True)
+        os.replace(temporary, target)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def transcode_video(binary, path, options):
+    """
+    Converte um vídeo para MP4 (H.264/AAC) com bitrate limitado e extrai o quadro de capa.
+
+    Executada em um processo do pool: não usa o banco de dados nem o contexto da aplicação.
+
+    Args:
+        binary (str): Caminho do ffmpeg.
+        path (str): Caminho do vídeo original.
+        options (dict): Largura máxima, bitrates e tempo máximo da conversão.
+    """
+    folder, filename = os.path.split(path)
+    scale = f"scale='min({options['max_width']},iw)':-2"  # Nunca amplia; altura par exigida pelo H.264
+    run_ffmpeg(binary, [
+        '-i', path, '-map', '0:v:0', '-map', '0:a:0?',
+        '-vf', scale, '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
+        '-maxrate', options['video_bitrate'], '-bufsize', options['video_buffer'], '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-b:a', options['audio_bitrate'], '-ac', '2',
+        '-movflags', '+faststart',  # Índice no início do arquivo: o vídeo começa a tocar antes do download terminar
+        '-f', 'mp4',
+    ], os.path.join(folder, variant_filename(filename, 'web', 'mp4')), options['timeout'])
+    # Quadro representativo (filtro thumbnail) entre os primeiros quadros do vídeo
+    run_ffmpeg(binary, [
+        '-i', path, '-vf', f'thumbnail,{scale}', '-frames:v', '1', '-q:v', '4', '-f', 'image2',
+    ], os.path.join(folder, variant_filename(filename, 'poster', 'jpg')), options['timeout'])
+
+
+def transcode_audio(binary, path, options):
+    """
+    Converte um áudio (MP3/WAV) para AAC em M4A com bitrate fixo.
+
+    Executada em um processo do pool: não usa o banco de dados nem o contexto da aplicação.
+
+    Args:
+        binary (str): Caminho do ffmpeg.
+        path (str): Caminho do áudio original.
+        options (dict): Bitrate e tempo máximo da conversão.
+    """
+    folder, filename = os.path.split(path)
+    run_ffmpeg(binary, [
+        '-i', path, '-vn', '-map_metadata', '-1',
+        '-c:a', 'aac', '-b:a', options['audio_bitrate'], '-movflags', '+faststart', '-f', 'mp4',
+    ], os.path.join(folder, variant_filename(filename, 'web', 'm4a')), options['timeout'])
+
+
+def transcode_options():
+    """
+    Reúne as configurações de conversão enviadas aos processos do pool.
+
+    Returns:
+        dict: Opções de conversão.
+    """
+    config = current_app.config
+    bitrate = config['VIDEO_MAX_BITRATE']
+    return {
+        'max_width': config['VIDEO_MAX_WIDTH'],
+        'video_bitrate': f'{bitrate}k',
+        'video_buffer': f'{bitrate * 2}k',
+        'audio_bitrate': f"{config['AUDIO_BITRATE']}k",
+        'timeout': config['TRANSCODE_TIMEOUT'],
+    }
+
+
+def set_media_status(post_id, kind, status):
+    """
+    Atualiza o status de conversão de uma mídia do post (com o contexto da aplicação ativo).
+
+    Args:
+        post_id (int): ID do post.
+        kind (str): 'video' ou 'audio'.
+        status (str): Novo status.
+    """
+    _, _, status_column = MEDIA_KINDS[kind]
+    try:
+        Post.query.filter_by(id=post_id).update({status_column: status}, synchronize_session=False)
+        touch_post_author(post_id)
+        db.session.commit()
+    finally:
+        db.session.remove()
+
+
+def _job_finished(app, post_id, kind, path, temporary_folder, future):
+    # Executado pela thread de gerenciamento do pool quando o processo termina
+    folder, _, _ = MEDIA_KINDS[kind]
+    error = future.exception()
+    with app.app_context():
+        try:
+            if error is None:
+                # Envia as variantes ao armazenamento (no armazenamento local elas já estão no lugar)
+                for variant, extension in TRANSCODED_VARIANTS[folder]:
+                    publish(folder, os.path.join(os.path.dirname(path), variant_filename(os.path.basename(path), variant, extension)))
+        except Exception as publish_error:
+            error = publish_error
+        finally:
+            if temporary_folder is not None:
+                shutil.rmtree(temporary_folder, ignore_errors=True)
+        if error is not None:
+            app.logger.error('Transcoding %s failed for post %s: %s', kind, post_id, error)
+        set_media_status(post_id, kind, 'failed' if error is not None else 'ready')
+
+
+def _start_job(app, post_id, kind, key, job, binary, options):
+    # Executado por checkout_executor: disponibiliza o original no disco e envia a conversão ao pool de processos
+    with app.app_context():
+        temporary_folder = None
+        try:
+            path, temporary_folder = checkout(key)
+            future = transcode_executor.submit(job, binary, path, options)
+        except Exception as error:
+            if temporary_folder is not None:
+                shutil.rmtree(temporary_folder, ignore_errors=True)
+            app.logger.error('Transcoding %s failed for post %s: %s', kind, post_id, error)
+            set_media_status(post_id, kind, 'failed')
+            return
+    future.add_done_callback(partial(_job_finished, app, post_id, kind, path, temporary_folder))
+
+
+def schedule_transcoding(post):
+    """
+    Envia o vídeo e o áudio de um post para o pool de processos.
+
+    Deve ser chamado depois do commit do post, com os status já em 'processing'. Mídias já
+    convertidas (o mesmo arquivo enviado em outro post) são marcadas como prontas sem nova conversão.
+    Em armazenamentos remotos o original é baixado para uma pasta temporária por checkout_executor,
+    sem ocupar a thread da requisição.
+
+    Args:
+        post (Post): Post com mídias pendentes.
+    """
+    binary, options = ffmpeg_binary(), transcode_options()
+    jobs = (('video', post.video_file, transcode_video), ('audio', post.audio_file, transcode_audio))
+    ready = {}
+    for kind, filename, job in jobs:
+        if filename:
+            folder, _, status_column = MEDIA_KINDS[kind]
+            # A última variante gravada pela conversão indica que ela já terminou
+            variant, extension = TRANSCODED_VARIANTS[folder][-1]
+            if storage.exists(media_key(folder, variant_filename(filename, variant, extension))):
+                # Arquivo idêntico já enviado em outro post (mesmo hash): reaproveita a conversão
+                ready[status_column] = 'ready'
+                continue
+            checkout_executor.submit(_start_job, current_app._get_current_object(), post.id, kind,
+                                     media_key(folder, filename), job, binary, options)
+    if ready:
+        Post.query.filter_by(id=post.id).update(ready, synchronize_session=False)
+        touch_users([post.user_id])
+        db.session.commit()
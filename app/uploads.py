@@ -0,0 +1,430 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import time
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, TooManyRequests
+from app.cache import TTLCache, MISSING
+from app.storage import storage, media_key
+
+# Pasta de destino, configuração do tamanho máximo e extensões aceitas de cada tipo de mídia
+UPLOAD_KINDS = {
+    'post_pics': ('IMAGE_MAX_SIZE', ('jpg', 'png')),
+    'post_audios': ('AUDIO_MAX_SIZE', ('mp3', 'wav')),
+    'post_videos': ('VIDEO_MAX_SIZE', ('mp4', 'avi')),
+}
+
+# Tamanho dos blocos lidos do corpo da requisição e dos arquivos
+BLOCK_SIZE = 64 * 1024
+
+
+def upload_extension(filename):
+    """
+    Retorna a extensão de um arquivo enviado, em minúsculas e sem o ponto.
+
+    Args:
+        filename (str): Nome do arquivo enviado.
+
+    Returns:
+        str: Extensão (ex.: 'mp4').
+    """
+    return os.path.splitext(filename or '')[1].lstrip('.').lower()
+
+
+def folder_for_extension(extension):
+    """
+    Retorna a pasta de mídia correspondente a uma extensão.
+
+    Args:
+        extension (str): Extensão do arquivo.
+
+    Returns:
+        str: Pasta de mídia ou None se a extensão não for aceita.
+    """
+    for folder, (_, extensions) in UPLOAD_KINDS.items():
+        if extension in extensions:
+            return folder
+    return None
+
+
+def size_limit(folder):
+    """
+    Retorna o tamanho máximo, em bytes, dos arquivos de uma pasta de mídia.
+
+    Args:
+        folder (str): Pasta de mídia.
+
+    Returns:
+        int: Tamanho máximo em bytes.
+    """
+    setting, _ = UPLOAD_KINDS[folder]
+    return current_app.config[setting]
+
+
+def incoming_folder():
+    """
+    Retorna (e cria, se necessário) a pasta dos uploads em andamento.
+
+    Fica fora de static, para que arquivos incompletos nunca sejam servidos.
+
+    Returns:
+        str: Caminho da pasta.
+    """
+    folder = current_app.config['UPLOAD_INCOMING_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def store_file(path, digest, folder, extension):
+    """
+    Move um arquivo recebido para o armazenamento de mídias com um nome derivado do conteúdo.
+
+    Arquivos idênticos recebem o mesmo nome: se o conteúdo já existe, o novo arquivo é
+    descartado e o existente é reaproveitado.
+
+    Args:
+        path (str): Caminho do arquivo recebido.
+        digest (str): Hash SHA-256 (hexadecimal) do conteúdo.
+        folder (str): Pasta de mídia.
+        extension (str): Extensão do arquivo.
+
+    Returns:
+        str: Nome do arquivo armazenado.
+    """
+    filename = f'{digest[:16]}.{extension}'
+    storage.put(media_key(folder, filename), path)
+    return filename
+
+
+class HashingUploadFile:
+    """
+    Arquivo usado pelo Werkzeug para receber um upload: grava diretamente na pasta de uploads,
+    calcula o SHA-256 e aplica o limite de tamanho enquanto os blocos chegam.
+
+    Métodos:
+        write(data): Grava um bloco, atualizando o hash e o tamanho.
+        store(folder, extension): Move o arquivo para o armazenamento de mídias.
+        close(): Fecha o arquivo e o remove se ele não tiver sido armazenado.
+    """
+
+    def __init__(self, limit):
+        """
+        Cria o arquivo temporário na pasta de uploads.
+
+        Args:
+            limit (int): Tamanho máximo em bytes.
+        """
+        self.limit = limit
+        self.size = 0
+        self.hash = hashlib.sha256()
+        self.path = os.path.join(incoming_folder(), f'form-{secrets.token_hex(8)}.part')
+        self.file = open(self.path, 'w+b')
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.limit:
+            # Interrompe a leitura do corpo da requisição assim que o limite é ultrapassado
+            self.close()
+            raise RequestEntityTooLarge()
+        self.hash.update(data)
+        return self.file.write(data)
+
+    def read(self, *args):
+        return self.file.read(*args)
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def flush(self):
+        return self.file.flush()
+
+    def store(self, folder, extension):
+        """
+        Move o arquivo recebido para o armazenamento de mídias.
+
+        Args:
+            folder (str): Pasta de mídia.
+            extension (str): Extensão do arquivo.
+
+        Returns:
+            str: Nome do arquivo armazenado.
+        """
+        self.file.close()
+        filename = store_file(self.path, self.hash.hexdigest(), folder, extension)
+        self.path = None
+        return filename
+
+    def close(self):
+        self.file.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+            self.path = None
+
+
+class UploadRequest(Request):
+    """
+    Requisição que recebe os arquivos dos formulários com HashingUploadFile.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        folder = folder_for_extension(upload_extension(filename))
+        limit = size_limit(folder) if folder is not None else current_app.config['MAX_CONTENT_LENGTH']
+        return HashingUploadFile(limit)
+
+
+def save_upload(form_file, folder):
+    """
+    Armazena um arquivo enviado por formulário no armazenamento de mídias.
+
+    Args:
+        form_file (FileStorage): Arquivo enviado pelo usuário.
+        folder (str): Pasta de mídia.
+
+    Returns:
+        str: Nome do arquivo salvo.
+    """
+    extension = upload_extension(form_file.filename)
+    if isinstance(form_file.stream, HashingUploadFile):
+        return form_file.stream.store(folder, extension)
+
+    # Arquivo recebido por outro caminho (ex.: em memória): grava calculando o hash
+    path = os.path.join(incoming_folder(), f'form-{secrets.token_hex(8)}.part')
+    digest = hashlib.sha256()
+    with open(path, 'wb') as target:
+        for block in iter(lambda: form_file.stream.read(BLOCK_SIZE), b''):
+            digest.update(block)
+            target.write(block)
+    return store_file(path, digest.hexdigest(), folder, extension)
+
+
+# Estado do hash dos uploads em partes, para não reler o arquivo a cada parte recebida; uploads
+# abandonados expiram e, com muitos uploads simultâneos, os mais antigos são descartados (o hash de
+# um upload descartado é recalculado a partir do arquivo parcial na próxima parte)
+_upload_hashes = TTLCache(3600, 1024)
+
+
+def _session_path(upload_id, suffix):
+    return os.path.join(incoming_folder(), f'chunked-{upload_id}.{suffix}')
+
+
+def _read_session(upload_id):
+    try:
+        with open(_session_path(upload_id, 'json')) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_session(session):
+    path = _session_path(session['id'], 'json')
+    with open(path + '.tmp', 'w') as target:
+        json.dump(session, target)
+    os.replace(path + '.tmp', path)
+
+
+def create_upload(user_id, filename, size):
+    """
+    Inicia um upload em partes (retomável).
+
+    Args:
+        user_id (int): ID do usuário que envia o arquivo.
+        filename (str): Nome original do arquivo.
+        size (int): Tamanho total do arquivo em bytes.
+
+    Returns:
+        dict: Sessão do upload (id, offset, size, chunk_size).
+
+    Raises:
+        ValueError: Se a extensão não for aceita.
+        RequestEntityTooLarge: Se o tamanho ultrapassar o limite do tipo de mídia.
+        TooManyRequests: Se o usuário já tiver UPLOAD_MAX_OPEN_PER_USER uploads em andamento.
+    """
+    extension = upload_extension(filename)
+    folder = folder_for_extension(extension)
+    if folder is None or size <= 0:
+        raise ValueError('Unsupported file.')
+    if size > size_limit(folder):
+        raise RequestEntityTooLarge()
+    if count_open_uploads(user_id) >= current_app.config['UPLOAD_MAX_OPEN_PER_USER']:
+        raise TooManyRequests()
+
+    session = {
+        'id': secrets.token_hex(16), 'user_id': user_id, 'folder': folder, 'extension': extension,
+        'size': size, 'offset': 0, 'filename': None, 'created_at': time.time(),
+    }
+    open(_session_path(session['id'], 'part'), 'wb').close()
+    _write_session(session)
+    return dict(session, chunk_size=current_app.config['UPLOAD_CHUNK_SIZE'])
+
+
+def count_open_uploads(user_id):
+    """
+    Conta os uploads em partes ainda não concluídos de um usuário.
+
+    Uploads mais antigos que UPLOAD_RETENTION_HOURS não contam: são abandonados e removidos
+    por 'flask purge-uploads'.
+
+    Args:
+        user_id (int): ID do usuário.
+
+    Returns:
+        int: Quantidade de uploads em andamento.
+    """
+    cutoff = time.time() - current_app.config['UPLOAD_RETENTION_HOURS'] * 3600
+    count = 0
+    with os.scandir(incoming_folder()) as entries:
+        for entry in entries:
+            if not (entry.name.startswith('chunked-') and entry.name.endswith('.json')):
+                continue
+            session = _read_session(entry.name[len('chunked-'):-len('.json')])
+            if (session is not None and session['user_id'] == user_id and session['filename'] is None
+                    and session['created_at'] >= cutoff):
+                count += 1
+    return count
+
+
+def load_upload(upload_id, user_id):
+    """
+    Carrega a sessão de um upload em partes do usuário.
+
+    O offset é o tamanho do arquivo parcial, que é a referência para retomar o envio.
+
+    Args:
+        upload_id (str): ID do upload.
+        user_id (int): ID do usuário dono do upload.
+
+    Returns:
+        dict: Sessão do upload ou None se não existir.
+    """
+    if not upload_id.isalnum():
+        return None
+    session = _read_session(upload_id)
+    if session is None or session['user_id'] != user_id:
+        return None
+    if session['filename'] is None:
+        part = _session_path(upload_id, 'part')
+        session['offset'] = os.path.getsize(part) if os.path.exists(part) else 0
+    return dict(session, chunk_size=current_app.config['UPLOAD_CHUNK_SIZE'])
+
+
+def _resume_hash(upload_id, offset):
+    # Recupera o hash do que já foi recebido; após um reinício do processo, relê o arquivo parcial
+    # Cópia: se a parte for rejeitada, o hash guardado continua valendo para uma nova tentativa
+    cached = _upload_hashes.get(upload_id)
+    if cached is not MISSING and cached[0] == offset:
+        return cached[1].copy()
+    digest = hashlib.sha256()
+    with open(_session_path(upload_id, 'part'), 'rb') as source:
+        for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest
+
+
+def append_chunk(session, offset, stream):
+    """
+    Grava uma parte de um upload, lida em blocos diretamente do corpo da requisição.
+
+    O arquivo parcial do upload fica com um lock exclusivo (flock) durante a gravação, o que vale
+    entre threads e processos sem bloquear os outros uploads; um segundo envio simultâneo do mesmo
+    upload é recusado. O offset é relido, sob o lock, do tamanho do arquivo parcial.
+
+    Args:
+        session (dict): Sessão do upload.
+        offset (int): Posição da parte no arquivo (deve ser igual ao offset atual).
+        stream (IO): Corpo da requisição.
+
+    Returns:
+        dict: Sessão atualizada (com o nome do arquivo armazenado, se o upload terminou).
+
+    Raises:
+        ValueError: Se o offset não for o esperado ou outra parte estiver sendo gravada (o cliente deve consultar o offset e retomar).
+        RequestEntityTooLarge: Se a parte ultrapassar o tamanho declarado.
+    """
+    upload_id = session['id']
+    try:
+        # Sem O_CREAT: o arquivo parcial de um upload já concluído não é recriado
+        descriptor = os.open(_session_path(upload_id, 'part'), os.O_WRONLY | os.O_APPEND)
+    except FileNotFoundError:
+        raise ValueError('Offset mismatch.')
+    with os.fdopen(descriptor, 'ab') as target:
+        try:
+            fcntl.flock(target, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ValueError('Upload in progress.')
+        stored = _read_session(upload_id)
+        session['offset'] = os.fstat(target.fileno()).st_size
+        if stored is None or stored['filename'] is not None or offset != session['offset']:
+            raise ValueError('Offset mismatch.')
+
+        digest = _resume_hash(upload_id, offset)
+        received = offset
+        for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+            received += len(block)
+            if received > session['size']:
+                target.truncate(offset)
+                raise RequestEntityTooLarge()
+            digest.update(block)
+            target.write(block)
+        target.flush()
+        session['offset'] = received
+
+        if received == session['size']:
+            _upload_hashes.delete(upload_id)
+            session['filename'] = store_file(_session_path(upload_id, 'part'), digest.hexdigest(),
+                                             session['folder'], session['extension'])
+            _write_session(session)
+        else:
+            _upload_hashes.set(upload_id, (received, digest))
+    return session
+
+
+def claim_upload(upload_id, user_id, folder):
+    """
+    Consome um upload em partes concluído, retornando o arquivo armazenado.
+
+    Args:
+        upload_id (str): ID do upload.
+        user_id (int): ID do usuário dono do upload.
+        folder (str): Pasta de mídia esperada.
+
+    Returns:
+        str: Nome do arquivo armazenado ou None se o upload não existir ou não tiver terminado.
+    """
+    session = load_upload(upload_id, user_id)
+    if session is None or session['filename'] is None or session['folder'] != folder:
+        return None
+    try:
+        os.remove(_session_path(upload_id, 'json'))
+    except FileNotFoundError:
+        # Consumido por outra requisição simultânea (ex.: formulário enviado duas vezes)
+        return None
+    return session['filename']
+
+
+def purge_uploads(max_age_hours):
+    """
+    Remove uploads abandonados (parciais ou nunca usados em um post).
+
+    Args:
+        max_age_hours (float): Idade máxima, em horas, dos arquivos mantidos.
+
+    Returns:
+        int: Quantidade de arquivos removidos.
+    """
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    with os.scandir(incoming_folder()) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+    return removed
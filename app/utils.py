@@ -3,6 +3,30 @@ Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
 """
 
 import hmac
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 def safe_str_cmp(a, b):
     return hmac.compare_digest(a, b)
+
+def thread_pool(max_workers, name):
+    """
+    Cria um pool de threads do sistema para trabalho de CPU (hashing de senhas, imagens).
+
+    Em um worker gevent (threading com monkey patch), o ThreadPoolExecutor da biblioteca padrão
+    criaria greenlets, e o cálculo bloquearia todas as conexões do worker; nesse caso é usado o
+    pool de threads nativas do gevent, cujo resultado é aguardado sem bloquear os outros greenlets.
+
+    Args:
+        max_workers (int): Quantidade de threads.
+        name (str): Prefixo do nome das threads.
+
+    Returns:
+        Executor: Pool de threads.
+    """
+    if 'gevent' in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+            return NativeThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
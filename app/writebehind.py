@@ -0,0 +1,396 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import atexit
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, DataError
+from app import db, app_extension
+from app.database import insert_ignoring_duplicates
+from app.models import Post, Like, Notification
+from app.events import publish_after_commit, author_topic
+from app.stamps import touch_users
+
+# Erros em que o banco rejeita os dados (ex.: chave estrangeira), e não uma falha de conexão: o lote
+# é gravado item a item e o item rejeitado é descartado após WRITE_BEHIND_MAX_ATTEMPTS tentativas
+REJECTED_ERRORS = (IntegrityError, DataError)
+
+def write_behind_enabled():
+    """
+    Verifica se likes e notificações são gravados em lote por um worker (WRITE_BEHIND).
+
+    Returns:
+        bool: True se o modo write-behind estiver ativo.
+    """
+    return current_app.config['WRITE_BEHIND']
+
+
+class PendingLike:
+    """
+    Alteração de like ainda não gravada.
+
+    Atributos:
+        persisted (bool): Se o like existia no banco quando a alteração começou.
+        desired (bool): Estado final desejado.
+        notification (tuple): Notificação (user_id, message) gravada junto com um novo like (ou None).
+        attempts (int): Gravações rejeitadas pelo banco.
+    """
+
+    __slots__ = ('persisted', 'desired', 'notification', 'attempts')
+
+    def __init__(self, persisted, desired, notification=None):
+        self.persisted = persisted
+        self.desired = desired
+        self.notification = notification
+        self.attempts = 0
+
+
+class WriteBehindQueue:
+    """
+    Fila de escritas agrupadas: likes e notificações são acumulados em memória
+    e gravados por uma thread em transações de lote.
+
+    Alterações opostas do mesmo like (curtir e descurtir) se anulam antes de chegar ao banco.
+    Cada lote é gravado em até WRITE_BEHIND_INTERVAL segundos, ou antes disso quando a fila
+    atinge WRITE_BEHIND_MAX_PENDING itens; a fila é esvaziada no encerramento do processo.
+    Likes de posts apagados antes da gravação são descartados. Um lote que falha por falta de
+    conexão volta inteiro para a fila; um lote rejeitado pelo banco é gravado item a item (os likes
+    de cada post e cada notificação), e só os itens rejeitados voltam, até max_attempts vezes.
+
+    Métodos:
+        toggle_like(user_id, post, notification): Inverte o like de um usuário e retorna o estado e a contagem otimista.
+        liked_post_ids(user_id, post_ids, persisted_ids): Aplica os likes pendentes aos likes gravados.
+        add_notifications(notifications): Enfileira notificações.
+        flush(): Grava as alterações pendentes.
+        shutdown(): Para a thread e grava o que restou.
+    """
+
+    def __init__(self, app, interval, max_pending, max_attempts):
+        """
+        Inicializa a fila vazia; a thread é iniciada na primeira escrita.
+
+        Args:
+            app (Flask): Aplicação usada pela thread de gravação.
+            interval (float): Atraso máximo, em segundos, entre uma escrita e sua gravação.
+            max_pending (int): Quantidade de itens que dispara uma gravação imediata.
+            max_attempts (int): Gravações rejeitadas pelo banco antes de um item ser descartado.
+        """
+        self.app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._likes = {}  # post_id -> {user_id: PendingLike}
+        self._like_count = 0
+        self._notifications = []  # (user_id, message, tentativas rejeitadas)
+        self._in_flight = {}  # Likes do lote sendo gravado, ainda visíveis para toggle_like
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def _ensure_worker(self):
+        # Chamado com self._lock adquirido
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+        if self._like_count + len(self._notifications) >= self.max_pending:
+            self._wakeup.set()
+
+    def _current_state(self, user_id, post_id):
+        # Estado mais recente conhecido de um like: fila, lote em gravação ou None (consultar o banco)
+        for likes in (self._likes, self._in_flight):
+            pending = likes.get(post_id, {}).get(user_id)
+            if pending is not None:
+                return pending.desired
+        return None
+
+    def _pending_delta(self, post_id):
+        # Diferença entre a contagem gravada e a contagem após as alterações pendentes do post
+        delta = 0
+        for likes in (self._in_flight, self._likes):
+            for pending in likes.get(post_id, {}).values():
+                if pending.desired != pending.persisted:
+                    delta += 1 if pending.desired else -1
+        return delta
+
+    def toggle_like(self, user_id, post, notification=None):
+        """
+        Inverte o like de um usuário em um post.
+
+        Args:
+            user_id (int): ID do usuário.
+            post (Post): Post curtido ou descurtido.
+            notification (tuple): Notificação (user_id, message) enviada se o post for curtido (opcional).
+
+        Returns:
+            tuple: Se o post ficou curtido e a contagem otimista de likes.
+        """
+        with self._lock:
+            known = self._current_state(user_id, post.id)
+        if known is None:
+            # Nenhuma alteração pendente: o estado vem do banco
+            known = db.session.query(Like.id).filter_by(user_id=user_id, post_id=post.id).first() is not None
+
+        with self._lock:
+            # Se o lote foi gravado enquanto o banco era consultado, o banco já reflete o estado conhecido
+            current = self._current_state(user_id, post.id)
+            current = known if current is None else current
+            desired = not current
+            post_likes = self._likes.setdefault(post.id, {})
+            pending = post_likes.get(user_id)
+            if pending is None:
+                in_flight = self._in_flight.get(post.id, {}).get(user_id)
+                persisted = in_flight.desired if in_flight is not None else current
+                post_likes[user_id] = PendingLike(persisted, desired, notification if desired else None)
+                self._like_count += 1
+            elif pending.persisted == desired:
+                # Curtir e descurtir antes da gravação: as duas alterações se anulam
+                del post_likes[user_id]
+                self._like_count -= 1
+                if not post_likes:
+                    del self._likes[post.id]
+            else:
+                pending.desired = desired
+                pending.notification = notification if desired else None
+            delta = self._pending_delta(post.id)
+            self._ensure_worker()
+        return desired, post.like_count + delta
+
+    def liked_post_ids(self, user_id, post_ids, persisted_ids):
+        """
+        Aplica os likes pendentes de um usuário aos likes já gravados.
+
+        Args:
+            user_id (int): ID do usuário.
+            post_ids (list): IDs dos posts exibidos.
+            persisted_ids (set): IDs dos posts curtidos segundo o banco.
+
+        Returns:
+            set: IDs dos posts curtidos, incluindo as alterações pendentes.
+        """
+        liked = set(persisted_ids)
+        with self._lock:
+            for post_id in post_ids:
+                state = self._current_state(user_id, post_id)
+                if state is True:
+                    liked.add(post_id)
+                elif state is False:
+                    liked.discard(post_id)
+        return liked
+
+    def add_notifications(self, notifications):
+        """
+        Enfileira notificações para gravação em lote.
+
+        Args:
+            notifications (list): Pares (user_id, message).
+        """
+        with self._lock:
+            self._notifications.extend((user_id, message, 0) for user_id, message in notifications)
+            self._ensure_worker()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # O lote (ou os itens que falharam) volta para a fila e é tentado novamente no próximo ciclo
+                self.app.logger.exception('Write-behind flush failed')
+
+    def flush(self):
+        """
+        Grava as alterações pendentes em uma única transação.
+
+        Returns:
+            int: Quantidade de itens processados (gravados ou descartados).
+        """
+        with self._flush_lock:
+            with self._lock:
+                likes, notifications = self._likes, self._notifications
+                self._likes, self._notifications, self._like_count = {}, [], 0
+                self._in_flight = likes
+            if not likes and not notifications:
+                return 0
+            failed_likes, failed_notifications = {}, []
+            try:
+                with self.app.app_context():
+                    try:
+                        self._write(likes, notifications)
+                    except REJECTED_ERRORS:
+                        db.session.rollback()
+                        self.app.logger.exception('Write-behind batch rejected, writing items separately')
+                        failed_likes, failed_notifications = self._write_separately(likes, notifications)
+                    finally:
+                        db.session.remove()
+            except Exception:
+                failed_likes, failed_notifications = likes, notifications
+                raise
+            finally:
+                with self._lock:
+                    self._restore(failed_likes, failed_notifications)
+                    self._in_flight = {}
+            written = sum(len(post_likes) for post_likes in likes.values()) + len(notifications)
+            return written - sum(len(post_likes) for post_likes in failed_likes.values()) - len(failed_notifications)
+
+    def _write_separately(self, likes, notifications):
+        # Grava os likes de cada post e cada notificação em transações separadas; retorna os itens que
+        # falharam, já sem os que atingiram max_attempts rejeições
+        failed_likes, failed_notifications = {}, []
+        items = [({post_id: post_likes}, []) for post_id, post_likes in likes.items()]
+        items += [({}, [notification]) for notification in notifications]
+        for item_likes, item_notifications in items:
+            try:
+                self._write(item_likes, item_notifications)
+                continue
+            except REJECTED_ERRORS:
+                db.session.rollback()
+                increment = 1
+                self.app.logger.exception('Write-behind item rejected')
+            except Exception:
+                # Falha que não depende do item (ex.: conexão): volta para a fila sem contar a tentativa
+                db.session.rollback()
+                increment = 0
+                self.app.logger.exception('Write-behind item failed')
+            for post_id, post_likes in item_likes.items():
+                for pending in post_likes.values():
+                    pending.attempts += increment
+                if max(pending.attempts for pending in post_likes.values()) >= self.max_attempts:
+                    self.app.logger.error('Dropping %d pending likes of post %d after %d rejected writes',
+                                          len(post_likes), post_id, self.max_attempts)
+                else:
+                    failed_likes[post_id] = post_likes
+            for user_id, message, attempts in item_notifications:
+                attempts += increment
+                if attempts >= self.max_attempts:
+                    self.app.logger.error('Dropping notification for user %d after %d rejected writes', user_id, attempts)
+                else:
+                    failed_notifications.append((user_id, message, attempts))
+        return failed_likes, failed_notifications
+
+    def _restore(self, likes, notifications):
+        # Devolve um lote que falhou para a fila, combinando com as alterações feitas durante a gravação
+        for post_id, failed_likes in likes.items():
+            post_likes = self._likes.setdefault(post_id, {})
+            for user_id, failed in failed_likes.items():
+                newer = post_likes.get(user_id)
+                if newer is None:
+                    post_likes[user_id] = failed
+                    self._like_count += 1
+                else:
+                    newer.persisted = failed.persisted
+                    newer.attempts = failed.attempts
+                    if newer.persisted == newer.desired:
+                        del post_likes[user_id]
+                        self._like_count -= 1
+            if not post_likes:
+                del self._likes[post_id]
+        self._notifications[:0] = notifications
+
+    def _write(self, likes, notifications):
+        additions, removals = {}, {}
+        notifications = [(user_id, message) for user_id, message, _ in notifications]
+        # Posts apagados depois do like: o like (e a notificação) não é gravado
+        existing = {post_id for (post_id,) in db.session.query(Post.id).filter(Post.id.in_(list(likes)))} if likes else set()
+        for post_id, post_likes in likes.items():
+            for user_id, pending in post_likes.items():
+                if pending.desired == pending.persisted or (pending.desired and post_id not in existing):
+                    continue
+                target = additions if pending.desired else removals
+                target.setdefault(post_id, []).append(user_id)
+                if pending.desired and pending.notification is not None:
+                    notifications.append(pending.notification)
+
+        like_table = Like.__table__
+        deltas = {}
+        for post_id, user_ids in additions.items():
+            # Likes já existentes (gravados por outro processo) são ignorados e não contam
+            deltas[post_id] = insert_ignoring_duplicates(db.session, like_table, [
+                {'user_id': user_id, 'post_id': post_id} for user_id in user_ids
+            ])
+        for post_id, user_ids in removals.items():
+            removed = db.session.execute(like_table.delete().where(
+                (like_table.c.post_id == post_id) & like_table.c.user_id.in_(user_ids)
+            )).rowcount
+            deltas[post_id] = deltas.get(post_id, 0) - removed
+
+        post_table = Post.__table__
+        for post_id, delta in deltas.items():
+            if delta:
+                db.session.execute(post_table.update().where(post_table.c.id == post_id)
+                                   .values(like_count=post_table.c.like_count + delta))
+
+        # Carimbos dos autores (contagens exibidas aos amigos) e de quem curtiu (estado do like)
+        changed = [post_id for post_id, delta in deltas.items() if delta]
+        if changed:
+            user_ids = [user_id for (user_id,) in db.session.query(Post.user_id).filter(Post.id.in_(changed))]
+            for post_id in changed:
+                user_ids += additions.get(post_id, []) + removals.get(post_id, [])
+            touch_users(user_ids)
+
+        # As notificações passam pelo ORM para manter o contador de não lidas e o aviso em tempo real
+        db.session.add_all([Notification(user_id=user_id, message=message[:255]) for user_id, message in notifications])
+
+        if deltas:
+            counts = db.session.query(Post.id, Post.user_id, Post.like_count).filter(Post.id.in_(list(deltas))).all()
+            for post_id, author_id, like_count in counts:
+                publish_after_commit(author_topic(author_id), 'like', {'post_id': post_id, 'likes_count': like_count})
+        db.session.commit()
+
+    def shutdown(self, timeout=10):
+        """
+        Para a thread e grava as alterações que ainda estão na fila.
+
+        Args:
+            timeout (float): Segundos de espera pela thread.
+        """
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while (self._likes or self._notifications) and time.monotonic() < deadline:
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Write-behind flush failed during shutdown')
+                time.sleep(0.1)
+
+
+def _create_write_queue(app):
+    # A fila é esvaziada no encerramento do processo
+    write_queue = WriteBehindQueue(app, app.config['WRITE_BEHIND_INTERVAL'], app.config['WRITE_BEHIND_MAX_PENDING'],
+                                   app.config['WRITE_BEHIND_MAX_ATTEMPTS'])
+    atexit.register(write_queue.shutdown)
+    return write_queue
+
+
+write_queue = app_extension('write_behind_queue', _create_write_queue)
+
+
+def enqueue_notification_after_commit(user_id, message):
+    """
+    Enfileira uma notificação quando a transação atual for confirmada.
+
+    Args:
+        user_id (int): ID do usuário notificado.
+        message (str): Texto da notificação.
+    """
+    db.session.info.setdefault('write_behind_notifications', []).append((user_id, message))
+
+
+@event.listens_for(db.session, 'after_commit')
+def _enqueue_pending_notifications(session):
+    notifications = session.info.pop('write_behind_notifications', None)
+    if notifications:
+        write_queue.add_notifications(notifications)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_pending_notifications(session):
+    session.info.pop('write_behind_notifications', None)
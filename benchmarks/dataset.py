@@ -0,0 +1,316 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+
+Gerador de dados sintéticos de rede social, reprodutível pela semente.
+
+Cria usuários, um grafo de amizades com distribuição de graus em lei de potência
+(ligação preferencial de Barabási-Albert), pedidos de amizade, posts com autores e
+popularidade em cauda longa, likes, comentários, conversas com mensagens e notificações.
+Os contadores desnormalizados (likes, comentários, não lidas) são gravados já consistentes.
+As linhas são inseridas em lotes com executemany, em transações curtas.
+
+Uso:
+    python -m benchmarks.dataset --db sqlite:////tmp/bench.db --users 100000 --seed 42
+"""
+
+import argparse
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate
+from sqlalchemy import bindparam
+from app import create_app, db, bcrypt
+from app.models import (User, Friendship, FriendRequest, Post, Like, Comment, Notification,
+                        Conversation, ConversationMember, Message)
+
+# Senha de todos os usuários gerados (permite testar o login manualmente)
+PASSWORD = 'password'
+
+# Palavras usadas nos textos, para que a busca tenha termos frequentes e raros
+WORDS = ('social', 'network', 'flask', 'python', 'photo', 'music', 'video', 'travel', 'food', 'friends',
+         'weekend', 'coffee', 'project', 'release', 'concert', 'beach', 'mountain', 'city', 'night', 'sunrise',
+         'book', 'movie', 'game', 'code', 'garden', 'recipe', 'birthday', 'party', 'news', 'sports')
+
+# Início do período coberto pelas datas geradas (um ano)
+START = datetime(2024, 1, 1)
+PERIOD_SECONDS = 365 * 24 * 3600
+
+
+class DatasetGenerator:
+    """
+    Gera e insere o conjunto de dados.
+
+    As quantidades por usuário e por post seguem distribuições de Pareto com a média
+    configurada: a maioria tem poucos itens e alguns concentram muitos (cauda longa).
+
+    Métodos:
+        generate(connection): Insere todas as tabelas e retorna a quantidade de linhas de cada uma.
+    """
+
+    def __init__(self, users, seed=42, avg_friends=20, posts_per_user=10, avg_likes=5, avg_comments=2,
+                 conversations_per_user=3, avg_messages=10, avg_notifications=20, pending_requests=2,
+                 batch_size=20000):
+        """
+        Configura o tamanho do conjunto de dados.
+
+        Args:
+            users (int): Quantidade de usuários.
+            seed (int): Semente do gerador de números aleatórios.
+            avg_friends (int): Média de amigos por usuário.
+            posts_per_user (float): Média de posts por usuário.
+            avg_likes (float): Média de likes por post.
+            avg_comments (float): Média de comentários por post.
+            conversations_per_user (float): Média de conversas por usuário.
+            avg_messages (float): Média de mensagens por conversa.
+            avg_notifications (float): Média de notificações por usuário.
+            pending_requests (int): Máximo de pedidos de amizade pendentes recebidos por usuário.
+            batch_size (int): Linhas por lote de inserção.
+        """
+        self.users = users
+        self.rng = random.Random(seed)
+        self.avg_friends = avg_friends
+        self.posts = int(users * posts_per_user)
+        self.avg_likes = avg_likes
+        self.avg_comments = avg_comments
+        self.conversations = int(users * conversations_per_user / 2)
+        self.avg_messages = avg_messages
+        self.avg_notifications = avg_notifications
+        self.pending_requests = pending_requests
+        self.batch_size = batch_size
+
+    def _long_tail(self, mean, cap):
+        # Pareto (alfa 1.5, mínimo 1) deslocada para começar em 0: média (X - 1) = 2
+        return min(cap, int((self.rng.paretovariate(1.5) - 1) * mean / 2))
+
+    def _moment(self, after=None):
+        start = after or START
+        span = PERIOD_SECONDS - int((start - START).total_seconds())
+        return start + timedelta(seconds=self.rng.randrange(max(1, span)), microseconds=self.rng.randrange(10 ** 6))
+
+    def _text(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def _insert(self, connection, table, rows):
+        # Insere em lotes, com um commit por lote para manter as transações curtas
+        total, batch = 0, []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with connection.begin():
+                    connection.execute(table.insert(), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            with connection.begin():
+                connection.execute(table.insert(), batch)
+            total += len(batch)
+        return total
+
+    def _user_rows(self, password, unread_counts):
+        for user_id in range(1, self.users + 1):
+            yield {'id': user_id, 'username': f'user{user_id}', 'email': f'user{user_id}@example.com',
+                   'image_file': 'default.jpg', 'password': password, 'about_me': self._text(8),
+                   'last_seen': self._moment(), 'unread_notification_count': unread_counts[user_id]}
+
+    def _friendship_rows(self):
+        # Barabási-Albert: cada novo usuário se liga a m usuários escolhidos com probabilidade
+        # proporcional ao grau (sorteio uniforme na lista de extremidades das arestas)
+        m = max(1, self.avg_friends // 2)
+        # IDs embaralhados: os usuários mais conectados não são os de ID mais baixo
+        label = array('i', range(1, self.users + 1))
+        self.rng.shuffle(label)
+        endpoints = array('i')
+        seeds = min(self.users, m + 1)
+        for node in range(seeds):
+            for other in range(node):
+                endpoints.extend((node, other))
+                yield from self._friendship_pair(label[node], label[other])
+        for node in range(seeds, self.users):
+            targets = set()
+            while len(targets) < m:
+                targets.add(endpoints[self.rng.randrange(len(endpoints))])
+            for target in targets:
+                endpoints.extend((node, target))
+                yield from self._friendship_pair(label[node], label[target])
+
+    def _friendship_pair(self, user_id, friend_id):
+        # Amizades são gravadas nas duas direções
+        timestamp = self._moment()
+        yield {'user_id': user_id, 'friend_id': friend_id, 'timestamp': timestamp}
+        yield {'user_id': friend_id, 'friend_id': user_id, 'timestamp': timestamp}
+
+    def _friend_request_rows(self):
+        for recipient_id in range(1, self.users + 1):
+            senders = {self.rng.randint(1, self.users) for _ in range(self.rng.randint(0, self.pending_requests))}
+            for sender_id in senders - {recipient_id}:
+                yield {'sender_id': sender_id, 'recipient_id': recipient_id, 'timestamp': self._moment(), 'status': 'pending'}
+
+    def _post_rows(self, like_counts, comment_counts):
+        # Autores com atividade em lei de potência (Zipf): poucos usuários publicam a maior parte dos posts
+        ranks = list(range(1, self.users + 1))
+        self.rng.shuffle(ranks)
+        cum_weights = list(accumulate(1 / rank for rank in ranks))
+        for post_id in range(1, self.posts + 1):
+            author_id = self.rng.choices(range(1, self.users + 1), cum_weights=cum_weights)[0]
+            timestamp = self._moment()
+            yield {'id': post_id, 'title': self._text(4).capitalize()[:100], 'content': self._text(30),
+                   'date_posted': timestamp, 'timestamp': timestamp, 'user_id': author_id,
+                   'like_count': like_counts[post_id], 'comment_count': comment_counts[post_id]}
+
+    def _like_rows(self, like_counts):
+        for post_id in range(1, self.posts + 1):
+            # Usuários distintos: um like por usuário e post
+            for user_id in self.rng.sample(range(1, self.users + 1), like_counts[post_id]):
+                yield {'user_id': user_id, 'post_id': post_id}
+
+    def _comment_rows(self, comment_counts):
+        for post_id in range(1, self.posts + 1):
+            for _ in range(comment_counts[post_id]):
+                yield {'post_id': post_id, 'user_id': self.rng.randint(1, self.users), 'body': self._text(12)}
+
+    def _notification_rows(self, notification_counts, unread_counts):
+        for user_id in range(1, self.users + 1):
+            total, unread = notification_counts[user_id], unread_counts[user_id]
+            timestamps = sorted(self._moment() for _ in range(total))
+            for position, timestamp in enumerate(timestamps):
+                # As mais recentes ficam não lidas
+                read_at = None if position >= total - unread else timestamp + timedelta(hours=1)
+                yield {'user_id': user_id, 'message': f'user{self.rng.randint(1, self.users)} liked your post.',
+                       'timestamp': timestamp, 'read_at': read_at}
+
+    def _conversation_pairs(self):
+        pairs = set()
+        attempts = 0
+        while len(pairs) < self.conversations and attempts < self.conversations * 10:
+            attempts += 1
+            user_id, other_id = self.rng.randint(1, self.users), self.rng.randint(1, self.users)
+            if user_id != other_id:
+                pairs.add((min(user_id, other_id), max(user_id, other_id)))
+        return sorted(pairs)
+
+    def _generate_conversations(self, connection):
+        conversation_table, member_table = Conversation.__table__, ConversationMember.__table__
+        message_table = Message.__table__
+        pairs = self._conversation_pairs()
+        message_id = 0
+        totals = {'conversation': 0, 'conversation_member': 0, 'message': 0}
+        for start in range(0, len(pairs), self.batch_size):
+            conversations, members, messages, last_messages = [], [], [], []
+            for offset, (user_a_id, user_b_id) in enumerate(pairs[start:start + self.batch_size]):
+                conversation_id = start + offset + 1
+                count = 1 + self._long_tail(self.avg_messages, 10000)
+                timestamp = self._moment()
+                for _ in range(count):
+                    message_id += 1
+                    sender_id, recipient_id = self.rng.choice(((user_a_id, user_b_id), (user_b_id, user_a_id)))
+                    messages.append({'id': message_id, 'sender_id': sender_id, 'recipient_id': recipient_id,
+                                     'body': self._text(10), 'timestamp': timestamp, 'conversation_id': conversation_id})
+                    timestamp = self._moment(timestamp)
+                last = messages[-1]
+                unread = self.rng.randint(0, min(3, count))
+                conversations.append({'id': conversation_id, 'user_a_id': user_a_id, 'user_b_id': user_b_id,
+                                      'last_message_at': last['timestamp']})
+                last_messages.append({'b_id': conversation_id, 'b_last_message_id': last['id']})
+                for user_id, other_id in ((user_a_id, user_b_id), (user_b_id, user_a_id)):
+                    members.append({'conversation_id': conversation_id, 'user_id': user_id, 'other_user_id': other_id,
+                                    'last_message_at': last['timestamp'],
+                                    'unread_count': unread if user_id == last['recipient_id'] else 0})
+            with connection.begin():
+                # Conversa e mensagem referenciam uma à outra: a última mensagem é gravada depois das mensagens
+                connection.execute(conversation_table.insert(), conversations)
+                connection.execute(member_table.insert(), members)
+                connection.execute(message_table.insert(), messages)
+                connection.execute(conversation_table.update()
+                                   .where(conversation_table.c.id == bindparam('b_id'))
+                                   .values(last_message_id=bindparam('b_last_message_id')), last_messages)
+            totals['conversation'] += len(conversations)
+            totals['conversation_member'] += len(members)
+            totals['message'] += len(messages)
+        return totals
+
+    def generate(self, connection):
+        """
+        Insere o conjunto de dados completo.
+
+        Args:
+            connection (Connection): Conexão com o banco de dados (com o esquema já criado e vazio).
+
+        Returns:
+            dict: Quantidade de linhas inseridas por tabela.
+        """
+        # Quantidades sorteadas antes das linhas, para gravar os contadores desnormalizados junto com elas
+        notification_counts = array('i', (0 if i == 0 else self._long_tail(self.avg_notifications, 5000)
+                                          for i in range(self.users + 1)))
+        unread_counts = array('i', (self.rng.randint(0, min(10, total)) for total in notification_counts))
+        like_counts = array('i', (0 if i == 0 else self._long_tail(self.avg_likes, self.users)
+                                  for i in range(self.posts + 1)))
+        comment_counts = array('i', (0 if i == 0 else self._long_tail(self.avg_comments, 1000)
+                                     for i in range(self.posts + 1)))
+
+        # Um único hash para todos os usuários (o custo do hash não faz parte do benchmark)
+        password = bcrypt.generate_password_hash(PASSWORD)
+        rows = {}
+        rows['user'] = self._insert(connection, User.__table__, self._user_rows(password, unread_counts))
+        rows['friendship'] = self._insert(connection, Friendship.__table__, self._friendship_rows())
+        rows['friend_request'] = self._insert(connection, FriendRequest.__table__, self._friend_request_rows())
+        rows['post'] = self._insert(connection, Post.__table__, self._post_rows(like_counts, comment_counts))
+        rows['like'] = self._insert(connection, Like.__table__, self._like_rows(like_counts))
+        rows['comment'] = self._insert(connection, Comment.__table__, self._comment_rows(comment_counts))
+        rows['notification'] = self._insert(connection, Notification.__table__,
+                                            self._notification_rows(notification_counts, unread_counts))
+        rows.update(self._generate_conversations(connection))
+        return rows
+
+
+def create_schema(drop):
+    """
+    Cria o esquema da aplicação no banco configurado.
+
+    Args:
+        drop (bool): Remove as tabelas existentes antes de criar.
+    """
+    if drop:
+        db.drop_all()
+    db.create_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera um conjunto de dados sintéticos de rede social.')
+    parser.add_argument('--db', default=None, help='URI do banco (padrão: DATABASE_URL da aplicação).')
+    parser.add_argument('--users', type=int, default=10000, help='Quantidade de usuários.')
+    parser.add_argument('--seed', type=int, default=42, help='Semente dos dados sintéticos.')
+    parser.add_argument('--avg-friends', type=int, default=20, help='Média de amigos por usuário.')
+    parser.add_argument('--posts-per-user', type=float, default=10, help='Média de posts por usuário.')
+    parser.add_argument('--avg-likes', type=float, default=5, help='Média de likes por post.')
+    parser.add_argument('--avg-comments', type=float, default=2, help='Média de comentários por post.')
+    parser.add_argument('--conversations-per-user', type=float, default=3, help='Média de conversas por usuário.')
+    parser.add_argument('--avg-messages', type=float, default=10, help='Média de mensagens por conversa.')
+    parser.add_argument('--avg-notifications', type=float, default=20, help='Média de notificações por usuário.')
+    parser.add_argument('--batch-size', type=int, default=20000, help='Linhas por lote de inserção.')
+    parser.add_argument('--drop', action='store_true', help='Remove as tabelas existentes antes de gerar.')
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.db} if args.db else None)
+    generator = DatasetGenerator(args.users, seed=args.seed, avg_friends=args.avg_friends,
+                                 posts_per_user=args.posts_per_user, avg_likes=args.avg_likes,
+                                 avg_comments=args.avg_comments, conversations_per_user=args.conversations_per_user,
+                                 avg_messages=args.avg_messages, avg_notifications=args.avg_notifications,
+                                 batch_size=args.batch_size)
+    with app.app_context():
+        create_schema(args.drop)
+        started = time.perf_counter()
+        with db.engine.connect() as connection:
+            rows = generator.generate(connection)
+        elapsed = time.perf_counter() - started
+
+    total = sum(rows.values())
+    for table, count in rows.items():
+        print(f'{table:>20}: {count:>12,}')
+    print(f'Inserted {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)')
+    if app.config['FEED_FANOUT'] == 'write':
+        print('FEED_FANOUT=write: run "flask rebuild-timelines" to fill the timelines.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+
+Benchmark dos índices dos caminhos de consulta mais usados.
+
+Cria um banco SQLite com o esquema da aplicação sem os índices da migração
+c47d0e6f9a12, popula com ~1M de linhas, mede os planos de execução e as
+latências das consultas, cria os índices e mede novamente.
+
+Uso:
+    python -m benchmarks.indexes --rows 1000000 --db /tmp/bench_indexes.db
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from app import db
+from app import models  # noqa: F401  (registra as tabelas no metadata)
+
+# Índices adicionados pela migração c47d0e6f9a12
+BENCHMARKED_INDEXES = [
+    'uq_like_user_id_post_id',
+    'ix_like_post_id',
+    'ix_post_user_id_timestamp',
+    'ix_comment_post_id',
+    'ix_notification_user_id_timestamp',
+    'ix_friend_request_recipient_id_status',
+    'ix_message_sender_id_timestamp',
+    'ix_message_recipient_id_timestamp',
+]
+
+# Consultas dos caminhos quentes, na forma emitida pelas rotas
+HOT_QUERIES = [
+    ('feed', 'SELECT id FROM post WHERE user_id = :user_id OR user_id IN '
+             '(SELECT friend_id FROM friendship WHERE user_id = :user_id) '
+             'ORDER BY timestamp DESC, id DESC LIMIT 21'),
+    ('user posts', 'SELECT id FROM post WHERE user_id = :user_id ORDER BY timestamp DESC LIMIT 20'),
+    ('like lookup', 'SELECT id FROM "like" WHERE user_id = :user_id AND post_id = :post_id'),
+    ('liked in page', 'SELECT post_id FROM "like" WHERE user_id = :user_id AND post_id IN '
+                      '(:post_id, :post_id + 1, :post_id + 2, :post_id + 3, :post_id + 4)'),
+    ('post comments', 'SELECT id FROM comment WHERE post_id = :post_id'),
+    ('notification count', 'SELECT COUNT(*) FROM notification WHERE user_id = :user_id'),
+    ('pending requests', "SELECT id FROM friend_request WHERE recipient_id = :user_id AND status = 'pending'"),
+    ('sent messages', 'SELECT id FROM message WHERE sender_id = :user_id ORDER BY timestamp DESC LIMIT 50'),
+    ('received messages', 'SELECT id FROM message WHERE recipient_id = :user_id ORDER BY timestamp DESC LIMIT 50'),
+]
+
+# Fração do total de linhas destinada a cada tabela
+ROW_SHARES = {
+    'user': 0.01,
+    'friendship': 0.10,
+    'post': 0.25,
+    'like': 0.25,
+    'comment': 0.14,
+    'notification': 0.10,
+    'friend_request': 0.03,
+    'message': 0.12,
+}
+
+
+def create_schema(path):
+    """
+    Cria o banco com o esquema atual e remove os índices que serão medidos.
+
+    Args:
+        path (str): Caminho do arquivo SQLite.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    with engine.connect() as connection:
+        for name in BENCHMARKED_INDEXES:
+            connection.execute(f'DROP INDEX IF EXISTS {name}')
+    engine.dispose()
+
+
+def seed(connection, total_rows, rng):
+    """
+    Popula o banco com dados sintéticos.
+
+    Args:
+        connection (sqlite3.Connection): Conexão com o banco.
+        total_rows (int): Quantidade aproximada de linhas no total.
+        rng (random.Random): Gerador de números aleatórios com semente fixa.
+
+    Returns:
+        tuple: Quantidade de usuários e de posts criados.
+    """
+    counts = {table: max(1, int(total_rows * share)) for table, share in ROW_SHARES.items()}
+    users, posts = counts['user'], counts['post']
+    start = datetime(2024, 1, 1)
+
+    def moment():
+        # Mesmo formato de DateTime gravado pelo SQLAlchemy no SQLite
+        return str(start + timedelta(seconds=rng.randrange(365 * 24 * 3600), microseconds=rng.randrange(1, 10 ** 6)))
+
+    connection.executemany(
+        'INSERT INTO user (id, username, email, image_file, password) VALUES (?, ?, ?, ?, ?)',
+        ((i, f'user{i}', f'user{i}@example.com', 'default.jpg', 'x') for i in range(1, users + 1))
+    )
+    pairs = {(rng.randint(1, users), rng.randint(1, users)) for _ in range(counts['friendship'] // 2)}
+    connection.executemany(
+        'INSERT OR IGNORE INTO friendship (user_id, friend_id, timestamp) VALUES (?, ?, ?)',
+        ((a, b, moment()) for x, y in pairs if x != y for a, b in ((x, y), (y, x)))
+    )
+    connection.executemany(
+        'INSERT INTO post (id, title, date_posted, content, timestamp, user_id) VALUES (?, ?, ?, ?, ?, ?)',
+        ((i, f'post {i}', ts, 'content', ts, rng.randint(1, users)) for i in range(1, posts + 1) for ts in (moment(),))
+    )
+    likes = {(rng.randint(1, users), rng.randint(1, posts)) for _ in range(counts['like'])}
+    connection.executemany('INSERT INTO "like" (user_id, post_id) VALUES (?, ?)', likes)
+    connection.executemany(
+        'INSERT INTO comment (post_id, user_id, body) VALUES (?, ?, ?)',
+        ((rng.randint(1, posts), rng.randint(1, users), 'comment') for _ in range(counts['comment']))
+    )
+    connection.executemany(
+        'INSERT INTO notification (user_id, message, timestamp) VALUES (?, ?, ?)',
+        ((rng.randint(1, users), 'notification', moment()) for _ in range(counts['notification']))
+    )
+    connection.executemany(
+        'INSERT INTO friend_request (sender_id, recipient_id, timestamp, status) VALUES (?, ?, ?, ?)',
+        ((rng.randint(1, users), rng.randint(1, users), moment(), rng.choice(['pending', 'accepted', 'rejected']))
+         for _ in range(counts['friend_request']))
+    )
+    connection.executemany(
+        'INSERT INTO message (sender_id, recipient_id, body, timestamp) VALUES (?, ?, ?, ?)',
+        ((rng.randint(1, users), rng.randint(1, users), 'message', moment()) for _ in range(counts['message']))
+    )
+    connection.commit()
+    return users, posts
+
+
+def measure(connection, users, posts, repeat, rng):
+    """
+    Mede o plano de execução e a latência de cada consulta.
+
+    Args:
+        connection (sqlite3.Connection): Conexão com o banco.
+        users (int): Quantidade de usuários no banco.
+        posts (int): Quantidade de posts no banco.
+        repeat (int): Quantidade de execuções por consulta.
+        rng (random.Random): Gerador de números aleatórios com semente fixa.
+
+    Returns:
+        dict: {nome: (plano, p50 em ms, p99 em ms)}.
+    """
+    results = {}
+    for name, sql in HOT_QUERIES:
+        sample = {'user_id': 1, 'post_id': 1}
+        plan = '; '.join(row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {sql}', sample))
+        timings = []
+        for _ in range(repeat):
+            params = {'user_id': rng.randint(1, users), 'post_id': rng.randint(1, posts)}
+            started = time.perf_counter()
+            connection.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        results[name] = (plan, statistics.median(timings), timings[int(len(timings) * 0.99) - 1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos índices dos caminhos quentes.')
+    parser.add_argument('--rows', type=int, default=1000000, help='Quantidade aproximada de linhas no total.')
+    parser.add_argument('--db', default='bench_indexes.db', help='Arquivo SQLite usado no benchmark.')
+    parser.add_argument('--repeat', type=int, default=200, help='Execuções por consulta.')
+    parser.add_argument('--seed', type=int, default=42, help='Semente dos dados sintéticos.')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    create_schema(args.db)
+    connection = sqlite3.connect(args.db)
+
+    started = time.perf_counter()
+    users, posts = seed(connection, args.rows, rng)
+    print(f'Seeded {args.rows} rows in {time.perf_counter() - started:.1f}s')
+
+    connection.execute('ANALYZE')
+    before = measure(connection, users, posts, args.repeat, random.Random(args.seed))
+
+    # Cria os índices exatamente como definidos nos modelos
+    engine = create_engine(f'sqlite:///{args.db}')
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in BENCHMARKED_INDEXES:
+                index.create(engine)
+    engine.dispose()
+    connection.execute('ANALYZE')
+    after = measure(connection, users, posts, args.repeat, random.Random(args.seed))
+
+    for name, _ in HOT_QUERIES:
+        plan_before, p50_before, p99_before = before[name]
+        plan_after, p50_after, p99_after = after[name]
+        print(f'\n{name}')
+        print(f'  before: p50={p50_before:.3f}ms p99={p99_before:.3f}ms  {plan_before}')
+        print(f'  after:  p50={p50_after:.3f}ms p99={p99_after:.3f}ms  {plan_after}')
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
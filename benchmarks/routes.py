@@ -0,0 +1,261 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+
+Benchmark das rotas principais com o cliente de testes do Flask.
+
+Para cada rota, faz requisições como usuários sorteados do banco (gerado por benchmarks.dataset)
+e mede a latência (p50/p99), a quantidade de consultas SQL por requisição e o pico de memória
+alocada (tracemalloc, medido em uma passada separada para não distorcer as latências).
+
+Com --revisit cada cliente reenvia o ETag da resposta anterior (If-None-Match), como um navegador
+que volta à página; a fração de respostas 304 é informada.
+
+Com --save o resultado é gravado em JSON; com --baseline ele é comparado a um resultado anterior
+e o processo termina com código 1 se alguma rota piorar além de --tolerance (para uso no CI).
+
+Uso:
+    python -m benchmarks.routes --db sqlite:////tmp/bench.db --requests 200 --save bench.json
+    python -m benchmarks.routes --db sqlite:////tmp/bench.db --baseline bench.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from sqlalchemy import event, func
+from app import create_app, db
+from app.models import User, Post, ConversationMember
+
+# Rotas medidas: nome -> (método, função que monta a URL a partir do sorteio)
+ROUTES = {
+    'home': ('GET', lambda sample: '/home'),
+    'user_profile': ('GET', lambda sample: f"/user/{sample['username']}"),
+    'friends': ('GET', lambda sample: '/friends'),
+    'friend_requests': ('GET', lambda sample: '/friend_requests'),
+    'messages': ('GET', lambda sample: '/messages'),
+    'conversation': ('GET', lambda sample: f"/messages/{sample['partner']}"),
+    'notifications': ('GET', lambda sample: '/notifications'),
+    'like_post': ('POST', lambda sample: f"/like/{sample['post_id']}"),
+}
+
+# Métricas comparadas com o baseline (quanto maior, pior)
+COMPARED_METRICS = ('p50_ms', 'p99_ms', 'queries_avg', 'peak_kib')
+
+
+class QueryCounter:
+    """
+    Conta as instruções SQL executadas pelo engine.
+
+    Métodos:
+        reset(): Zera o contador.
+    """
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def percentile(values, fraction):
+    """
+    Retorna o percentil de uma lista de valores (método do valor mais próximo).
+
+    Args:
+        values (list): Valores medidos.
+        fraction (float): Percentil entre 0 e 1 (ex.: 0.99).
+
+    Returns:
+        float: Valor do percentil.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def logged_client(app, user_id):
+    """
+    Cria um cliente de testes já autenticado como o usuário (sem passar pelo hash da senha).
+
+    Args:
+        app (Flask): Aplicação Flask.
+        user_id (int): ID do usuário.
+
+    Returns:
+        FlaskClient: Cliente autenticado.
+    """
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+def draw_samples(count, rng):
+    """
+    Sorteia os usuários (e os parâmetros das rotas) usados nas requisições.
+
+    Args:
+        count (int): Quantidade de sorteios.
+        rng (random.Random): Gerador de números aleatórios com semente fixa.
+
+    Returns:
+        list: Sorteios com 'user_id', 'username', 'partner' (outro participante de uma conversa) e 'post_id'.
+    """
+    max_user = db.session.query(func.max(User.id)).scalar() or 0
+    max_post = db.session.query(func.max(Post.id)).scalar() or 0
+    if not max_user or not max_post:
+        raise SystemExit('Empty database: generate one with "python -m benchmarks.dataset".')
+    samples = []
+    for _ in range(count):
+        user = User.query.get(rng.randint(1, max_user))
+        member = ConversationMember.query.filter_by(user_id=user.id).first()
+        partner = member.other_user.username if member is not None else user.username
+        samples.append({'user_id': user.id, 'username': user.username, 'partner': partner,
+                        'post_id': rng.randint(1, max_post)})
+    db.session.remove()
+    return samples
+
+
+def run_route(app, name, samples, counter, warmup, memory_samples, revisit=False):
+    """
+    Mede uma rota.
+
+    Args:
+        app (Flask): Aplicação Flask.
+        name (str): Nome da rota em ROUTES.
+        samples (list): Sorteios de draw_samples.
+        counter (QueryCounter): Contador de consultas do engine.
+        warmup (int): Requisições descartadas antes da medição.
+        memory_samples (int): Requisições da passada com tracemalloc.
+        revisit (bool): Se as requisições reenviam o ETag da resposta anterior do mesmo cliente e URL.
+
+    Returns:
+        dict: Métricas da rota.
+    """
+    method, build_url = ROUTES[name]
+    clients = {sample['user_id']: logged_client(app, sample['user_id']) for sample in samples}
+    etags = {}  # (usuário, URL) -> ETag da última resposta
+
+    def request(sample):
+        url = build_url(sample)
+        headers = {}
+        if revisit and (sample['user_id'], url) in etags:
+            headers['If-None-Match'] = etags[(sample['user_id'], url)]
+        response = clients[sample['user_id']].open(url, method=method, headers=headers)
+        if response.status_code >= 500:
+            raise RuntimeError(f'{name} returned {response.status_code}')
+        if response.headers.get('ETag'):
+            etags[(sample['user_id'], url)] = response.headers['ETag']
+        return response
+
+    for sample in samples[:warmup]:
+        request(sample)
+
+    if revisit:
+        # Primeira visita de cada cliente, para que todas as requisições medidas sejam revisitas
+        for sample in samples:
+            request(sample)
+
+    latencies, queries, not_modified = [], [], 0
+    for sample in samples:
+        counter.reset()
+        started = time.perf_counter()
+        not_modified += request(sample).status_code == 304
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+
+    tracemalloc.start()
+    peak = 0
+    for sample in samples[:memory_samples]:
+        tracemalloc.reset_peak()
+        request(sample)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    return {
+        'requests': len(samples),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries_avg': round(statistics.mean(queries), 2),
+        'queries_max': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+        'not_modified': round(not_modified / len(samples), 3),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compara os resultados com um baseline.
+
+    Args:
+        results (dict): Métricas atuais por rota.
+        baseline (dict): Métricas anteriores por rota.
+        tolerance (float): Piora relativa aceita (ex.: 0.2 = 20%).
+
+    Returns:
+        list: Descrições das regressões encontradas.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            # Consultas são exatas; tempos e memória variam entre execuções
+            limit = previous[metric] if metric == 'queries_avg' else previous[metric] * (1 + tolerance)
+            if metrics[metric] > limit + 1e-9:
+                regressions.append(f'{name}: {metric} {previous[metric]} -> {metrics[metric]}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das rotas principais.')
+    parser.add_argument('--db', default=None, help='URI do banco (padrão: DATABASE_URL da aplicação).')
+    parser.add_argument('--routes', nargs='*', choices=sorted(ROUTES), default=list(ROUTES), help='Rotas medidas.')
+    parser.add_argument('--requests', type=int, default=200, help='Requisições medidas por rota.')
+    parser.add_argument('--warmup', type=int, default=20, help='Requisições descartadas por rota.')
+    parser.add_argument('--memory-samples', type=int, default=20, help='Requisições da passada de memória por rota.')
+    parser.add_argument('--revisit', action='store_true', help='Reenvia o ETag da resposta anterior (requisições condicionais).')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do sorteio dos usuários.')
+    parser.add_argument('--save', help='Grava os resultados em um arquivo JSON.')
+    parser.add_argument('--baseline', help='Arquivo JSON de uma execução anterior para comparação.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Piora relativa aceita em relação ao baseline.')
+    args = parser.parse_args()
+
+    config = {'WTF_CSRF_ENABLED': False}
+    if args.db:
+        config['SQLALCHEMY_DATABASE_URI'] = args.db
+    app = create_app(config)
+
+    results = {}
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+        samples = draw_samples(args.requests, random.Random(args.seed))
+    for name in args.routes:
+        results[name] = run_route(app, name, samples, counter, args.warmup, args.memory_samples, args.revisit)
+        metrics = results[name]
+        print(f"{name:>16}  p50={metrics['p50_ms']:>8.2f}ms  p99={metrics['p99_ms']:>8.2f}ms  "
+              f"queries={metrics['queries_avg']:>6.2f} (max {metrics['queries_max']})  peak={metrics['peak_kib']:>9.1f}KiB  "
+              f"304={metrics['not_modified']:>4.0%}")
+
+    if args.save:
+        with open(args.save, 'w') as target:
+            json.dump(results, target, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as source:
+            regressions = compare(results, json.load(source), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
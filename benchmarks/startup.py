@@ -0,0 +1,190 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+
+Benchmark da inicialização da aplicação e da memória dos workers.
+
+Partida a frio: um interpretador novo importa o pacote, cria a aplicação (create_app) e atende a
+primeira requisição, com o cache de bytecode dos templates vazio e já preenchido.
+
+Workers: --workers processos criados por fork atendem --requests requisições cada, com a aplicação
+pré-carregada no processo mestre (como o gunicorn com preload_app) ou importada por cada worker
+depois do fork (sem preload). Para cada modo são informados o tempo do fork até a primeira resposta
+e a memória privada (USS) e proporcional (PSS) de cada worker, lidas de /proc (somente Linux).
+
+Uso:
+    python -m benchmarks.startup --runs 5 --workers 4
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Página atendida nas medições: renderiza templates sem consultar o banco
+PROBE_URL = '/login'
+
+
+def memory_usage(pid):
+    """
+    Lê a memória de um processo em /proc/<pid>/smaps_rollup.
+
+    Args:
+        pid (int): ID do processo.
+
+    Returns:
+        dict: RSS, PSS e USS (memória privada) em KiB.
+    """
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as source:
+        for line in source:
+            name, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[name] = int(rest.split()[0])
+    return {'rss_kib': values['Rss'], 'pss_kib': values['Pss'],
+            'uss_kib': values['Private_Clean'] + values['Private_Dirty']}
+
+
+def cold_start():
+    """
+    Importa o pacote, cria a aplicação e atende a primeira requisição (executada em um interpretador novo).
+
+    Returns:
+        dict: Tempos de cada etapa, em milissegundos, e a memória do processo.
+    """
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app({'WTF_CSRF_ENABLED': False})
+    created = time.perf_counter()
+    status = app.test_client().get(PROBE_URL).status_code
+    finished = time.perf_counter()
+    if status != 200:
+        raise RuntimeError(f'{PROBE_URL} returned {status}')
+    return dict(memory_usage(os.getpid()), import_ms=(imported - started) * 1000,
+                create_app_ms=(created - imported) * 1000, first_request_ms=(finished - created) * 1000,
+                total_ms=(finished - started) * 1000)
+
+
+def fork_workers(count, requests, preload):
+    """
+    Cria workers por fork e mede o tempo até a primeira resposta e a memória de cada um.
+
+    Os workers continuam vivos até que todos tenham sido medidos, para que o PSS reflita as
+    páginas compartilhadas entre eles.
+
+    Args:
+        count (int): Quantidade de workers.
+        requests (int): Requisições atendidas por worker antes da medição de memória.
+        preload (bool): Se a aplicação é criada no processo mestre, antes do fork.
+
+    Returns:
+        list: Medições de cada worker.
+    """
+    if preload:
+        from app import create_app, preload as preload_app
+        app = create_app({'WTF_CSRF_ENABLED': False})
+        preload_app(app)
+        gc.freeze()  # Como no hook when_ready de gunicorn.conf.py
+
+    release_read, release_write = os.pipe()
+    workers = []
+    for _ in range(count):
+        result_read, result_write = os.pipe()
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(release_write)
+            os.close(result_read)
+            if not preload:
+                from app import create_app
+                app = create_app({'WTF_CSRF_ENABLED': False})
+            client = app.test_client()
+            client.get(PROBE_URL)
+            boot_ms = (time.perf_counter() - forked) * 1000
+            for _ in range(requests - 1):
+                client.get(PROBE_URL)
+            os.write(result_write, json.dumps({'boot_ms': boot_ms}).encode())
+            os.close(result_write)
+            # Espera o processo mestre medir a memória de todos os workers
+            os.read(release_read, 1)
+            os._exit(0)
+        os.close(result_write)
+        workers.append((pid, result_read))
+
+    results = []
+    for pid, result_read in workers:
+        with os.fdopen(result_read) as source:
+            results.append(dict(json.loads(source.read()), pid=pid))
+    for result in results:
+        result.update(memory_usage(result['pid']))
+    os.close(release_write)
+    for pid, _ in workers:
+        os.waitpid(pid, 0)
+    return results
+
+
+def run_child(arguments, env):
+    # Executa uma medição em um interpretador novo e retorna o JSON impresso por ele
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', *arguments], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    wall_ms = (time.perf_counter() - started) * 1000
+    return json.loads(output.strip().splitlines()[-1]), wall_ms
+
+
+def summarize_cold(label, runs):
+    print(f"{label:>32}  import={statistics.median(r['import_ms'] for r, _ in runs):>7.1f}ms  "
+          f"create_app={statistics.median(r['create_app_ms'] for r, _ in runs):>6.1f}ms  "
+          f"first request={statistics.median(r['first_request_ms'] for r, _ in runs):>6.1f}ms  "
+          f"process={statistics.median(wall for _, wall in runs):>7.1f}ms  "
+          f"rss={statistics.median(r['rss_kib'] for r, _ in runs) / 1024:>6.1f}MiB")
+
+
+def summarize_workers(label, workers):
+    print(f"{label:>32}  boot={statistics.median(w['boot_ms'] for w in workers):>7.1f}ms  "
+          f"uss={statistics.mean(w['uss_kib'] for w in workers) / 1024:>6.1f}MiB  "
+          f"pss={statistics.mean(w['pss_kib'] for w in workers) / 1024:>6.1f}MiB  "
+          f"rss={statistics.mean(w['rss_kib'] for w in workers) / 1024:>6.1f}MiB  (per worker)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da inicialização da aplicação e da memória dos workers.')
+    parser.add_argument('--runs', type=int, default=5, help='Partidas a frio medidas em cada modo.')
+    parser.add_argument('--workers', type=int, default=4, help='Workers criados por fork em cada modo.')
+    parser.add_argument('--requests', type=int, default=20, help='Requisições por worker antes da medição de memória.')
+    parser.add_argument('--child', choices=('cold', 'preload', 'no-preload'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == 'cold':
+        print(json.dumps(cold_start()))
+        return
+    if args.child:
+        print(json.dumps(fork_workers(args.workers, args.requests, args.child == 'preload')))
+        return
+
+    cache = tempfile.mkdtemp(prefix='jinja-bench-')
+    env = dict(os.environ, JINJA_BYTECODE_CACHE=cache)
+    env.setdefault('SECRET_KEY', 'benchmark')
+    try:
+        cold = []
+        for _ in range(args.runs):
+            shutil.rmtree(cache, ignore_errors=True)
+            cold.append(run_child(['--child', 'cold'], env))
+        summarize_cold('cold start, empty template cache', cold)
+        summarize_cold('cold start, warm template cache', [run_child(['--child', 'cold'], env) for _ in range(args.runs)])
+
+        options = ['--workers', str(args.workers), '--requests', str(args.requests)]
+        summarize_workers('workers without preload', run_child(['--child', 'no-preload', *options], env)[0])
+        summarize_workers('workers with preload', run_child(['--child', 'preload', *options], env)[0])
+    finally:
+        shutil.rmtree(cache, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+
+Configuração do gunicorn para produção.
+
+A aplicação é carregada uma única vez no processo mestre (preload_app) e os workers são criados
+por fork: cada worker começa a atender imediatamente, sem reimportar os módulos nem recompilar os
+templates, e as páginas de memória do código carregado são compartilhadas entre eles.
+"""
+
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Workers gevent: cada conexão é um greenlet, de modo que as conexões SSE abertas (/events) não
+# ocupam uma thread cada; worker_connections limita as conexões simultâneas por worker
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+threads = int(os.getenv('GUNICORN_THREADS', 4))  # Apenas para o worker gthread
+if worker_class == 'gevent':
+    # O patch precisa vir antes do pré-carregamento da aplicação, para que os locks, filas e
+    # sockets criados ao importá-la já sejam cooperativos
+    from gevent import monkey
+    monkey.patch_all()
+
+wsgi_app = 'wsgi:app'
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# A aplicação (app/config.py, SERVER_*) ajusta os eventos em tempo real aos workers configurados
+os.environ.update(WEB_CONCURRENCY=str(workers), GUNICORN_WORKER_CLASS=worker_class, GUNICORN_THREADS=str(threads))
+
+# Métricas do Prometheus compartilhadas entre os workers (app.metrics): a pasta é esvaziada a cada
+# início do servidor, antes do pré-carregamento da aplicação
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'app-metrics'))
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+# Reinicia cada worker após N requisições (0 desativa); o jitter evita que todos reiniciem juntos
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+preload_app = True
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+def when_ready(server):
+    # Chamado no mestre depois do carregamento da aplicação e antes do fork dos workers:
+    # os objetos já criados vão para a geração permanente do coletor de lixo, que deixa de
+    # percorrê-los nos workers (e de copiar as páginas compartilhadas ao tocá-los)
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    # Os contadores do worker encerrado continuam somados; só os valores "ao vivo" dele são descartados
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
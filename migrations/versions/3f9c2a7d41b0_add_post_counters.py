@@ -0,0 +1,32 @@
+"""add like_count and comment_count to post
+
+Revision ID: 3f9c2a7d41b0
+Revises: 0c5e8a2b7f41
+Create Date: 2026-10-18 10:12:04.311520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2a7d41b0'
+down_revision = '0c5e8a2b7f41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Preenche os contadores a partir das tabelas existentes
+    op.execute('UPDATE post SET like_count = (SELECT COUNT(*) FROM "like" WHERE "like".post_id = post.id)')
+    op.execute('UPDATE post SET comment_count = (SELECT COUNT(*) FROM comment WHERE comment.post_id = post.id)')
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('like_count')
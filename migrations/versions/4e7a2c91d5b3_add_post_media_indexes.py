@@ -0,0 +1,27 @@
+"""add indexes on post media files
+
+Revision ID: 4e7a2c91d5b3
+Revises: 9d3b6f02a8e5
+Create Date: 2026-10-18 17:05:41.220417
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7a2c91d5b3'
+down_revision = '9d3b6f02a8e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_post_image_file', 'post', ['image_file'], unique=False)
+    op.create_index('ix_post_audio_file', 'post', ['audio_file'], unique=False)
+    op.create_index('ix_post_video_file', 'post', ['video_file'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_post_video_file', table_name='post')
+    op.drop_index('ix_post_audio_file', table_name='post')
+    op.drop_index('ix_post_image_file', table_name='post')
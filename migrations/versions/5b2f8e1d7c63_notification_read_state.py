@@ -0,0 +1,38 @@
+"""add notification read_at and per-user unread counter
+
+Revision ID: 5b2f8e1d7c63
+Revises: c47d0e6f9a12
+Create Date: 2026-10-18 13:20:41.557093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2f8e1d7c63'
+down_revision = 'c47d0e6f9a12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('read_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_notification_timestamp', 'notification', ['timestamp'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_notification_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Todas as notificações existentes começam como não lidas
+    op.execute('UPDATE "user" SET unread_notification_count = '
+               '(SELECT COUNT(*) FROM notification WHERE notification.user_id = "user".id)')
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('unread_notification_count')
+
+    op.drop_index('ix_notification_timestamp', table_name='notification')
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_column('read_at')
@@ -0,0 +1,26 @@
+"""add user.changed_at change stamp
+
+Revision ID: 6e0b2d94c7a3
+Revises: a7c3e9f15d62
+Create Date: 2026-10-18 23:12:47.305916
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e0b2d94c7a3'
+down_revision = 'a7c3e9f15d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('changed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('changed_at')
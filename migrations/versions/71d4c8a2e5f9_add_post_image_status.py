@@ -0,0 +1,26 @@
+"""add image_status to post
+
+Revision ID: 71d4c8a2e5f9
+Revises: e93a6c05f1b7
+Create Date: 2026-10-18 15:52:08.640371
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '71d4c8a2e5f9'
+down_revision = 'e93a6c05f1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_status', sa.String(length=10), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('image_status')
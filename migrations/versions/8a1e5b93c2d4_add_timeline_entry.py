@@ -0,0 +1,33 @@
+"""add timeline_entry table for fan-out-on-write feeds
+
+Revision ID: 8a1e5b93c2d4
+Revises: 3f9c2a7d41b0
+Create Date: 2026-10-18 11:03:27.904211
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a1e5b93c2d4'
+down_revision = '3f9c2a7d41b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('timeline_entry',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    op.create_index('ix_timeline_entry_user_timestamp', 'timeline_entry', ['user_id', 'timestamp', 'post_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_timeline_entry_user_timestamp', table_name='timeline_entry')
+    op.drop_table('timeline_entry')
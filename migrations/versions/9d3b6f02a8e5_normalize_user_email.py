@@ -0,0 +1,29 @@
+"""normalize user.email (trimmed, lower case)
+
+Revision ID: 9d3b6f02a8e5
+Revises: 6e0b2d94c7a3
+Create Date: 2026-10-18 16:40:12.518203
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3b6f02a8e5'
+down_revision = '6e0b2d94c7a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # O login busca o e-mail normalizado; contas que colidiriam após a normalização ficam como estão
+    op.execute(
+        'UPDATE "user" SET email = lower(trim(email)) '
+        'WHERE email <> lower(trim(email)) AND NOT EXISTS ('
+        'SELECT 1 FROM "user" AS other WHERE other.id <> "user".id AND lower(trim(other.email)) = lower(trim("user".email)))'
+    )
+
+
+def downgrade():
+    # A grafia original dos e-mails não é guardada
+    pass
@@ -0,0 +1,32 @@
+"""widen user.password for scrypt and argon2 hashes
+
+Revision ID: a7c3e9f15d62
+Revises: f2c95b7a0e18
+Create Date: 2026-10-18 21:40:12.518304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f15d62'
+down_revision = 'f2c95b7a0e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=sa.String(length=60),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=60),
+               existing_nullable=False)
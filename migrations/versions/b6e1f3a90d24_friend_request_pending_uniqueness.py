@@ -0,0 +1,32 @@
+"""unique pending friend request per pair
+
+Revision ID: b6e1f3a90d24
+Revises: 71d4c8a2e5f9
+Create Date: 2026-10-18 16:31:47.208115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1f3a90d24'
+down_revision = '71d4c8a2e5f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mantém apenas o pedido pendente mais antigo de cada par antes de criar o índice único
+    op.execute(
+        "DELETE FROM friend_request WHERE status = 'pending' AND id NOT IN ("
+        "SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM friend_request "
+        "WHERE status = 'pending' GROUP BY sender_id, recipient_id) AS oldest)"
+    )
+    op.create_index('uq_friend_request_pending_pair', 'friend_request', ['sender_id', 'recipient_id'], unique=True,
+                    sqlite_where=sa.text("status = 'pending'"),
+                    postgresql_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    op.drop_index('uq_friend_request_pending_pair', table_name='friend_request')
@@ -0,0 +1,30 @@
+"""add friend_request.responded_at and the purge index
+
+Revision ID: b81f4d6a2c07
+Revises: 4e7a2c91d5b3
+Create Date: 2026-10-18 18:02:36.718254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f4d6a2c07'
+down_revision = '4e7a2c91d5b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('friend_request', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('responded_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_friend_request_status_responded_at', ['status', 'responded_at'], unique=False)
+    # A data da resposta dos pedidos existentes não foi guardada: usa a do envio, a única disponível
+    op.execute("UPDATE friend_request SET responded_at = timestamp WHERE status <> 'pending'")
+
+
+def downgrade():
+    with op.batch_alter_table('friend_request', schema=None) as batch_op:
+        batch_op.drop_index('ix_friend_request_status_responded_at')
+        batch_op.drop_column('responded_at')
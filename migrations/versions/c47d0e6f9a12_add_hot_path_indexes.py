@@ -0,0 +1,42 @@
+"""add indexes for hot lookup paths and unique like per user and post
+
+Revision ID: c47d0e6f9a12
+Revises: 8a1e5b93c2d4
+Create Date: 2026-10-18 11:48:55.120734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d0e6f9a12'
+down_revision = '8a1e5b93c2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove likes duplicados antes de criar o índice único e corrige os contadores
+    op.execute('DELETE FROM "like" WHERE id NOT IN (SELECT MIN(id) FROM "like" GROUP BY user_id, post_id)')
+    op.execute('UPDATE post SET like_count = (SELECT COUNT(*) FROM "like" WHERE "like".post_id = post.id)')
+
+    op.create_index('uq_like_user_id_post_id', 'like', ['user_id', 'post_id'], unique=True)
+    op.create_index('ix_like_post_id', 'like', ['post_id'], unique=False)
+    op.create_index('ix_post_user_id_timestamp', 'post', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_comment_post_id', 'comment', ['post_id'], unique=False)
+    op.create_index('ix_notification_user_id_timestamp', 'notification', ['user_id', 'timestamp'], unique=False)
+    op.create_index('ix_friend_request_recipient_id_status', 'friend_request', ['recipient_id', 'status'], unique=False)
+    op.create_index('ix_message_sender_id_timestamp', 'message', ['sender_id', 'timestamp'], unique=False)
+    op.create_index('ix_message_recipient_id_timestamp', 'message', ['recipient_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_message_recipient_id_timestamp', table_name='message')
+    op.drop_index('ix_message_sender_id_timestamp', table_name='message')
+    op.drop_index('ix_friend_request_recipient_id_status', table_name='friend_request')
+    op.drop_index('ix_notification_user_id_timestamp', table_name='notification')
+    op.drop_index('ix_comment_post_id', table_name='comment')
+    op.drop_index('ix_post_user_id_timestamp', table_name='post')
+    op.drop_index('ix_like_post_id', table_name='like')
+    op.drop_index('uq_like_user_id_post_id', table_name='like')
@@ -0,0 +1,54 @@
+"""add FTS5 search indexes for posts, comments and users
+
+Revision ID: d8a4c71e2b90
+Revises: b6e1f3a90d24
+Create Date: 2026-10-18 17:04:12.518930
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a4c71e2b90'
+down_revision = 'b6e1f3a90d24'
+branch_labels = None
+depends_on = None
+
+TABLES = {
+    'post_fts': ('post', ('title', 'content'), "tokenize='unicode61 remove_diacritics 2'"),
+    'comment_fts': ('comment', ('body',), "tokenize='unicode61 remove_diacritics 2'"),
+    'user_fts': ('user', ('username', 'about_me'), "tokenize=\"unicode61 remove_diacritics 2 tokenchars '_.'\", prefix='1 2 3'"),
+}
+
+
+def upgrade():
+    # FTS5 só existe no SQLite; em outros bancos a busca usa consultas LIKE
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for fts_table, (source, columns, options) in TABLES.items():
+        column_list = ', '.join(columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        delete_old = (f"INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) "
+                      f"VALUES ('delete', old.id, {old_values});")
+        insert_new = f"INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});"
+
+        op.execute(f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+                   f"{column_list}, content='{source}', content_rowid='id', {options})")
+        op.execute(f'CREATE TRIGGER {fts_table}_insert AFTER INSERT ON "{source}" BEGIN {insert_new} END')
+        op.execute(f'CREATE TRIGGER {fts_table}_delete AFTER DELETE ON "{source}" BEGIN {delete_old} END')
+        op.execute(f'CREATE TRIGGER {fts_table}_update AFTER UPDATE OF {column_list} ON "{source}" '
+                   f'BEGIN {delete_old} {insert_new} END')
+        # Indexa as linhas já existentes
+        op.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for fts_table in TABLES:
+        for suffix in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}')
+        op.execute(f'DROP TABLE IF EXISTS {fts_table}')
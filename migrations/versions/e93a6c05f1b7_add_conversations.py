@@ -0,0 +1,75 @@
+"""add conversations and per-user inbox entries for messages
+
+Revision ID: e93a6c05f1b7
+Revises: 5b2f8e1d7c63
+Create Date: 2026-10-18 14:37:12.086442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93a6c05f1b7'
+down_revision = '5b2f8e1d7c63'
+branch_labels = None
+depends_on = None
+
+# Par ordenado (menor ID, maior ID) dos participantes de uma mensagem
+USER_A = 'CASE WHEN sender_id < recipient_id THEN sender_id ELSE recipient_id END'
+USER_B = 'CASE WHEN sender_id < recipient_id THEN recipient_id ELSE sender_id END'
+
+
+def upgrade():
+    op.create_table('conversation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_a_id', sa.Integer(), nullable=False),
+    sa.Column('user_b_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=True),
+    sa.Column('last_message_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['last_message_id'], ['message.id'], name='fk_conversation_last_message_id'),
+    sa.ForeignKeyConstraint(['user_a_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['user_b_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_a_id', 'user_b_id', name='uq_conversation_user_a_id_user_b_id')
+    )
+    op.create_table('conversation_member',
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('other_user_id', sa.Integer(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_message_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversation.id'], ),
+    sa.ForeignKeyConstraint(['other_user_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('conversation_id', 'user_id')
+    )
+    op.create_index('ix_conversation_member_user_id_last_message_at', 'conversation_member', ['user_id', 'last_message_at', 'conversation_id'], unique=False)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('conversation_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_message_conversation_id', 'conversation', ['conversation_id'], ['id'])
+    op.create_index('ix_message_conversation_id_timestamp', 'message', ['conversation_id', 'timestamp', 'id'], unique=False)
+
+    # Cria uma conversa por par de usuários que já trocou mensagens
+    op.execute(f'INSERT INTO conversation (user_a_id, user_b_id, last_message_at) '
+               f'SELECT {USER_A}, {USER_B}, MAX(timestamp) FROM message GROUP BY {USER_A}, {USER_B}')
+    op.execute(f'UPDATE message SET conversation_id = (SELECT conversation.id FROM conversation '
+               f'WHERE conversation.user_a_id = {USER_A} AND conversation.user_b_id = {USER_B})')
+    op.execute('UPDATE conversation SET last_message_id = (SELECT message.id FROM message '
+               'WHERE message.conversation_id = conversation.id ORDER BY message.timestamp DESC, message.id DESC LIMIT 1)')
+    op.execute('INSERT INTO conversation_member (conversation_id, user_id, other_user_id, unread_count, last_message_at) '
+               'SELECT id, user_a_id, user_b_id, 0, last_message_at FROM conversation')
+    op.execute('INSERT INTO conversation_member (conversation_id, user_id, other_user_id, unread_count, last_message_at) '
+               'SELECT id, user_b_id, user_a_id, 0, last_message_at FROM conversation WHERE user_b_id != user_a_id')
+
+
+def downgrade():
+    op.drop_index('ix_message_conversation_id_timestamp', table_name='message')
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_message_conversation_id', type_='foreignkey')
+        batch_op.drop_column('conversation_id')
+
+    op.drop_index('ix_conversation_member_user_id_last_message_at', table_name='conversation_member')
+    op.drop_table('conversation_member')
+    op.drop_table('conversation')
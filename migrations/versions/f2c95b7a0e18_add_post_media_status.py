@@ -0,0 +1,28 @@
+"""add video_status and audio_status to post
+
+Revision ID: f2c95b7a0e18
+Revises: d8a4c71e2b90
+Create Date: 2026-10-18 18:12:36.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c95b7a0e18'
+down_revision = 'd8a4c71e2b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('audio_status', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('video_status', sa.String(length=10), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('video_status')
+        batch_op.drop_column('audio_status')
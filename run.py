@@ -1,14 +1,14 @@
 """
 Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+
+Servidor de desenvolvimento. Em produção use o gunicorn (gunicorn -c gunicorn.conf.py), e
+crie ou atualize o banco com "flask db upgrade".
 """
 
-from app import app, db
-from flask_migrate import Migrate
-from app import app, db  # Certifique-se de que você está importando seu app e banco de dados
+import os
+from app import create_app
 
-migrate = Migrate(app, db)
+app = create_app()
 
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG', 'true').lower() == 'true')
@@ -0,0 +1,46 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import pytest
+from app import create_app, db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    Aplicação de teste com um banco SQLite temporário e as tabelas criadas.
+    """
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'SECRET_KEY': 'test',
+        'JINJA_BYTECODE_CACHE': '',
+        'MEDIA_ROOT': str(tmp_path / 'media'),
+        'UPLOAD_INCOMING_FOLDER': str(tmp_path / 'uploads'),
+        'BCRYPT_LOG_ROUNDS': 4,  # Hashes rápidos nos testes
+        'PASSWORD_HASH_WORKERS': 0,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    """
+    Autentica o cliente de teste como um usuário, sem passar pelo formulário de login.
+    """
+    def authenticate(user):
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+    return authenticate
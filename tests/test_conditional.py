@@ -0,0 +1,73 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import pytest
+from app import db
+from app.models import User, Post, Friendship
+from app.notifications import notify
+
+
+@pytest.fixture
+def users(app):
+    ana, bruno = users = [User(username=name, email=f'{name}@example.com', password='x') for name in ('ana', 'bruno')]
+    db.session.add_all(users)
+    db.session.commit()
+    db.session.add_all([Friendship(user_id=ana.id, friend_id=bruno.id), Friendship(user_id=bruno.id, friend_id=ana.id),
+                        Post(title='t', content='c', user_id=bruno.id)])
+    db.session.commit()
+    return users
+
+
+def revisit(client, etag):
+    return client.get('/', headers={'If-None-Match': etag})
+
+
+def test_home_revisit_is_not_modified(client, login, users):
+    login(users[0])
+    first = client.get('/')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] in ('private, no-cache', 'no-cache, private')
+    assert 'Cookie' in first.headers['Vary']
+
+    second = revisit(client, first.headers['ETag'])
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+
+
+@pytest.mark.parametrize('change', ['like', 'notification', 'profile'])
+def test_home_etag_changes_with_the_page(client, login, users, change):
+    ana, bruno = users
+    login(ana)
+    etag = client.get('/').headers['ETag']
+
+    if change == 'like':
+        # Like de um amigo no post exibido no feed (contagem e estado do botão)
+        login(bruno)
+        client.post(f'/like/{Post.query.one().id}')
+        login(ana)
+    elif change == 'notification':
+        notify(ana.id, 'hello')
+        db.session.commit()
+    else:
+        # Amigo muda de nome (autor exibido nos cartões)
+        login(bruno)
+        client.post('/edit_profile', data={'username': 'bruna', 'about_me': ''})
+        login(ana)
+        client.get('/user/bruna')  # Consome a mensagem flash, que desativa os validadores
+
+    response = revisit(client, etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_etags_differ_between_users(client, login, users):
+    ana, bruno = users
+    login(ana)
+    etag = client.get('/').headers['ETag']
+
+    # Mesmo navegador, outro usuário: o ETag da página de ana não vale para bruno
+    login(bruno)
+    response = revisit(client, etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,39 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from app import db
+from app.events import broker, stream_topics
+from app.models import User, Post, Friendship
+
+
+def test_like_is_published_once_to_the_author_audience(app, client, login, monkeypatch):
+    author, friend, stranger = (User(username=name, email=f'{name}@example.com', password='x')
+                                for name in ('author', 'friend', 'stranger'))
+    db.session.add_all([author, friend, stranger])
+    db.session.flush()
+    db.session.add_all([Friendship(user_id=author.id, friend_id=friend.id),
+                        Friendship(user_id=friend.id, friend_id=author.id)])
+    post = Post(title='t', content='c', author=author)
+    db.session.add(post)
+    db.session.commit()
+    subscriptions = {user.username: broker.subscribe(stream_topics(user.id)) for user in (author, friend, stranger)}
+    post_id, author_id = post.id, author.id
+    published = []
+    original_publish = broker.publish
+
+    def count_publish(topic, name, data):
+        published.append(topic)
+        original_publish(topic, name, data)
+
+    monkeypatch.setattr(broker._get_current_object(), 'publish', count_publish)
+    login(friend)
+    db.session.remove()
+    assert client.post(f'/like/{post_id}').status_code == 200
+
+    # A notificação do autor e um único evento de contagem, no tópico do autor (nenhum por amigo)
+    assert published == [f'user:{author_id}', f'author:{author_id}']
+    assert subscriptions['author'].get(timeout=0)[0] == 'notification'
+    assert subscriptions['author'].get(timeout=0)[1] == {'post_id': post_id, 'likes_count': 1}
+    assert subscriptions['friend'].get(timeout=0)[1] == {'post_id': post_id, 'likes_count': 1}
+    assert subscriptions['stranger'].get(timeout=0) is None
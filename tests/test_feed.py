@@ -0,0 +1,73 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from sqlalchemy import event
+from app import db
+from app.models import User, Post, Comment, Like, Friendship
+
+
+def populate(friends, posts_per_friend=2):
+    """
+    Cria um usuário com amigos; cada amigo tem posts, com o like do dono do feed e comentários de
+    outros usuários (autores e comentaristas diferentes, para que uma carga não esconda a outra).
+
+    Returns:
+        User: Dono do feed.
+    """
+    owner = User(username='owner', email='owner@example.com', password='x')
+    authors = [User(username=f'friend{i}', email=f'friend{i}@example.com', password='x') for i in range(friends)]
+    commenters = [User(username=f'reader{i}', email=f'reader{i}@example.com', password='x') for i in range(friends)]
+    db.session.add_all([owner] + authors + commenters)
+    db.session.flush()
+    for author in authors:
+        db.session.add_all([Friendship(user_id=owner.id, friend_id=author.id),
+                            Friendship(user_id=author.id, friend_id=owner.id)])
+        for n in range(posts_per_friend):
+            post = Post(title=f'{author.username} {n}', content='content', author=author, comment_count=len(commenters))
+            db.session.add(post)
+            db.session.flush()
+            db.session.add_all([Comment(post_id=post.id, user_id=commenter.id, body='comment') for commenter in commenters])
+            db.session.add(Like(post_id=post.id, user_id=owner.id))
+    db.session.commit()
+    return owner
+
+
+def count_feed_statements(client, login, friends):
+    """
+    Conta as instruções SQL executadas em uma requisição da página inicial.
+
+    Returns:
+        int: Quantidade de instruções.
+    """
+    login(populate(friends))
+    # A requisição usa a mesma sessão: sem isso os objetos criados acima evitariam as consultas
+    db.session.remove()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get('/')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    assert response.status_code == 200
+    assert response.data.count(b'comment') >= friends
+    return len(statements)
+
+
+def test_feed_statement_count_is_constant(app, client, login):
+    """
+    O número de consultas do feed não depende da quantidade de posts, autores, comentários e likes da página.
+    """
+    # Sem o cache de fragmentos os comentários de todos os posts são carregados (pior caso)
+    app.config.update(FRAGMENT_CACHE_SIZE=0, CONDITIONAL_PAGES=False)
+    small = count_feed_statements(client, login, friends=1)
+
+    db.drop_all()
+    db.create_all()
+    large = count_feed_statements(client, login, friends=8)
+
+    assert small == large
@@ -0,0 +1,72 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import db
+from app.friendships import send_request, accept_requests, reject_requests, purge_requests
+from app.models import User, FriendRequest, Friendship
+
+
+def create_users(*names):
+    users = [User(username=name, email=f'{name}@example.com', password='x') for name in names]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def test_duplicate_requests_are_suppressed(app):
+    ana, bruno = create_users('ana', 'bruno')
+
+    assert send_request(ana, ana) == 'self'
+    assert send_request(ana, bruno) == 'sent'
+    assert send_request(ana, bruno) == 'pending'
+    assert send_request(bruno, ana) == 'incoming'
+    assert FriendRequest.query.count() == 1
+
+    accept_requests(bruno, [FriendRequest.query.one().id])
+    assert send_request(ana, bruno) == 'friends'
+    assert FriendRequest.query.count() == 1
+
+
+def test_accept_rolls_back_when_a_request_was_answered_meanwhile(app):
+    ana, bruno, carla = create_users('ana', 'bruno', 'carla')
+    send_request(ana, carla)
+    send_request(bruno, carla)
+    request_ids = [request.id for request in FriendRequest.query.order_by(FriendRequest.id)]
+
+    # Outra requisição rejeita um dos pedidos entre a leitura e a atualização condicional
+    rejected = []
+    def reject_concurrently(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE friend_request') and not rejected:
+            rejected.append(request_ids[0])
+            with db.engine.connect() as other:
+                other.execute(FriendRequest.__table__.update().where(FriendRequest.id == request_ids[0])
+                              .values(status='rejected'))
+    event.listen(db.engine, 'before_cursor_execute', reject_concurrently)
+
+    assert accept_requests(carla, request_ids) == []
+    event.remove(db.engine, 'before_cursor_execute', reject_concurrently)
+    db.session.expire_all()
+    assert [request.status for request in FriendRequest.query.order_by(FriendRequest.id)] == ['rejected', 'pending']
+    assert Friendship.query.count() == 0
+
+
+def test_purge_counts_from_the_response(app):
+    ana, bruno, carla, davi = create_users('ana', 'bruno', 'carla', 'davi')
+    for sender in (bruno, carla, davi):
+        send_request(sender, ana)
+    old, recent, pending = FriendRequest.query.order_by(FriendRequest.id).all()
+    accept_requests(ana, [old.id])
+    reject_requests(ana, [recent.id])
+    assert recent.responded_at is not None
+
+    # Todos enviados há 60 dias; só o primeiro foi respondido há mais de 30
+    sent_at = datetime.utcnow() - timedelta(days=60)
+    FriendRequest.query.update({FriendRequest.timestamp: sent_at})
+    old.responded_at = datetime.utcnow() - timedelta(days=31)
+    db.session.commit()
+
+    assert purge_requests(30) == 1
+    assert [request.id for request in FriendRequest.query.order_by(FriendRequest.id)] == [recent.id, pending.id]
@@ -0,0 +1,85 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import threading
+import time
+from app import db
+from app.graph import FriendGraph
+from app.models import User, Friendship
+
+# IDs acima de 2^31 (fora do alcance de um inteiro de 32 bits)
+BIG = 2 ** 31 + 10
+
+
+def befriend(*pairs):
+    for user_id, friend_id in pairs:
+        db.session.add_all([Friendship(user_id=user_id, friend_id=friend_id), Friendship(user_id=friend_id, friend_id=user_id)])
+    db.session.commit()
+
+
+def create_users(*ids):
+    db.session.add_all([User(id=user_id, username=f'user{user_id}', email=f'user{user_id}@example.com', password='x')
+                        for user_id in ids])
+    db.session.commit()
+
+
+def test_load_in_batches_with_64_bit_ids(app):
+    create_users(1, 2, 3, BIG)
+    befriend((1, 2), (1, 3), (1, BIG), (2, BIG))
+    graph = FriendGraph(refresh_interval=0)
+
+    graph.load(batch_size=2)
+
+    assert list(graph.friend_ids(1)) == [2, 3, BIG]
+    assert list(graph.friend_ids(BIG)) == [1, 2]
+    assert graph.mutual_count(1, 2) == 1
+    assert graph.suggestions(3) == [(2, 1), (BIG, 1)]
+
+
+def test_changes_during_a_load_are_kept(app, monkeypatch):
+    create_users(1, 2, 3, 4)
+    befriend((1, 2), (3, 4))
+    graph = FriendGraph(refresh_interval=0)
+    graph.load()
+    yields = []
+
+    def concurrent_change(seconds):
+        # Outra requisição desfaz e cria amizades enquanto os lotes são lidos
+        if not yields:
+            graph.remove_friendship(1, 2)
+            graph.add_friendship(1, 3)
+        yields.append(seconds)
+
+    monkeypatch.setattr('app.graph.time.sleep', concurrent_change)
+    graph.load(batch_size=1)
+
+    assert yields
+    assert list(graph.friend_ids(1)) == [3]
+    assert list(graph.friend_ids(3)) == [1, 4]
+
+
+def test_refresh_runs_in_the_background(app, monkeypatch):
+    create_users(1, 2)
+    graph = FriendGraph(refresh_interval=60)
+    graph.load()
+    befriend((1, 2))
+    graph._loaded_at -= 120
+    started, release = threading.Event(), threading.Event()
+    load = graph.load
+
+    def slow_load(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        load(*args, **kwargs)
+
+    monkeypatch.setattr(graph, 'load', slow_load)
+    # A requisição recebe o índice atual sem esperar a recarga
+    assert list(graph.friend_ids(1)) == []
+    assert started.wait(5)
+    assert list(graph.friend_ids(1)) == []
+    release.set()
+    deadline = time.monotonic() + 5
+    while not graph.are_friends(1, 2) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert graph.are_friends(1, 2)
@@ -0,0 +1,116 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import pytest
+from app import db, bcrypt
+from app.models import User
+from app.throttle import login_throttle, LoginThrottle, MemoryThrottleStore, RedisThrottleStore
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='ana', email='ana@example.com', password=bcrypt.generate_password_hash('secret'))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def login(client, email, password, ip='10.0.0.1'):
+    return client.post('/login', data={'email': email, 'password': password}, environ_base={'REMOTE_ADDR': ip})
+
+
+def test_ip_limit_refuses_before_hashing(app, client, user, monkeypatch):
+    app.config['LOGIN_MAX_ATTEMPTS_PER_IP'] = 3
+    app.extensions.pop('login_throttle', None)
+    for n in range(3):
+        assert login(client, f'user{n}@example.com', 'wrong').status_code == 200
+
+    checks = []
+    monkeypatch.setattr(bcrypt, 'check_password_hash', lambda *args: checks.append(args))
+    response = login(client, 'ana@example.com', 'secret')
+
+    assert response.status_code == 429
+    assert 0 < int(response.headers['Retry-After']) <= app.config['LOGIN_THROTTLE_WINDOW']
+    assert checks == []
+    monkeypatch.undo()
+    # Outro IP continua liberado
+    assert login(client, 'ana@example.com', 'secret', ip='10.0.0.2').status_code == 302
+
+
+def test_account_limit_only_refuses_wrong_passwords(app, client, user):
+    app.config['LOGIN_MAX_ATTEMPTS_PER_ACCOUNT'] = 2
+    app.extensions.pop('login_throttle', None)
+    assert login(client, 'ana@example.com', 'wrong', ip='10.0.0.1').status_code == 200
+    assert login(client, 'ana@example.com', 'wrong', ip='10.0.0.2').status_code == 429
+    assert login(client, 'ana@example.com', 'wrong', ip='10.0.0.3').status_code == 429
+
+    # O dono da conta entra com a senha correta, e as falhas da conta são zeradas
+    assert login(client, 'ana@example.com', 'secret', ip='10.0.0.4').status_code == 302
+    assert login_throttle.account_retry_after('ana@example.com') == 0
+
+
+def test_retry_after_is_the_time_left(app, monkeypatch):
+    app.config['LOGIN_THROTTLE_WINDOW'] = 100
+    now = [1000.0]
+    monkeypatch.setattr('app.throttle.time.monotonic', lambda: now[0])
+    monkeypatch.setattr('app.cache.time.monotonic', lambda: now[0])
+    throttle = LoginThrottle(MemoryThrottleStore(app), max_per_ip=1, max_per_account=1)
+    throttle.record_failure('10.0.0.1', 'ana@example.com')
+
+    now[0] += 40
+    assert throttle.retry_after('10.0.0.1') == 60
+    assert throttle.account_retry_after('ana@example.com') == 60
+    now[0] += 61
+    assert throttle.retry_after('10.0.0.1') == 0
+
+
+def test_redis_store_is_shared_between_processes(app, monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr('redis.Redis.from_url', lambda *args, **kwargs: fakeredis.FakeRedis(server=server))
+    app.config['LOGIN_THROTTLE_WINDOW'] = 100
+    # Dois workers com os contadores no mesmo Redis
+    workers = [LoginThrottle(RedisThrottleStore(app), max_per_ip=2, max_per_account=10) for _ in range(2)]
+    workers[0].record_failure('10.0.0.1', 'ana@example.com')
+    workers[1].record_failure('10.0.0.1', 'bruno@example.com')
+
+    assert 0 < workers[0].retry_after('10.0.0.1') <= 100
+    assert workers[1].retry_after('10.0.0.2') == 0
+    workers[1].reset('ana@example.com')
+    assert workers[0].store.get('account:ana@example.com') == (0, 0)
+
+
+def test_password_is_rehashed_on_login(app, client):
+    old_hash = bcrypt.generate_password_hash('secret', rounds=5)
+    db.session.add(User(username='ana', email='ana@example.com', password=old_hash))
+    db.session.commit()
+    assert bcrypt.needs_rehash(old_hash)
+
+    assert login(client, 'ana@example.com', 'secret').status_code == 302
+
+    new_hash = User.query.filter_by(username='ana').one().password
+    assert new_hash != old_hash
+    assert not bcrypt.needs_rehash(new_hash)
+    assert bcrypt.check_password_hash(new_hash, 'secret')
+
+
+def test_email_is_normalized(app, client):
+    response = client.post('/register', data={'username': 'ana', 'email': '  Ana@Example.COM ', 'password': 'secret',
+                                              'confirm_password': 'secret'})
+    assert response.status_code == 302
+    assert User.query.one().email == 'ana@example.com'
+
+    # Mesma conta com outra grafia: cadastro recusado, login aceito
+    client.post('/register', data={'username': 'other', 'email': 'ANA@example.com', 'password': 'secret',
+                                   'confirm_password': 'secret'})
+    assert User.query.count() == 1
+    assert login(client, ' ANA@example.com', 'secret').status_code == 302
+
+
+def test_failures_with_different_spellings_count_for_the_same_account(app, client, user):
+    app.config['LOGIN_MAX_ATTEMPTS_PER_ACCOUNT'] = 2
+    app.extensions.pop('login_throttle', None)
+    login(client, 'Ana@Example.com', 'wrong', ip='10.0.0.1')
+
+    assert login(client, ' ANA@EXAMPLE.COM', 'wrong', ip='10.0.0.2').status_code == 429
@@ -0,0 +1,62 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import io
+import pytest
+from app import db
+from app.media import process_post_image, variant_filename
+from app.models import User, Post
+from app.storage import storage, media_key
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def jpeg_with_gps():
+    # Imagem com EXIF: orientação e coordenadas GPS (tag 0x8825)
+    image = Image.new('RGB', (64, 32), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x0112] = 1
+    exif[0x8825] = {1: 'S', 2: (23.0, 33.0, 1.0), 3: 'W', 4: (46.0, 38.0, 2.0)}
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def post(app, client, login):
+    user = User(username='ana', email='ana@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    login(user)
+    response = client.post('/post/new', data={'title': 't', 'content': 'c', 'image': (io.BytesIO(jpeg_with_gps()), 'photo.jpg')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+    return Post.query.one()
+
+
+def test_original_image_is_never_served(app, client, post, monkeypatch):
+    assert storage.exists(media_key('post_pics', post.image_file))
+    assert client.get(f'/media/post_pics/{post.image_file}').status_code == 404
+
+    # Enquanto as variantes não ficam prontas, o feed não aponta para o original
+    db.session.query(Post).update({Post.image_status: 'pending'})
+    db.session.commit()
+    page = client.get('/').data.decode()
+    assert post.image_file not in page
+    assert 'Image processing' in page
+
+
+def test_variants_have_no_metadata(app, client, post):
+    process_post_image(app, post.id, post.image_file)
+    filename = Post.query.one().image_file
+    assert Post.query.one().image_status == 'ready'
+
+    for extension in ('jpg', 'webp'):
+        response = client.get(f"/media/post_pics/{variant_filename(filename, 'feed', extension)}")
+        assert response.status_code == 200
+        with Image.open(io.BytesIO(response.data)) as variant:
+            assert not variant.getexif()
+    page = client.get('/').data.decode()
+    assert variant_filename(filename, 'feed', 'jpg') in page
+    assert f'post_pics/{filename}' not in page
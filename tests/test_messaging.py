@@ -0,0 +1,63 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from sqlalchemy.orm import Query
+from app import db
+from app.messaging import conversation_between
+from app.models import User, Friendship, Message, Conversation, ConversationMember
+
+
+def create_users():
+    users = [User(username=name, email=f'{name}@example.com', password='x') for name in ('ana', 'bruno')]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def test_conversation_between_creates_members(app):
+    ana, bruno = create_users()
+
+    conversation = conversation_between(bruno.id, ana.id, create=True)
+    db.session.commit()
+
+    assert (conversation.user_a_id, conversation.user_b_id) == (ana.id, bruno.id)
+    assert {(member.user_id, member.other_user_id) for member in ConversationMember.query} == {
+        (ana.id, bruno.id), (bruno.id, ana.id)}
+
+
+def test_concurrent_creation_keeps_pending_changes(app, monkeypatch):
+    ana, bruno = create_users()
+    existing = conversation_between(ana.id, bruno.id, create=True)
+    db.session.commit()
+
+    # Outra requisição criou a conversa depois da consulta: a inserção desta viola a unicidade
+    ana.about_me = 'pending change'
+    monkeypatch.setattr(Query, 'first', lambda self: None)
+    conversation = conversation_between(ana.id, bruno.id, create=True)
+    monkeypatch.undo()
+    db.session.commit()
+
+    assert conversation.id == existing.id
+    assert Conversation.query.count() == 1
+    assert ConversationMember.query.count() == 2
+    db.session.expire_all()
+    assert User.query.get(ana.id).about_me == 'pending change'
+
+
+def test_message_body_is_validated(app, client, login):
+    ana, bruno = create_users()
+    db.session.add_all([Friendship(user_id=ana.id, friend_id=bruno.id), Friendship(user_id=bruno.id, friend_id=ana.id)])
+    db.session.commit()
+    login(ana)
+
+    for body in ('', 'x' * 501):
+        response = client.post('/messages', data={'recipient': 'bruno', 'body': body}, follow_redirects=True)
+        assert b'Messages must have between 1 and 500 characters' in response.data
+        response = client.post('/messages/bruno', data={'body': body}, follow_redirects=True)
+        assert b'Messages must have between 1 and 500 characters' in response.data
+    assert Message.query.count() == 0
+
+    client.post('/messages', data={'recipient': 'bruno', 'body': 'hi'})
+    client.post('/messages/bruno', data={'body': 'x' * 500})
+    assert Message.query.count() == 2
@@ -0,0 +1,69 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+from datetime import datetime, timedelta
+from app import db
+from app.feed import get_feed_page
+from app.models import User, Post, Friendship
+from app.pagination import encode_cursor, decode_cursor
+
+
+def create_feed(posts):
+    """
+    Cria um usuário e um amigo com posts; metade dos posts compartilha o mesmo timestamp,
+    para que a ordem dependa do desempate pelo ID.
+    """
+    owner, friend, stranger = users = [User(username=name, email=f'{name}@example.com', password='x')
+                                       for name in ('owner', 'friend', 'stranger')]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([Friendship(user_id=owner.id, friend_id=friend.id), Friendship(user_id=friend.id, friend_id=owner.id)])
+    start = datetime(2026, 1, 1)
+    for n in range(posts):
+        timestamp = start if n % 2 else start + timedelta(minutes=n)
+        db.session.add(Post(title=str(n), content='c', user_id=(owner, friend)[n % 2].id, timestamp=timestamp))
+        db.session.add(Post(title='hidden', content='c', user_id=stranger.id, timestamp=timestamp))
+    db.session.commit()
+    return owner
+
+
+def read_all_pages(owner, page_size):
+    pages, cursor = [], None
+    while True:
+        posts, cursor = get_feed_page(owner, cursor, page_size)
+        pages.append(posts)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_roundtrip_and_invalid_cursors():
+    timestamp = datetime(2026, 1, 2, 3, 4, 5, 678901)
+    assert decode_cursor(encode_cursor(timestamp, 42)) == (timestamp, 42)
+    for cursor in (None, '', 'not base64!', 'bm9waXBl', encode_cursor(timestamp, 1)[:-4] + 'AAAA'):
+        assert decode_cursor(cursor) is None
+
+
+def test_pages_follow_timestamp_then_id(app):
+    owner = create_feed(11)
+    pages = read_all_pages(owner, 4)
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    posts = [post for page in pages for post in page]
+    assert {post.title for post in posts} == {str(n) for n in range(11)}
+    assert [(post.timestamp, post.id) for post in posts] == sorted(((post.timestamp, post.id) for post in posts), reverse=True)
+
+
+def test_new_posts_do_not_shift_the_next_page(app):
+    owner = create_feed(6)
+    first, cursor = get_feed_page(owner, None, 3)
+
+    # Post publicado entre duas páginas: fica no topo e não repete nem pula itens da próxima página
+    db.session.add(Post(title='new', content='c', user_id=owner.id, timestamp=datetime(2027, 1, 1)))
+    db.session.commit()
+    second, cursor = get_feed_page(owner, cursor, 3)
+
+    assert cursor is None
+    assert {post.title for post in first + second} == {str(n) for n in range(6)}
+    # Um cursor inválido volta à primeira página
+    assert get_feed_page(owner, 'garbage', 3)[0][0].title == 'new'
@@ -0,0 +1,78 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import pytest
+from app import db
+from app.models import User, Post, Comment
+from app.search import search, match_expression, autocomplete_usernames, rebuild_search_index
+
+
+@pytest.fixture
+def content(app):
+    ana, bruno = users = [User(username=name, email=f'{name}@example.com', password='x', about_me=about)
+                          for name, about in (('felipe_dev', 'python and flask'), ('fernanda', 'coffee'))]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all([
+        Post(title='Coffee notes', content='brewing at home', user_id=ana.id),
+        Post(title='Weekend', content='too much coffee and a café in town', user_id=bruno.id),
+        Post(title='Travel', content='mountains', user_id=bruno.id),
+    ])
+    db.session.flush()
+    db.session.add(Comment(body='Great coffee!', post_id=1, user_id=bruno.id))
+    db.session.commit()
+
+
+def titles(results):
+    return [post.title for post in results]
+
+
+def test_match_expression_does_not_expose_fts_syntax():
+    assert match_expression('coffee OR "tea') == '"coffee" "OR" "tea"'
+    assert match_expression('fel', prefix=True) == '"fel"*'
+    assert match_expression('  "" ') is None
+
+
+def test_posts_are_ranked_with_title_weight(content):
+    # Título pesa mais que o conteúdo; diacríticos são ignorados
+    assert titles(search('posts', 'coffee')[0]) == ['Coffee notes', 'Weekend']
+    assert titles(search('posts', 'cafe')[0]) == ['Weekend']
+    assert titles(search('posts', 'coffee town')[0]) == ['Weekend']
+    assert search('posts', 'NEAR(coffee') == ([], False)
+
+
+def test_index_follows_writes(content):
+    post = Post.query.filter_by(title='Travel').one()
+    post.content = 'coffee in the mountains'
+    db.session.commit()
+    assert 'Travel' in titles(search('posts', 'coffee')[0])
+
+    db.session.delete(post)
+    db.session.commit()
+    assert 'Travel' not in titles(search('posts', 'mountains')[0])
+    assert [comment.body for comment in search('comments', 'coffee')[0]] == ['Great coffee!']
+
+
+def test_users_by_prefix_and_pagination(app, content):
+    # Nomes de usuário são buscados pelo início, com '_' como parte do nome
+    assert {user.username for user in search('users', 'fe')[0]} == {'felipe_dev', 'fernanda'}
+    assert [user.username for user in search('users', 'felipe_')[0]] == ['felipe_dev']
+    assert autocomplete_usernames('fe') == ['felipe_dev', 'fernanda']
+
+    app.config['SEARCH_PAGE_SIZE'] = 1
+    first, has_next = search('posts', 'coffee')
+    second, has_last = search('posts', 'coffee', page=2)
+    assert (titles(first), has_next, titles(second), has_last) == (['Coffee notes'], True, ['Weekend'], False)
+    app.config['SEARCH_MAX_PAGES'] = 1
+    assert search('posts', 'coffee', page=2) == (first, False)
+
+
+def test_rebuild_restores_a_lost_index(content):
+    db.session.execute('DROP TRIGGER post_fts_insert')
+    db.session.add(Post(title='Coffee again', content='', user_id=1))
+    db.session.commit()
+    assert 'Coffee again' not in titles(search('posts', 'coffee')[0])
+
+    rebuild_search_index()
+    assert 'Coffee again' in titles(search('posts', 'coffee')[0])
@@ -0,0 +1,125 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import os
+import threading
+import time
+import pytest
+from app import db
+from app.media import delete_unreferenced_media, purge_unreferenced_media
+from app.models import User, Post
+from app.storage import LocalStorage, S3Storage, media_key
+
+KEY = media_key('post_videos', 'a1b2c3d4e5f60718.mp4')
+
+
+def upload(tmp_path, name, content=b'video'):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def age(storage, key, seconds):
+    """
+    Envelhece um arquivo armazenado (data de modificação no passado).
+    """
+    path = storage.local_path(key)
+    os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+
+@pytest.fixture
+def s3_storage(app):
+    """
+    S3Storage em um bucket simulado pelo moto.
+    """
+    moto = pytest.importorskip('moto')
+    boto3 = pytest.importorskip('boto3')
+    os.environ.update(AWS_ACCESS_KEY_ID='test', AWS_SECRET_ACCESS_KEY='test', AWS_DEFAULT_REGION='us-east-1')
+    with moto.mock_aws():
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='media')
+        app.config.update(S3_BUCKET='media', S3_REGION='us-east-1', S3_PREFIX='media/')
+        yield S3Storage(app)
+
+
+def test_local_put_concurrent_uploads_of_the_same_content(app, tmp_path):
+    storage = LocalStorage(app)
+    paths = [upload(tmp_path, f'upload{n}') for n in range(8)]
+    errors = []
+
+    def put(path):
+        try:
+            storage.put(KEY, path)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=put, args=(path,)) for path in paths]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert open(storage.local_path(KEY), 'rb').read() == b'video'
+    assert not any(os.path.exists(path) for path in paths)
+    assert list(storage.keys('post_videos')) == [KEY]
+
+
+def test_local_put_refreshes_reused_content(app, tmp_path):
+    storage = LocalStorage(app)
+    storage.put(KEY, upload(tmp_path, 'first'))
+    age(storage, KEY, 3600)
+
+    storage.put(KEY, upload(tmp_path, 'second'))
+
+    assert time.time() - storage.modified(KEY) < 60
+
+
+def test_delete_keeps_recently_reused_media(app, tmp_path):
+    storage = LocalStorage(app)
+    storage.put(KEY, upload(tmp_path, 'first'))
+    files = [('post_videos', KEY.split('/', 1)[1])]
+
+    # Um upload idêntico acabou de reaproveitar o arquivo e o post ainda não foi gravado
+    assert delete_unreferenced_media(files) == 0
+    assert storage.exists(KEY)
+
+    age(storage, KEY, (app.config['UPLOAD_RETENTION_HOURS'] + 1) * 3600)
+    assert delete_unreferenced_media(files) == 1
+    assert not storage.exists(KEY)
+
+
+def test_purge_keeps_referenced_media(app, tmp_path):
+    storage = LocalStorage(app)
+    used = media_key('post_videos', '0f0e0d0c0b0a0908.mp4')
+    storage.put(KEY, upload(tmp_path, 'orphan', b'orphan'))
+    storage.put(used, upload(tmp_path, 'used', b'used'))
+    author = User(username='author', email='author@example.com', password='x')
+    db.session.add(Post(title='t', content='c', author=author, video_file=used.split('/', 1)[1]))
+    db.session.commit()
+
+    assert purge_unreferenced_media(hours=0) == 1
+    assert list(storage.keys('post_videos')) == [used]
+
+
+def test_s3_storage(app, tmp_path, s3_storage):
+    s3_storage.put(KEY, upload(tmp_path, 'first'))
+    first = s3_storage.modified(KEY)
+    head = s3_storage.client.head_object(Bucket='media', Key='media/' + KEY)
+    assert head['ContentType'] == 'video/mp4'
+    assert 'immutable' in head['CacheControl']
+    assert s3_storage.exists(KEY)
+    assert b''.join(s3_storage.stream(KEY)) == b'video'
+    assert list(s3_storage.keys('post_videos')) == [KEY]
+
+    # Conteúdo reaproveitado: o objeto não é enviado de novo, mas a data é renovada
+    time.sleep(1)
+    path = upload(tmp_path, 'second')
+    s3_storage.put(KEY, path)
+    assert not os.path.exists(path)
+    assert s3_storage.modified(KEY) > first
+    assert s3_storage.client.head_object(Bucket='media', Key='media/' + KEY)['CacheControl'] == head['CacheControl']
+
+    s3_storage.delete(KEY)
+    assert not s3_storage.exists(KEY)
+    assert s3_storage.modified(KEY) is None
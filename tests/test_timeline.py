@@ -0,0 +1,96 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from app import db, timeline
+from app.feed import get_feed_page
+from app.friendships import send_request, accept_requests
+from app.models import User, Post, FriendRequest, TimelineEntry
+
+
+@pytest.fixture
+def users(app):
+    app.config['FEED_FANOUT'] = 'write'
+    users = [User(username=name, email=f'{name}@example.com', password='x') for name in ('ana', 'bruno', 'carla')]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def publish(author, title, minutes=0):
+    post = Post(title=title, content='c', user_id=author.id, timestamp=datetime(2026, 1, 1) + timedelta(minutes=minutes))
+    db.session.add(post)
+    db.session.flush()
+    timeline.fan_out_post(post)
+    db.session.commit()
+    return post
+
+
+def befriend(sender, recipient):
+    send_request(sender, recipient)
+    accept_requests(recipient, [FriendRequest.query.filter_by(sender_id=sender.id, status='pending').one().id])
+
+
+def timeline_titles(user):
+    return [post.title for post in get_feed_page(user, None, 100)[0]]
+
+
+def test_posts_fan_out_to_friends_only(users):
+    ana, bruno, carla = users
+    befriend(ana, bruno)
+    publish(ana, 'hello')
+
+    assert timeline_titles(ana) == ['hello']
+    assert timeline_titles(bruno) == ['hello']
+    assert timeline_titles(carla) == []
+
+    timeline.remove_post(Post.query.one().id)
+    db.session.commit()
+    assert TimelineEntry.query.count() == 0
+
+
+def test_new_friendship_backfills_recent_posts(app, users):
+    app.config['TIMELINE_BACKFILL_SIZE'] = 2
+    ana, bruno, carla = users
+    for minutes in range(3):
+        publish(ana, f'ana {minutes}', minutes)
+    publish(bruno, 'bruno 0', 10)
+    befriend(carla, ana)
+    befriend(carla, bruno)
+
+    # Só os posts mais recentes de cada amigo, na ordem do feed
+    assert timeline_titles(carla) == ['bruno 0', 'ana 2', 'ana 1']
+    # O backfill não duplica posts já presentes na timeline
+    timeline.backfill_friendship(carla.id, bruno.id)
+    db.session.commit()
+    assert timeline_titles(carla) == ['bruno 0', 'ana 2', 'ana 1']
+    assert timeline_titles(ana) == ['ana 2', 'ana 1', 'ana 0']
+
+
+def test_ended_friendship_leaves_the_timeline(users):
+    ana, bruno, _ = users
+    befriend(ana, bruno)
+    publish(ana, 'ana')
+    publish(bruno, 'bruno', 1)
+
+    timeline.remove_friendship(ana.id, bruno.id)
+    db.session.commit()
+    assert timeline_titles(ana) == ['ana']
+    assert timeline_titles(bruno) == ['bruno']
+
+
+def test_rebuild_matches_the_read_time_feed(app, users):
+    ana, bruno, carla = users
+    befriend(ana, bruno)
+    app.config['FEED_FANOUT'] = 'read'
+    for minutes, author in enumerate((ana, bruno, carla, bruno)):
+        publish(author, f'{author.username} {minutes}', minutes)
+    expected = timeline_titles(ana)
+
+    app.config['FEED_FANOUT'] = 'write'
+    assert timeline_titles(ana) == []
+    timeline.rebuild_timeline(ana.id, 100)
+    db.session.commit()
+    assert timeline_titles(ana) == expected == ['bruno 3', 'bruno 1', 'ana 0']
@@ -0,0 +1,87 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import hashlib
+import os
+import pytest
+from app import db, uploads
+from app.models import User
+from app.storage import storage, media_key
+
+
+@pytest.fixture
+def user(app, login):
+    user = User(username='ana', email='ana@example.com', password='x')
+    db.session.add(user)
+    db.session.commit()
+    login(user)
+    return user
+
+
+def start(client, size, filename='clip.mp4'):
+    return client.post('/uploads', json={'filename': filename, 'size': size})
+
+
+def patch(client, upload_id, offset, data):
+    return client.patch(f'/uploads/{upload_id}', data=data, headers={'Upload-Offset': str(offset)})
+
+
+def test_chunked_upload_rejects_wrong_offset_and_resumes(app, client, user):
+    data = os.urandom(3000)
+    upload_id = start(client, len(data)).get_json()['id']
+
+    assert patch(client, upload_id, 0, data[:1000]).get_json() == {'offset': 1000, 'complete': False}
+    # Parte repetida (ex.: resposta perdida) ou fora de ordem: 409 com o offset atual
+    for offset in (0, 2000):
+        response = patch(client, upload_id, offset, data[1000:2000])
+        assert response.status_code == 409
+        assert response.get_json() == {'offset': 1000}
+    assert client.get(f'/uploads/{upload_id}').get_json()['offset'] == 1000
+
+    # Sem o hash em memória (outro processo ou reinício), o hash é recalculado do arquivo parcial
+    uploads._upload_hashes.clear()
+    assert patch(client, upload_id, 1000, data[1000:2000]).get_json()['offset'] == 2000
+    assert patch(client, upload_id, 2000, data[2000:]).get_json() == {'offset': 3000, 'complete': True}
+
+    filename = uploads.claim_upload(upload_id, user.id, 'post_videos')
+    assert filename == hashlib.sha256(data).hexdigest()[:16] + '.mp4'
+    assert storage.exists(media_key('post_videos', filename))
+    # Um segundo envio do formulário não consome o mesmo upload
+    assert uploads.claim_upload(upload_id, user.id, 'post_videos') is None
+
+
+def test_claim_upload_tolerates_concurrent_claim(app, client, user, monkeypatch):
+    upload_id = start(client, 10).get_json()['id']
+    patch(client, upload_id, 0, b'0123456789')
+    # A sessão é removida por outra requisição entre a leitura e a remoção
+    load_upload = uploads.load_upload
+    def load_and_claim(*args):
+        session = load_upload(*args)
+        os.remove(uploads._session_path(upload_id, 'json'))
+        return session
+    monkeypatch.setattr(uploads, 'load_upload', load_and_claim)
+    assert uploads.claim_upload(upload_id, user.id, 'post_videos') is None
+
+
+def test_chunked_upload_size_limits(app, client, user):
+    app.config['VIDEO_MAX_SIZE'] = 100
+    assert start(client, 101).status_code == 413
+    assert start(client, 10, 'notes.txt').status_code == 400
+
+    upload_id = start(client, 10).get_json()['id']
+    assert patch(client, upload_id, 0, b'01234').get_json()['offset'] == 5
+    # Uma parte que ultrapassa o tamanho declarado é descartada inteira
+    assert patch(client, upload_id, 5, b'0123456789').status_code == 413
+    assert client.get(f'/uploads/{upload_id}').get_json()['offset'] == 5
+
+
+def test_open_uploads_per_user_are_capped(app, client, user):
+    app.config['UPLOAD_MAX_OPEN_PER_USER'] = 2
+    first = start(client, 10).get_json()['id']
+    assert start(client, 10).status_code == 201
+    assert start(client, 10).status_code == 429
+
+    # Uploads concluídos deixam de contar
+    patch(client, first, 0, b'0123456789')
+    assert start(client, 10).status_code == 201
@@ -0,0 +1,106 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app import db, writebehind
+from app.models import User, Post, Like, Notification
+from app.writebehind import WriteBehindQueue
+
+
+@pytest.fixture
+def queue(app):
+    # Intervalo longo: as gravações acontecem só pelas chamadas a flush() do teste
+    queue = WriteBehindQueue(app, interval=3600, max_pending=1000, max_attempts=2)
+    yield queue
+    queue._stopped = True
+    queue._wakeup.set()
+
+
+@pytest.fixture
+def posts(app):
+    author, reader = [User(username=name, email=f'{name}@example.com', password='x') for name in ('ana', 'bruno')]
+    db.session.add_all([author, reader])
+    db.session.flush()
+    posts = [Post(title=str(n), content='c', user_id=author.id) for n in range(2)]
+    db.session.add_all(posts)
+    db.session.commit()
+    # flush() encerra a sessão, como na thread de gravação: os testes usam o ID do leitor e posts já carregados
+    return reader.id, posts
+
+
+def like_counts():
+    db.session.expire_all()
+    return [post.like_count for post in Post.query.order_by(Post.id)]
+
+
+def test_opposite_toggles_cancel_before_the_write(queue, posts):
+    reader, (post, _) = posts
+    assert queue.toggle_like(reader, post, (post.user_id, 'liked')) == (True, 1)
+    assert queue.liked_post_ids(reader, [post.id], set()) == {post.id}
+    assert queue.toggle_like(reader, post) == (False, 0)
+
+    assert queue.flush() == 0
+    assert Like.query.count() == 0
+    assert Notification.query.count() == 0
+    assert like_counts() == [0, 0]
+
+
+def test_batch_is_written_once(queue, posts):
+    reader, (first, second) = posts
+    first_id = first.id
+    queue.toggle_like(reader, first, (first.user_id, 'liked'))
+    queue.toggle_like(reader, second)
+    queue.add_notifications([(first.user_id, 'hello')])
+
+    assert queue.flush() == 3
+    assert like_counts() == [1, 1]
+    assert sorted(message for (message,) in db.session.query(Notification.message)) == ['hello', 'liked']
+    # Descurtir depois da gravação remove o like gravado
+    assert queue.toggle_like(reader, Post.query.get(first_id)) == (False, 0)
+    queue.flush()
+    assert like_counts() == [0, 1]
+
+
+def test_failed_batch_returns_to_the_queue(queue, posts, monkeypatch):
+    reader, (post, _) = posts
+    queue.toggle_like(reader, post)
+
+    # Falha de conexão: o lote inteiro volta, sem contar como rejeição
+    write = queue._write
+    monkeypatch.setattr(queue, '_write', lambda *args: (_ for _ in ()).throw(OperationalError('INSERT', {}, Exception('down'))))
+    with pytest.raises(OperationalError):
+        queue.flush()
+    assert like_counts() == [0, 0]
+    # O estado pendente continua visível
+    assert queue.liked_post_ids(reader, [post.id], set()) == {post.id}
+
+    monkeypatch.setattr(queue, '_write', write)
+    assert queue.flush() == 1
+    assert like_counts() == [1, 0]
+
+
+def test_rejected_items_are_retried_then_dropped(queue, posts, monkeypatch):
+    reader, (good, bad) = posts
+    bad_id = bad.id
+    insert = writebehind.insert_ignoring_duplicates
+
+    def reject_bad_post(session, table, rows):
+        if any(row['post_id'] == bad_id for row in rows):
+            raise IntegrityError('INSERT', {}, Exception('rejected'))
+        return insert(session, table, rows)
+    monkeypatch.setattr(writebehind, 'insert_ignoring_duplicates', reject_bad_post)
+
+    queue.toggle_like(reader, good)
+    queue.toggle_like(reader, bad)
+    # O lote é gravado item a item: o like aceito é gravado, o rejeitado volta para a fila
+    assert queue.flush() == 1
+    assert like_counts() == [1, 0]
+    assert queue._like_count == 1
+
+    # Segunda rejeição (max_attempts=2): o item é descartado
+    assert queue.flush() == 1
+    assert queue._like_count == 0
+    assert queue.flush() == 0
+    assert like_counts() == [1, 0]
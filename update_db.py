@@ -2,8 +2,12 @@
 Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
 """
 
-from app import app, db
-from app.models import Post
+from flask_migrate import Migrate, upgrade
+from app import create_app, db
+
+app = create_app()
+Migrate(app, db)
 
 with app.app_context():
-    db.create_all()
+    # Cria ou atualiza as tabelas pelas migrações (equivalente a "flask db upgrade")
+    upgrade()
@@ -0,0 +1,12 @@
+"""
+Desenvolvido por (Developed by / 開發者) Felipe Ferreira (f3cdde)
+
+Ponto de entrada WSGI de produção: gunicorn -c gunicorn.conf.py
+"""
+
+from app import create_app, preload
+from app.graph import load_friend_graph
+
+app = create_app()
+preload(app)
+load_friend_graph(app)